@@ -0,0 +1,271 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import json
+import math
+import os
+import time
+
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers
+from starlette.routing import compile_path
+
+from app.auth.auth import verify_token
+from app.database import engine
+from app.telemetry import admission_rejections_total
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+ADMISSION_STORE = os.getenv("ADMISSION_STORE", "memory")  # "memory" (per worker) or "postgres" (shared)
+# Requests per minute per user on routes without a rule; 0 disables the default limit
+ADMISSION_DEFAULT_USER_PER_MINUTE = float(os.getenv("ADMISSION_DEFAULT_USER_PER_MINUTE", "600"))
+ADMISSION_DEFAULT_BURST = int(os.getenv("ADMISSION_DEFAULT_BURST", "100"))
+
+MEMORY_STORE_MAX_KEYS = 100_000
+POSTGRES_PRUNE_INTERVAL_SECONDS = 300
+CONCURRENCY_RETRY_AFTER_SECONDS = 1
+
+REJECTION_MESSAGES = {
+    "concurrency": "Too many of these requests are in progress; retry shortly",
+    "user_rate": "Request rate exceeded for this user",
+    "route_rate": "Request rate exceeded for this endpoint",
+}
+
+
+class AdmissionRule(NamedTuple):
+    method: str
+    path: str
+    user_per_minute: float = 0       # Token bucket per user (or client address when anonymous)
+    route_per_minute: float = 0      # Token bucket shared by every caller of the route
+    burst: int = 1                   # Bucket size: requests allowed back to back
+    max_concurrent: int = 0          # Requests in progress per worker; more are shed, not queued
+
+
+# Heavy routes: uploads embed whole documents, revisions and daily tasks call the LLM,
+# bulk transfer streams every row a user owns, and login hashes passwords
+DEFAULT_RULES = [
+    AdmissionRule("POST", "/projects/upload-docs", user_per_minute=6, route_per_minute=120, burst=3, max_concurrent=4),
+    AdmissionRule("POST", "/projects/upload-and-analyze", user_per_minute=6, route_per_minute=120, burst=3, max_concurrent=4),
+    AdmissionRule("POST", "/projects/extract-tech-stack", user_per_minute=6, route_per_minute=120, burst=3, max_concurrent=4),
+    AdmissionRule("POST", "/projects/project/{project_id}/revise", user_per_minute=6, route_per_minute=120, burst=3, max_concurrent=4),
+    AdmissionRule("POST", "/projects/generate-daily-tasks", user_per_minute=30, burst=10, max_concurrent=16),
+    AdmissionRule("GET", "/projects/search", user_per_minute=60, burst=20, max_concurrent=8),
+    AdmissionRule("GET", "/bulk/export", user_per_minute=2, burst=2, max_concurrent=2),
+    AdmissionRule("POST", "/bulk/import", user_per_minute=2, burst=2, max_concurrent=2),
+    AdmissionRule("POST", "/auth/login", user_per_minute=10, burst=5),
+    AdmissionRule("POST", "/auth/signup", user_per_minute=5, burst=5),
+]
+
+
+def load_rules() -> List[AdmissionRule]:
+    """Rules from ADMISSION_RULES (a JSON list of rule objects), or the defaults"""
+    configured = os.getenv("ADMISSION_RULES")
+    if not configured:
+        return list(DEFAULT_RULES)
+    return [AdmissionRule(**{**rule, "method": rule["method"].upper()}) for rule in json.loads(configured)]
+
+
+class MemoryBucketStore:
+    """Token buckets kept in this worker, in GCRA form: one theoretical arrival time per key"""
+
+    def __init__(self, max_keys: int = MEMORY_STORE_MAX_KEYS):
+        self.max_keys = max_keys
+        self._tats: Dict[str, float] = {}
+        self._lock = Lock()
+
+    def take(self, key: str, per_minute: float, burst: int) -> float:
+        """Take a token; returns 0 when admitted, otherwise the seconds until one is available"""
+        interval = 60 / per_minute
+        now = time.time()
+        with self._lock:
+            tat = max(self._tats.get(key, now), now) + interval
+            if tat - now > burst * interval:
+                return tat - now - burst * interval
+            self._tats[key] = tat
+            if len(self._tats) > self.max_keys:
+                # A bucket whose arrival time has passed is full, the same as no entry at all
+                self._tats = {bucket: value for bucket, value in self._tats.items() if value > now}
+            return 0
+
+    def refund(self, key: str, per_minute: float):
+        """Put back a token taken for a request that was rejected after all"""
+        with self._lock:
+            if key in self._tats:
+                self._tats[key] -= 60 / per_minute
+
+
+class PostgresBucketStore:
+    """Token buckets in the rate_limit_buckets table, so every worker draws from the same buckets"""
+
+    # One atomic upsert: the bucket advances only when the request fits within the burst
+    TAKE_STATEMENT = text("""
+        INSERT INTO rate_limit_buckets AS bucket (key, tat)
+        VALUES (:key, extract(epoch FROM clock_timestamp()) + :interval)
+        ON CONFLICT (key) DO UPDATE SET tat = GREATEST(bucket.tat + :interval, excluded.tat)
+        WHERE GREATEST(bucket.tat + :interval, excluded.tat) - excluded.tat <= (:burst - 1) * :interval
+        RETURNING tat
+    """)
+    AHEAD_STATEMENT = text(
+        "SELECT tat - extract(epoch FROM clock_timestamp()) FROM rate_limit_buckets WHERE key = :key"
+    )
+    REFUND_STATEMENT = text("UPDATE rate_limit_buckets SET tat = tat - :interval WHERE key = :key")
+    PRUNE_STATEMENT = text(
+        "DELETE FROM rate_limit_buckets WHERE tat < extract(epoch FROM clock_timestamp())"
+    )
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._pruned_at = time.monotonic()
+
+    def take(self, key: str, per_minute: float, burst: int) -> float:
+        interval = 60 / per_minute
+        with self.engine.begin() as connection:
+            if connection.execute(self.TAKE_STATEMENT, {"key": key, "interval": interval, "burst": burst}).first():
+                self._prune(connection)
+                return 0
+            ahead = connection.execute(self.AHEAD_STATEMENT, {"key": key}).scalar() or 0
+            return max(ahead + interval - burst * interval, 0.001)
+
+    def refund(self, key: str, per_minute: float):
+        with self.engine.begin() as connection:
+            connection.execute(self.REFUND_STATEMENT, {"key": key, "interval": 60 / per_minute})
+
+    def _prune(self, connection):
+        if time.monotonic() - self._pruned_at < POSTGRES_PRUNE_INTERVAL_SECONDS:
+            return
+        self._pruned_at = time.monotonic()
+        connection.execute(self.PRUNE_STATEMENT)
+
+
+class AdmissionController:
+    """Decides whether a request may start: token buckets per user and route, then per-worker concurrency caps"""
+
+    def __init__(self, rules: List[AdmissionRule], store=None, shared: bool = False):
+        self.rules = [(compile_path(rule.path)[0], rule) for rule in rules]
+        self.store = store or MemoryBucketStore()
+        # A shared store does I/O, so it is called from a worker thread
+        self.shared = shared
+        self.default_rule = (
+            AdmissionRule("*", "*", user_per_minute=ADMISSION_DEFAULT_USER_PER_MINUTE, burst=ADMISSION_DEFAULT_BURST)
+            if ADMISSION_DEFAULT_USER_PER_MINUTE > 0 else None
+        )
+        self._in_flight: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def match(self, method: str, path: str) -> Optional[AdmissionRule]:
+        for pattern, rule in self.rules:
+            if rule.method == method and pattern.match(path):
+                return rule
+        return self.default_rule
+
+    async def take(self, key: str, per_minute: float, burst: int) -> float:
+        try:
+            if self.shared:
+                return await asyncio.to_thread(self.store.take, key, per_minute, burst)
+            return self.store.take(key, per_minute, burst)
+        except Exception as e:
+            # Fail open: an unreachable shared store must not take the API down with it
+            print(f"⚠️ Admission store unavailable, admitting request: {e}")
+            return 0
+
+    async def refund(self, key: str, per_minute: float):
+        try:
+            if self.shared:
+                await asyncio.to_thread(self.store.refund, key, per_minute)
+            else:
+                self.store.refund(key, per_minute)
+        except Exception as e:
+            print(f"⚠️ Admission store unavailable, token not refunded: {e}")
+
+    async def check(self, rule: AdmissionRule, client: str) -> Optional[Tuple[str, float]]:
+        """None when the request is admitted, holding a concurrency slot to release(); otherwise (reason, retry after seconds)"""
+        route = f"{rule.method} {rule.path}"
+        # Reserve the slot before awaiting the buckets, so requests checked together cannot overshoot the cap
+        if not self.acquire(rule):
+            return "concurrency", CONCURRENCY_RETRY_AFTER_SECONDS
+        user_key = f"user:{client}:{route}"
+        if rule.user_per_minute:
+            wait = await self.take(user_key, rule.user_per_minute, rule.burst)
+            if wait:
+                self.release(rule)
+                return "user_rate", wait
+        if rule.route_per_minute:
+            wait = await self.take(f"route:{route}", rule.route_per_minute, rule.burst)
+            if wait:
+                self.release(rule)
+                if rule.user_per_minute:
+                    # The request is not served, so it must not use up the user's bucket
+                    await self.refund(user_key, rule.user_per_minute)
+                return "route_rate", wait
+        return None
+
+    def acquire(self, rule: AdmissionRule) -> bool:
+        """Take a concurrency slot; False when the rule's cap is reached"""
+        key = (rule.method, rule.path)
+        if rule.max_concurrent and self._in_flight[key] >= rule.max_concurrent:
+            return False
+        self._in_flight[key] += 1
+        return True
+
+    def release(self, rule: AdmissionRule):
+        self._in_flight[(rule.method, rule.path)] -= 1
+
+
+def client_key(scope) -> str:
+    """The authenticated username, else the client address"""
+    authorization = Headers(scope=scope).get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        username = verify_token(authorization[7:])
+        if username:
+            return username
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that sheds load with 429 and Retry-After before requests queue up.
+
+    Written as plain ASGI so a concurrency slot is held until a streamed response finishes.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rule = self.controller.match(scope["method"], scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejection = await self.controller.check(rule, client_key(scope))
+        if rejection:
+            reason, retry_after = rejection
+            admission_rejections_total.inc(route=rule.path, reason=reason)
+            response = ORJSONResponse(
+                status_code=429,
+                content={"success": False, "message": "Too many requests", "error": REJECTION_MESSAGES[reason]},
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(rule)
+
+
+
+def build_controller() -> AdmissionController:
+    if ADMISSION_STORE == "postgres":
+        return AdmissionController(load_rules(), PostgresBucketStore(engine), shared=True)
+    return AdmissionController(load_rules())
+
+
+admission_controller = build_controller()
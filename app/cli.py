@@ -0,0 +1,105 @@
+"""Command line bulk export and import.
+
+Usage:
+    python -m app.cli export --format parquet --output exports/          # one file per table
+    python -m app.cli export --format ndjson --output export.ndjson [--user-id 3]
+    python -m app.cli import --input exports/ --user-id 7                # directory of Parquet files
+    python -m app.cli import --input export.ndjson --user-id 7
+    python -m app.cli migrate                                            # apply schema changes before deploying
+"""
+import argparse
+import itertools
+import os
+import sys
+
+from app.database import SessionLocal, create_tables
+from app.service.bulk_transfer import (
+    TRANSFER_TABLES,
+    BulkExporter,
+    BulkImporter,
+    TransferError,
+    iter_ndjson_records,
+    iter_parquet_records
+)
+
+
+def export_command(args):
+    tables = args.tables.split(",") if args.tables else list(TRANSFER_TABLES)
+    with SessionLocal() as db:
+        exporter = BulkExporter(db, user_id=args.user_id, batch_size=args.batch_size)
+        if args.format == "ndjson":
+            with open(args.output, "wb") as f:
+                for chunk in exporter.iter_ndjson(tables):
+                    f.write(chunk)
+            print(f"Wrote {args.output}")
+            return
+
+        os.makedirs(args.output, exist_ok=True)
+        for table_name in tables:
+            path = os.path.join(args.output, f"{table_name}.parquet")
+            rows = exporter.write_parquet(table_name, path)
+            print(f"Wrote {rows} rows to {path}")
+
+
+def import_command(args):
+    if os.path.isdir(args.input):
+        # Per-table Parquet files, read in dependency order
+        records = itertools.chain.from_iterable(
+            iter_parquet_records(os.path.join(args.input, f"{table_name}.parquet"), table_name)
+            for table_name in TRANSFER_TABLES
+            if os.path.exists(os.path.join(args.input, f"{table_name}.parquet"))
+        )
+        counts = _import(records, args)
+    else:
+        with open(args.input, "rb") as f:
+            counts = _import(iter_ndjson_records(f), args)
+
+    for table_name, table_counts in counts.items():
+        print(f"{table_name}: {table_counts['imported']} imported, {table_counts['skipped']} skipped")
+
+
+def _import(records, args):
+    with SessionLocal() as db:
+        try:
+            return BulkImporter(db, args.user_id, batch_size=args.batch_size).import_records(records)
+        except Exception:
+            db.rollback()
+            raise
+
+
+def migrate_command(args):
+    create_tables()
+    print("Schema is up to date")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk export and import of projects, daily logs and document chunks, and schema migration")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export data as NDJSON or per-table Parquet files")
+    export_parser.add_argument("--format", choices=["ndjson", "parquet"], default="parquet")
+    export_parser.add_argument("--output", required=True, help="NDJSON file, or directory for Parquet files")
+    export_parser.add_argument("--tables", default=None, help=f"Comma-separated subset of: {', '.join(TRANSFER_TABLES)}")
+    export_parser.add_argument("--user-id", type=int, default=None, help="Only export this user's data")
+    export_parser.add_argument("--batch-size", type=int, default=1000)
+    export_parser.set_defaults(handler=export_command)
+
+    import_parser = subparsers.add_parser("import", help="Import an NDJSON file or a directory of Parquet files")
+    import_parser.add_argument("--input", required=True)
+    import_parser.add_argument("--user-id", type=int, required=True, help="User that will own the imported rows")
+    import_parser.add_argument("--batch-size", type=int, default=500)
+    import_parser.set_defaults(handler=import_command)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Create missing tables and apply pending column changes")
+    migrate_parser.set_defaults(handler=migrate_command)
+
+    args = parser.parse_args(argv)
+    try:
+        args.handler(args)
+    except TransferError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+from typing import Callable, Hashable, Optional, Tuple
+import hashlib
+import os
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.shared_cache import MemoryCacheStore, shared_cache
+
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "0"))  # 0 disables the cache
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+CACHE_CONTROL = "private, no-cache"
+
+
+class ResponseCache:
+    """LRU of rendered JSON bodies and their ETags, invalidated explicitly by writers.
+
+    Entries live in this worker unless SHARED_CACHE_STORE=postgres, in which case every
+    worker reads them and sees each other's invalidations.
+    """
+
+    def __init__(self, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS, max_entries: int = RESPONSE_CACHE_SIZE, store=None):
+        self.ttl_seconds = ttl_seconds
+        self.store = store or (shared_cache if shared_cache.shared else MemoryCacheStore(max_entries))
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, bytes]]:
+        if not self.enabled:
+            return None
+        value = self.store.get(_store_key(key))
+        if value is None:
+            return None
+        etag, body = value.split(b"\n", 1)
+        return etag.decode(), body
+
+    def set(self, key: Hashable, etag: str, body: bytes):
+        if not self.enabled:
+            return
+        self.store.set(_store_key(key), etag.encode() + b"\n" + body, self.ttl_seconds)
+
+    def invalidate(self, key: Hashable):
+        if not self.enabled:
+            return
+        self.store.delete(_store_key(key))
+
+    def clear(self):
+        self.store.clear()
+
+
+def _store_key(key: Hashable) -> str:
+    parts = key if isinstance(key, tuple) else (key,)
+    return "response:" + ":".join(str(part) for part in parts)
+
+
+response_cache = ResponseCache()
+
+
+def project_list_cache_key(user_id: int) -> tuple:
+    return (user_id, "my-projects")
+
+
+def project_cache_key(user_id: int, project_id: int) -> tuple:
+    return (user_id, "project", project_id)
+
+
+def daily_log_cache_key(user_id: int, project_id: int, day_number: int) -> tuple:
+    return (user_id, "daily-log", project_id, day_number)
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def conditional_json_response(
+    request: Request,
+    cache_key: Hashable,
+    version: Callable[[], Optional[tuple]],
+    render: Callable[[], bytes]
+) -> Optional[Response]:
+    """Serve a JSON resource with ETag revalidation, from the response cache when possible.
+
+    version() returns a cheap tuple that changes whenever the resource does, or None
+    if the resource does not exist (the caller then builds its own not-found response).
+    render() is only called when the client's copy is stale and the cache misses.
+    """
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        etag, body = cached
+    else:
+        resource_version = version()
+        if resource_version is None:
+            return None
+        etag = make_etag(*cache_key, *resource_version)
+        body = None
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    if body is None:
+        body = render()
+        response_cache.set(cache_key, etag, body)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,10 +1,25 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
 
+from app.admission import ADMISSION_CONTROL, AdmissionMiddleware, admission_controller
 from app.database import create_tables
-from app.routers import auth, project
+from app.routers import auth, bulk, project, usage
+from app.service.llm_router import llm_router
+from app.service.llm_service import LLMBudgetExceeded
+from app.telemetry import (
+    count_queries,
+    db_queries_per_request,
+    http_request_duration_seconds,
+    http_requests_total,
+    render_metrics,
+    span
+)
+from app.upload_limits import UploadLimitMiddleware
 
 load_dotenv()
 
@@ -13,9 +28,17 @@ app = FastAPI(
     description="A comprehensive project analysis system with user authentication and document processing",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
+# Added first, so it is innermost: a 413 for an oversized upload still gets CORS headers and is counted
+app.add_middleware(UploadLimitMiddleware)
+
+# Added before CORS, so it runs inside CORS and telemetry: shed requests still get CORS headers and are counted
+if ADMISSION_CONTROL:
+    app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:8501").split(","),
@@ -24,6 +47,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def telemetry_middleware(request: Request, call_next):
+    """Open the root span for a request, time it and count its database queries"""
+    start = time.perf_counter()
+    with count_queries() as queries, span("http.request", stage=False, method=request.method) as root:
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            route = request.scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            elapsed = time.perf_counter() - start
+
+            root.set_attribute("route", route_path)
+            root.set_attribute("status_code", status_code)
+            root.set_attribute("db_queries", queries[0])
+            http_requests_total.inc(method=request.method, route=route_path, status=status_code)
+            http_request_duration_seconds.observe(elapsed, method=request.method, route=route_path)
+            db_queries_per_request.observe(queries[0], method=request.method, route=route_path)
+
+    response.headers["X-Trace-Id"] = root.trace_id
+    response.headers["Server-Timing"] = f'app;dur={elapsed * 1000:.1f}, db;desc="queries={queries[0]}"'
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in text exposition format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.on_event("startup")
 async def startup_event():
     """Create database tables and perform startup tasks"""
@@ -33,8 +86,24 @@ async def startup_event():
     except Exception as e:
         print(f"❌ Error creating database tables: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Drain in-flight LLM calls, then close pooled LLM provider connections"""
+    await asyncio.to_thread(llm_router.close)
+
+@app.exception_handler(LLMBudgetExceeded)
+async def llm_budget_exceeded_handler(request: Request, exc: LLMBudgetExceeded):
+    """Apply back-pressure when an LLM rate or token budget is exhausted"""
+    return JSONResponse(
+        status_code=429,
+        content={"success": False, "message": "LLM budget exceeded", "error": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 app.include_router(auth.router)
 app.include_router(project.router)
+app.include_router(usage.router)
+app.include_router(bulk.router)
 
 if __name__ == "__main__":
     import uvicorn
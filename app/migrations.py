@@ -0,0 +1,116 @@
+"""Bring an existing database up to the models.
+
+`create_all` only creates missing tables, so columns added to existing tables, and
+constraints relaxed since, are applied here at startup (or with `python -m app.cli migrate`).
+Every step checks the live schema first, so running it again is a no-op.
+"""
+from typing import List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import Column, Table
+
+from app.models import Base
+from app.service.document_storage import compress_text
+
+BACKFILL_BATCH_SIZE = 200
+
+
+def migrate(engine: Engine) -> List[str]:
+    """Apply pending schema changes and backfills; returns a description of each step taken"""
+    steps: List[str] = []
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if inspect(connection).has_table(table.name):
+                _migrate_table(connection, table, steps)
+        steps.extend(_backfill_compressed_content(connection))
+    for step in steps:
+        print(f"🛠️ Migration: {step}")
+    return steps
+
+
+def _migrate_table(connection: Connection, table: Table, steps: List[str]):
+    existing = {column["name"]: column for column in inspect(connection).get_columns(table.name)}
+    relaxed = [
+        column for column in table.columns
+        if column.name in existing and column.nullable and not existing[column.name]["nullable"]
+    ]
+
+    if relaxed and connection.dialect.name == "sqlite":
+        # SQLite cannot alter a column's constraints; the table is rebuilt from the model instead
+        _rebuild_sqlite_table(connection, table, existing)
+        steps.append(f"rebuilt {table.name} ({', '.join(column.name for column in relaxed)} now nullable)")
+        return
+
+    preparer = connection.dialect.identifier_preparer
+    for column in relaxed:
+        connection.execute(text(
+            f"ALTER TABLE {preparer.format_table(table)} ALTER COLUMN {preparer.format_column(column)} DROP NOT NULL"
+        ))
+        steps.append(f"{table.name}.{column.name} now nullable")
+
+    for column in table.columns:
+        if column.name not in existing:
+            connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {_column_ddl(connection, column)}"))
+            steps.append(f"added {table.name}.{column.name}")
+
+    existing_indexes = {index["name"] for index in inspect(connection).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name not in existing_indexes:
+            index.create(connection)
+            steps.append(f"created index {index.name}")
+
+
+def _column_ddl(connection: Connection, column: Column) -> str:
+    preparer = connection.dialect.identifier_preparer
+    ddl = f"{preparer.format_column(column)} {column.type.compile(dialect=connection.dialect)}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {_default_literal(column.server_default.arg)}"
+        # Existing rows take the default, so NOT NULL holds; without one the column stays nullable
+        if not column.nullable:
+            ddl += " NOT NULL"
+    for foreign_key in column.foreign_keys:
+        target = foreign_key.column
+        ddl += f" REFERENCES {preparer.format_table(target.table)} ({preparer.format_column(target)})"
+    return ddl
+
+
+def _default_literal(value) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value.compile())
+
+
+def _rebuild_sqlite_table(connection: Connection, table: Table, existing: dict):
+    old_name = f"_{table.name}_old"
+    preparer = connection.dialect.identifier_preparer
+    # Keep foreign keys in other tables pointing at the table name, not the renamed copy
+    connection.execute(text("PRAGMA legacy_alter_table = ON"))
+    connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} RENAME TO {preparer.quote(old_name)}"))
+    for index in inspect(connection).get_indexes(old_name):
+        connection.execute(text(f"DROP INDEX {preparer.quote(index['name'])}"))
+    table.create(connection)
+
+    columns = ", ".join(preparer.format_column(column) for column in table.columns if column.name in existing)
+    connection.execute(text(
+        f"INSERT INTO {preparer.format_table(table)} ({columns}) SELECT {columns} FROM {preparer.quote(old_name)}"
+    ))
+    connection.execute(text(f"DROP TABLE {preparer.quote(old_name)}"))
+    connection.execute(text("PRAGMA legacy_alter_table = OFF"))
+
+
+def _backfill_compressed_content(connection: Connection) -> List[str]:
+    """Compress document text written before content_zstd existed"""
+    moved = 0
+    while True:
+        rows = connection.execute(text(
+            "SELECT id, content FROM documents WHERE content_zstd IS NULL AND content IS NOT NULL LIMIT :limit"
+        ), {"limit": BACKFILL_BATCH_SIZE}).all()
+        if not rows:
+            break
+        connection.execute(
+            text("UPDATE documents SET content_zstd = :data, content = NULL WHERE id = :id"),
+            [{"id": row.id, "data": compress_text(row.content)} for row in rows]
+        )
+        moved += len(rows)
+    return [f"compressed content of {moved} documents"] if moved else []
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Date, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Date, Float, Integer, String, Text, DateTime, ForeignKey, JSON, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.sql import func, literal_column
+
+from app.service.document_storage import compress_text, decompress_text
 
 Base = declarative_base()
 
@@ -23,16 +25,43 @@ class Document(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)
-    content = Column(Text, nullable=False)
+    # Text is stored zstd-compressed and only loaded when `content` is read;
+    # the uncompressed column is kept for rows written before compression
+    legacy_content = deferred(Column("content", Text, nullable=True))
+    content_zstd = deferred(Column(LargeBinary, nullable=True))
+    # Mean of the chunk embeddings, used to find earlier similar documents
+    embedding = deferred(Column(JSON, nullable=True))
     file_type = Column(String(10), nullable=False) 
-    file_size = Column(Integer, nullable=False) 
+    file_size = Column(Integer, nullable=False)
+    file_sha256 = Column(String(64), nullable=True)  # Digest of the uploaded bytes 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Revisions of a spec link back to the document they replace
+    previous_version_id = Column(Integer, ForeignKey("documents.id"), nullable=True, index=True)
+    revision = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     user = relationship("User", back_populates="documents")
     chunks = relationship("DocumentChunk", back_populates="document", cascade="all, delete-orphan")
     projects = relationship("Project", back_populates="document")
 
+    @property
+    def content(self) -> str:
+        """Extracted document text, decompressed on first access"""
+        cached = self.__dict__.get("_content_cache")
+        if cached is None:
+            if self.content_zstd is not None:
+                cached = decompress_text(self.content_zstd)
+            else:
+                cached = self.legacy_content or ""
+            self.__dict__["_content_cache"] = cached
+        return cached
+
+    @content.setter
+    def content(self, text: str):
+        self.content_zstd = compress_text(text)
+        self.legacy_content = None
+        self.__dict__["_content_cache"] = text
+
 class DocumentChunk(Base):
     __tablename__ = "document_chunks"
     
@@ -40,7 +69,10 @@ class DocumentChunk(Base):
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
     chunk_text = Column(Text, nullable=False)
     chunk_index = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=True)
     embedding = Column(JSON, nullable=True) 
+    term_frequencies = Column(JSON, nullable=True)
+    token_count = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     document = relationship("Document", back_populates="chunks")
@@ -67,12 +99,20 @@ class Project(Base):
     start_date = Column(Date, nullable=True)
     completion_log = Column(JSON, default=list)
     current_day = Column(Integer, default=1) 
+    change_summary = Column(Text, nullable=True)
+    daily_hours = Column(Integer, nullable=True)
+    working_days_per_week = Column(Integer, nullable=True)
+    holiday_set = Column(String(50), nullable=True)  # Name of a WORK_CALENDAR_HOLIDAYS set
+    # Developer tasks packed into working days (day_planner.plan_days), read by daily task generation
+    day_plan = deferred(Column(JSON, nullable=True))
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped in SQL by every update; updated_at is too coarse for ETags (one second on SQLite)
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version + 1"))
     
     user = relationship("User", back_populates="projects")
     document = relationship("Document", back_populates="projects")
@@ -88,9 +128,42 @@ class DailyLog(Base):
     target_date = Column(Date, nullable=False)
     planned_hours = Column(Integer, nullable=False)
     tasks = Column(JSON, nullable=False)  # Each task includes `task`, `estimated_hours`, `task_done`
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     project = relationship("Project", backref="daily_logs")
-    user = relationship("User", backref="daily_logs")
\ No newline at end of file
+    user = relationship("User", backref="daily_logs")
+
+    # ORM updates bump the version and fail on a concurrent edit (optimistic concurrency)
+    __mapper_args__ = {"version_id_col": version}
+
+
+class LLMCall(Base):
+    __tablename__ = "llm_calls"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    endpoint = Column(String(50), nullable=False)
+    provider = Column(String(50), nullable=True)
+    model = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Integer, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    __table_args__ = (
+        Index("ix_llm_calls_user_created", "user_id", "created_at"),
+    )
+
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    # Admission control token buckets shared by every worker (ADMISSION_STORE=postgres)
+    key = Column(String(200), primary_key=True)
+    tat = Column(Float, nullable=False)  # Epoch seconds at which the bucket is full again
@@ -0,0 +1,105 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, get_db
+from app.http_cache import daily_log_cache_key, project_cache_key, project_list_cache_key, response_cache
+from app.auth.auth import get_current_user
+from app.models import DailyLog, User
+from app.service.bulk_transfer import (
+    TRANSFER_TABLES,
+    BulkExporter,
+    BulkImporter,
+    TransferError,
+    iter_ndjson_records
+)
+from app.service.vector_index import document_indexes, user_indexes
+
+router = APIRouter(prefix="/bulk", tags=["Bulk Transfer"])
+
+
+@router.get("/export")
+async def export_data(
+    format: str = Query("ndjson", pattern="^(ndjson|parquet)$"),
+    tables: str = Query(",".join(TRANSFER_TABLES), description="Comma-separated tables (NDJSON)"),
+    table: str = Query("projects", description="Table to export (Parquet holds one table per file)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the current user's projects, daily logs and document chunks as NDJSON or Parquet"""
+    if format == "parquet":
+        if table not in TRANSFER_TABLES:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown table: {table}")
+        body = _stream(current_user.id, lambda exporter: exporter.iter_parquet(table))
+        return StreamingResponse(
+            body,
+            media_type="application/vnd.apache.parquet",
+            headers={"Content-Disposition": f'attachment; filename="{table}.parquet"'}
+        )
+
+    requested = [name.strip() for name in tables.split(",") if name.strip()]
+    unknown = set(requested) - set(TRANSFER_TABLES)
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown tables: {', '.join(sorted(unknown))}")
+    return StreamingResponse(
+        _stream(current_user.id, lambda exporter: exporter.iter_ndjson(requested)),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="export.ndjson"'}
+    )
+
+
+def _stream(user_id: int, produce):
+    # The request's session is closed once the response starts, so the stream uses its own
+    db = SessionLocal()
+    try:
+        yield from produce(BulkExporter(db, user_id=user_id))
+    finally:
+        db.close()
+
+
+@router.post("/import", response_model=dict)
+def import_data(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Import an NDJSON export into the current user's account, assigning new ids"""
+    # A plain def: FastAPI runs it in its thread pool, so the row-by-row import does not block the event loop
+    try:
+        file.file.seek(0)
+        importer = BulkImporter(db, current_user.id)
+        counts = importer.import_records(iter_ndjson_records(file.file))
+        _invalidate_imported(db, current_user.id, list(importer.id_maps["projects"].values()))
+        user_indexes.invalidate(current_user.id)
+        document_indexes.invalidate(current_user.id)
+        return {
+            "success": True,
+            "message": "Import completed successfully",
+            "counts": counts
+        }
+    except TransferError as e:
+        db.rollback()
+        return {
+            "success": False,
+            "message": "Invalid import file",
+            "error": str(e)
+        }
+    except Exception as e:
+        db.rollback()
+        return {
+            "success": False,
+            "message": "Import failed",
+            "error": str(e)
+        }
+
+
+def _invalidate_imported(db: Session, user_id: int, project_ids: List[int]):
+    # New ids can reuse those of deleted projects, whose cached responses would otherwise be served
+    response_cache.invalidate(project_list_cache_key(user_id))
+    for project_id in project_ids:
+        response_cache.invalidate(project_cache_key(user_id, project_id))
+    if project_ids:
+        days = db.query(DailyLog.project_id, DailyLog.day_number).filter(DailyLog.project_id.in_(project_ids)).all()
+        for project_id, day_number in days:
+            response_cache.invalidate(daily_log_cache_key(user_id, project_id, day_number))
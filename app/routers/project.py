@@ -1,25 +1,49 @@
-from datetime import datetime
+from datetime import date
+import asyncio
 import json
-from fastapi import APIRouter, Body, Depends, HTTPException, UploadFile, File, Form, status
+import orjson
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, UploadFile, File, Form, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import Any, Dict, List, Optional
 from sqlalchemy.orm.attributes import flag_modified
 
-from app.database import get_db
+from app.database import SessionLocal, get_db
+from app.http_cache import (
+    conditional_json_response,
+    daily_log_cache_key,
+    project_cache_key,
+    project_list_cache_key,
+    response_cache
+)
 from app.auth.auth import get_current_user
 from app.models import DailyLog, User, Document, Project
 from app.schemas import (
     ProjectAnalysis,
     ProjectRequest, 
     AnalysisResponse,
+    BatchTaskUpdateRequest,
+    BatchTaskUpdateResponse,
+    ProjectCalendarResponse,
     ProjectRequestWithTech, 
     ProjectResponse, 
+    ProjectSummaryListAdapter,
     ProjectSummaryResponse,
-    TechStackResponse
+    RevisionResponse,
+    SearchResponse,
+    TechStackResponse,
+    UploadAnalysisResponse
 )
+from app.service.day_planner import plan_days
+from app.service.daily_log_service import MAX_BATCH_UPDATES, DailyLogService, daily_task_flights
 from app.service.document_service import DocumentService
 from app.service.analysis_service import AnalysisService
+from app.service.llm_json import LLMResponseParseError
+from app.service.llm_service import LLMBudgetExceeded
+from app.service.project_queries import ProjectQueries
+from app.service.search_service import SearchService
+from app.service.work_calendar import known_holiday_set, project_calendar
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
@@ -88,6 +112,8 @@ async def upload_and_analyze_document(
     daily_hours: int = Form(8),
     working_days_per_week: int = Form(5),
     technologies: Optional[List[str]] = Form(None),  # NEW PARAM
+    start_date: Optional[date] = Form(None),
+    holiday_set: Optional[str] = Form(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -100,6 +126,13 @@ async def upload_and_analyze_document(
                 error="Only PDF and TXT files are supported"
             )
         
+        if not known_holiday_set(holiday_set):
+            return AnalysisResponse(
+                success=False,
+                message="Unknown holiday set",
+                error=f"No holiday set named {holiday_set!r} is configured"
+            )
+        
         doc_service = DocumentService(db)
         analysis_service = AnalysisService(db)
         
@@ -116,7 +149,9 @@ async def upload_and_analyze_document(
             project_name=project_name,
             daily_hours=daily_hours,
             working_days_per_week=working_days_per_week,
-            technologies=technologies  # <-- include technologies here
+            technologies=technologies,  # <-- include technologies here
+            start_date=start_date,
+            holiday_set=holiday_set
         )
         
         analysis_result = await analysis_service.analyze_project(
@@ -125,6 +160,8 @@ async def upload_and_analyze_document(
         
         return analysis_result
             
+    except (HTTPException, LLMBudgetExceeded):
+        raise
     except Exception as e:
         return AnalysisResponse(
             success=False,
@@ -136,6 +173,7 @@ async def upload_and_analyze_document(
 @router.post("/extract-tech-stack", response_model=TechStackResponse)
 async def extract_technology_stack(
     file: UploadFile = File(...),
+    include_recommendations: bool = Form(False),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -160,10 +198,14 @@ async def extract_technology_stack(
                 error="Could not process the uploaded document"
             )
         
-        tech_stack_result = await tech_service.extract_technology_stack(document)
+        tech_stack_result = await tech_service.extract_technology_stack(
+            document, include_recommendations=include_recommendations
+        )
         
         return tech_stack_result
             
+    except (HTTPException, LLMBudgetExceeded):
+        raise
     except Exception as e:
         return TechStackResponse(
             success=False,
@@ -171,27 +213,131 @@ async def extract_technology_stack(
             error=str(e)
         )
 
+@router.post("/upload-and-analyze", response_model=UploadAnalysisResponse)
+async def upload_and_analyze_with_tech_stack(
+    file: UploadFile = File(...),
+    project_name: Optional[str] = Form(None),
+    daily_hours: int = Form(8),
+    working_days_per_week: int = Form(5),
+    technologies: Optional[List[str]] = Form(None),
+    include_recommendations: bool = Form(True),
+    stream: bool = Form(False),
+    start_date: Optional[date] = Form(None),
+    holiday_set: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Upload a document once, then analyze it and extract its tech stack concurrently"""
+    try:
+        if not file.filename.endswith(('.pdf', '.txt')):
+            return UploadAnalysisResponse(
+                success=False,
+                message="Invalid file type",
+                error="Only PDF and TXT files are supported"
+            )
+        
+        if not known_holiday_set(holiday_set):
+            return UploadAnalysisResponse(
+                success=False,
+                message="Unknown holiday set",
+                error=f"No holiday set named {holiday_set!r} is configured"
+            )
+        
+        document = await DocumentService(db).process_document(file, current_user.id)
+        
+        if not document:
+            return UploadAnalysisResponse(
+                success=False,
+                message="Document processing failed",
+                error="Could not process the uploaded document"
+            )
+        
+        project_request = ProjectRequest(
+            project_name=project_name,
+            daily_hours=daily_hours,
+            working_days_per_week=working_days_per_week,
+            technologies=technologies,
+            start_date=start_date,
+            holiday_set=holiday_set
+        )
+        
+        if stream:
+            return StreamingResponse(
+                _analysis_events(document.id, project_request, current_user.id, include_recommendations),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache"}
+            )
+        
+        results = {}
+        async for name, result in AnalysisService(db).analyze_with_tech_stack(
+            document, project_request, current_user.id, include_recommendations
+        ):
+            results[name] = result
+        
+        analysis = results["analysis"]
+        tech_stack = results["tech_stack"]
+        if not analysis.success:
+            message = analysis.message
+        elif tech_stack.success:
+            message = "Document uploaded, analyzed and tech stack extracted"
+        else:
+            message = "Document uploaded and analyzed; tech stack extraction failed"
+        return UploadAnalysisResponse(
+            success=analysis.success,
+            message=message,
+            project_id=analysis.project_id,
+            analysis=analysis,
+            tech_stack=tech_stack,
+            error=analysis.error
+        )
+            
+    except (HTTPException, LLMBudgetExceeded):
+        raise
+    except Exception as e:
+        return UploadAnalysisResponse(
+            success=False,
+            message="Upload and analysis failed",
+            error=str(e)
+        )
+
+
+async def _analysis_events(document_id: int, project_request: ProjectRequest, user_id: int, include_recommendations: bool):
+    """Server-sent events for /upload-and-analyze: one event per result, then a done event"""
+    # The request's session is closed once the response starts, so the stream uses its own
+    db = SessionLocal()
+    try:
+        document = db.get(Document, document_id)
+        async for name, result in AnalysisService(db).analyze_with_tech_stack(
+            document, project_request, user_id, include_recommendations
+        ):
+            yield f"event: {name}\ndata: {result.model_dump_json()}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    except LLMBudgetExceeded as e:
+        payload = {"success": False, "message": "LLM budget exceeded", "error": str(e), "retry_after": e.retry_after}
+        yield f"event: error\ndata: {json.dumps(payload)}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'success': False, 'message': 'Upload and analysis failed', 'error': str(e)})}\n\n"
+    finally:
+        db.close()
+
 @router.get("/my-projects", response_model=List[ProjectSummaryResponse])
 async def get_user_projects(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all projects for the current user"""
     try:
-        projects = db.query(Project).filter(Project.user_id == current_user.id).all()
-        
-        project_summaries = []
-        for project in projects:
-            project_summaries.append(ProjectSummaryResponse(
-                id=project.id,
-                project_name=project.project_name,
-                project_summary=project.project_summary,
-                complexity_level=project.complexity_level,
-                total_duration_weeks=project.total_duration_weeks,
-                created_at=project.created_at
-            ))
-        
-        return project_summaries
+        queries = ProjectQueries(db)
+        # Returning a Response skips FastAPI's second validation pass against response_model
+        return conditional_json_response(
+            request,
+            cache_key=project_list_cache_key(current_user.id),
+            version=lambda: queries.project_summaries_version(current_user.id),
+            render=lambda: ProjectSummaryListAdapter.dump_json(
+                ProjectSummaryListAdapter.validate_python(queries.list_project_summaries(current_user.id))
+            )
+        )
         
     except Exception as e:
         raise HTTPException(
@@ -199,26 +345,56 @@ async def get_user_projects(
             detail=f"Failed to fetch projects: {str(e)}"
         )
 
+@router.get("/search", response_model=SearchResponse)
+async def search_projects(
+    query: str,
+    top_k: int = 5,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Semantic search across all of the current user's documents, grouped by project"""
+    try:
+        results = SearchService(db).search(current_user.id, query, top_k=max(1, min(top_k, 50)))
+        return SearchResponse(
+            success=True,
+            message=f"Found {len(results)} matching projects",
+            query=query,
+            results=results
+        )
+    except Exception as e:
+        return SearchResponse(
+            success=False,
+            message="Search failed",
+            query=query,
+            error=str(e)
+        )
+
 @router.get("/project/{project_id}", response_model=ProjectResponse)
 async def get_project_details(
     project_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get detailed project information"""
     try:
-        project = db.query(Project).filter(
-            Project.id == project_id,
-            Project.user_id == current_user.id
-        ).first()
+        queries = ProjectQueries(db)
+        response = conditional_json_response(
+            request,
+            cache_key=project_cache_key(current_user.id, project_id),
+            version=lambda: queries.project_version(project_id, current_user.id),
+            render=lambda: ProjectResponse.model_validate(
+                queries.get_project_detail(project_id, current_user.id)
+            ).model_dump_json().encode()
+        )
         
-        if not project:
+        if not response:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Project not found"
             )
         
-        return ProjectResponse.from_orm(project)
+        return response
         
     except HTTPException:
         raise
@@ -228,15 +404,140 @@ async def get_project_details(
             detail=f"Failed to fetch project details: {str(e)}"
         )
     
+@router.get("/project/{project_id}/calendar", response_model=ProjectCalendarResponse)
+async def get_project_calendar(
+    project_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Every planned working day of a project with its date and progress, in one call"""
+    queries = ProjectQueries(db)
+    project = queries.get_project_schedule(project_id, current_user.id)
+    if project is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    try:
+        calendar = project_calendar(project)
+        day_plan = project.day_plan
+        if day_plan is None:
+            day_plan = plan_days(project.developer_tasks or [], project.daily_hours or 8)
+        progress = queries.daily_log_progress(project_id, current_user.id)
+
+        days = []
+        for entry in calendar.schedule(day_plan):
+            done, total = progress.get(entry["day"], (None, None))
+            days.append({**entry, "tasks_done": done, "tasks_total": total})
+
+        return ProjectCalendarResponse(
+            success=True,
+            message=f"{len(days)} working days planned",
+            project_id=project_id,
+            start_date=calendar.start.item(),
+            end_date=days[-1]["date"] if days else None,
+            working_days_per_week=project.working_days_per_week,
+            holiday_set=calendar.holiday_set,
+            days=days
+        )
+    except Exception as e:
+        return ProjectCalendarResponse(
+            success=False,
+            message="Failed to build project calendar",
+            project_id=project_id,
+            error=str(e)
+        )
+
+@router.post("/project/{project_id}/revise", response_model=RevisionResponse)
+async def revise_project_document(
+    project_id: int,
+    file: UploadFile = File(...),
+    daily_hours: Optional[int] = Form(None),
+    working_days_per_week: Optional[int] = Form(None),
+    technologies: Optional[List[str]] = Form(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Upload a revised spec for a project and update its analysis from the changed sections only.
+
+    Schedule fields left out keep the project's current values.
+    """
+    try:
+        if not file.filename.endswith(('.pdf', '.txt')):
+            return RevisionResponse(
+                success=False,
+                message="Invalid file type",
+                error="Only PDF and TXT files are supported"
+            )
+        
+        project = db.query(Project).filter(
+            Project.id == project_id,
+            Project.user_id == current_user.id
+        ).first()
+        
+        if not project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        
+        document, diff = await DocumentService(db).process_document_version(
+            file, current_user.id, previous=project.document
+        )
+        
+        schedule = {
+            "daily_hours": daily_hours if daily_hours is not None else project.daily_hours,
+            "working_days_per_week": working_days_per_week if working_days_per_week is not None else project.working_days_per_week,
+        }
+        # Projects created before these columns existed have neither; ProjectRequest's defaults apply
+        project_request = ProjectRequest(
+            **{field: value for field, value in schedule.items() if value is not None},
+            technologies=technologies
+        )
+        
+        return await AnalysisService(db).revise_project(project, document, diff, project_request, current_user.id)
+        
+    except (HTTPException, LLMBudgetExceeded):
+        raise
+    except Exception as e:
+        return RevisionResponse(
+            success=False,
+            message="Revision failed",
+            project_id=project_id,
+            error=str(e)
+        )
+
+def _generate_daily_tasks(
+    project_id: int,
+    user_id: int,
+    target_date: str,
+    day_number: int,
+    daily_hours: int,
+    refine: bool
+) -> Dict[str, Any]:
+    # Runs in a worker thread and may outlive the request that started it, so it opens its own session
+    db = SessionLocal()
+    try:
+        return DailyLogService(db).generate_day(project_id, user_id, target_date, day_number, daily_hours, refine)
+    finally:
+        db.close()
+
+
 @router.post("/generate-daily-tasks", response_model=dict)
 async def generate_daily_tasks(
     project_id: int = Form(...),
-    target_date: str = Form(...),
-    day_number: int = Form(...),
+    target_date: Optional[date] = Form(None),
+    day_number: Optional[int] = Form(None),
     daily_hours: int = Form(8),
+    refine: bool = Form(False),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """Save day N's tasks from the project's day plan; refine asks the LLM to break the day down instead.
+
+    Either day_number or target_date is enough; the other follows from the project's working calendar.
+    """
     try:
         project = db.query(Project).filter(
             Project.id == project_id,
@@ -250,108 +551,53 @@ async def generate_daily_tasks(
                 "error": "Project does not exist or access denied"
             }
 
-        project_analysis = {
-            "project_name": project.project_name,
-            "project_summary": project.project_summary,
-            "scope_and_deliverables": project.scope_and_deliverables,
-            "time_estimation": {
-                "base_hours_required": project.base_hours_required,
-                "total_hours_estimated": project.total_hours_estimated,
-                "total_duration_weeks": project.total_duration_weeks,
-                "total_duration_days": project.total_duration_days,
-                "development_phase": project.development_phase,
-                "testing_phase": project.testing_phase,
-                "deployment_phase": project.deployment_phase,
-                "buffer_included": project.buffer_included
-            },
-            "developer_tasks": project.developer_tasks,
-            "technology_stack": project.technology_stack,
-            "complexity_level": project.complexity_level
-        }
-
-        analysis_service = AnalysisService(db)
-        daily_task_response = analysis_service._call_mistral_api_for_daily_tasks(
-            project_analysis=project_analysis,
-            target_date=target_date,
-            day_number=day_number,
-            daily_hours=daily_hours
-        )
-
-        response_text = daily_task_response.strip()
-        json_start = response_text.find('{')
-        json_end = response_text.rfind('}') + 1
-
-        if json_start == -1 or json_end == 0:
+        calendar = project_calendar(project)
+        if day_number is None:
+            if target_date is None:
+                return {
+                    "success": False,
+                    "message": "Day not specified",
+                    "error": "Provide day_number or target_date"
+                }
+            day_number = calendar.day_for_date(target_date)
+            if day_number is None:
+                return {
+                    "success": False,
+                    "message": "Not a working day",
+                    "error": f"{target_date.isoformat()} is not a working day of this project"
+                }
+        if day_number < 1:
             return {
                 "success": False,
-                "message": "Failed to parse daily tasks response",
-                "error": "No JSON found in Mistral response"
+                "message": "Invalid day number",
+                "error": "day_number starts at 1"
             }
 
-        json_str = response_text[json_start:json_end]
-        daily_tasks = json.loads(json_str)
-
-        # Ensure all new tasks have `task_done: False`
-        for task in daily_tasks.get("tasks", []):
-            task["task_done"] = False
-
-        # --- NEW: Fetch and merge carryover tasks ---
-        if day_number > 1:
-            previous_log = db.query(DailyLog).filter_by(
-                project_id=project.id,
-                user_id=current_user.id,
-                day_number=day_number - 1
-            ).first()
-
-            if previous_log and previous_log.tasks:
-                for task in previous_log.tasks:
-                    if not task.get("task_done"):
-                        # Ensure structure matches expected
-                        carryover_task = {
-                            "task": task["task"],
-                            "estimated_hours": task["estimated_hours"],
-                            "task_done": False
-                        }
-                        daily_tasks["tasks"].append(carryover_task)
-
-        # Final task list
-        final_tasks = daily_tasks["tasks"]
-
-        # Save or update today's log
-        existing_log = db.query(DailyLog).filter_by(
-            project_id=project.id,
-            user_id=current_user.id,
-            day_number=day_number
-        ).first()
-
-        if existing_log:
-            existing_log.tasks = final_tasks
-            existing_log.planned_hours = daily_hours
-            existing_log.target_date = datetime.strptime(target_date, "%Y-%m-%d").date()
-        else:
-            new_log = DailyLog(
-                project_id=project.id,
-                user_id=current_user.id,
-                day_number=day_number,
-                target_date=datetime.strptime(target_date, "%Y-%m-%d").date(),
-                planned_hours=daily_hours,
-                tasks=final_tasks
-            )
-            db.add(new_log)
+        scheduled_date = calendar.date_for_day(day_number)
+        if target_date is not None and target_date != scheduled_date:
+            return {
+                "success": False,
+                "message": "Target date does not match the project calendar",
+                "error": f"Day {day_number} falls on {scheduled_date.isoformat()}, not {target_date.isoformat()}"
+            }
+        target_date = scheduled_date.isoformat()
 
-        db.commit()
+        # Double clicks and client retries wait for the first request's result instead of
+        # calling the LLM again; the service's advisory lock covers other workers
+        flight_key = (current_user.id, project.id, day_number, target_date, daily_hours, refine)
+        result, shared = await daily_task_flights.do(flight_key, lambda: asyncio.to_thread(
+            _generate_daily_tasks, project.id, current_user.id, target_date, day_number, daily_hours, refine
+        ))
+        return {**result, "coalesced": True} if shared else result
 
+    except LLMResponseParseError as e:
         return {
-            "success": True,
-            "message": "Daily tasks generated and saved successfully",
-            "daily_tasks": {
-                "day": f"Day {day_number}",
-                "date": target_date,
-                "planned_hours": daily_hours,
-                "tasks": final_tasks
-            }
+            "success": False,
+            "message": "Failed to parse daily tasks response",
+            "error": str(e)
         }
-
+    except LLMBudgetExceeded:
+        raise
     except (json.JSONDecodeError, ValueError, TypeError) as e:
         return {
             "success": False,
@@ -403,6 +649,7 @@ async def log_daily_tasks(
         flag_modified(daily_log, "tasks")
         db.add(daily_log)
         db.commit()
+        response_cache.invalidate(daily_log_cache_key(current_user.id, project_id, day_number))
 
         return {
             "success": True,
@@ -421,27 +668,58 @@ async def log_daily_tasks(
         }
 
 
+@router.post("/log-daily-tasks/batch", response_model=BatchTaskUpdateResponse)
+async def log_daily_tasks_batch(
+    request: BatchTaskUpdateRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Apply task check-offs for many projects and days in one transaction"""
+    if len(request.updates) > MAX_BATCH_UPDATES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_UPDATES} daily logs can be updated per request"
+        )
+
+    try:
+        results = DailyLogService(db).apply_batch(current_user.id, request.updates)
+        updated = sum(1 for result in results if result.status == "updated")
+        return BatchTaskUpdateResponse(
+            success=updated == len(results),
+            message=f"Updated {updated} of {len(results)} daily logs",
+            results=results
+        )
+
+    except Exception as e:
+        db.rollback()
+        return BatchTaskUpdateResponse(
+            success=False,
+            message="Failed to update tasks",
+            error=str(e)
+        )
+
+
 @router.get("/daily-log", response_model=dict)
 async def get_daily_log(
     project_id: int,
     day_number: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    daily_log = db.query(DailyLog).filter_by(
-        project_id=project_id,
-        user_id=current_user.id,
-        day_number=day_number
-    ).first()
+    queries = ProjectQueries(db)
+    response = conditional_json_response(
+        request,
+        cache_key=daily_log_cache_key(current_user.id, project_id, day_number),
+        version=lambda: queries.daily_log_version(project_id, current_user.id, day_number),
+        render=lambda: orjson.dumps({
+            "success": True,
+            "log": queries.get_daily_log(project_id, current_user.id, day_number)
+        })
+    )
 
-    if not daily_log:
+    if not response:
         return {"success": False, "message": "Log not found"}
 
-    return {
-        "success": True,
-        "log": {
-            "date": daily_log.target_date,
-            "planned_hours": daily_log.planned_hours,
-            "tasks": daily_log.tasks
-        }
-    }
+    return response
+
@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.auth.auth import get_current_user
+from app.models import LLMCall, User
+from app.service.llm_service import (
+    LLM_GLOBAL_REQUESTS_PER_MINUTE,
+    LLM_GLOBAL_TOKENS_PER_DAY,
+    LLM_USER_REQUESTS_PER_MINUTE,
+    LLM_USER_TOKENS_PER_DAY,
+    TOKEN_WINDOW,
+    llm_metrics
+)
+from app.service.llm_router import llm_router
+
+router = APIRouter(prefix="/usage", tags=["Usage"])
+
+@router.get("/llm", response_model=dict)
+async def get_llm_usage(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get LLM token usage, latency and remaining budget for the current user"""
+    since = datetime.now(timezone.utc) - TOKEN_WINDOW
+    rows = db.query(
+        LLMCall.endpoint,
+        func.count(LLMCall.id),
+        func.coalesce(func.sum(LLMCall.prompt_tokens), 0),
+        func.coalesce(func.sum(LLMCall.completion_tokens), 0),
+        func.avg(LLMCall.latency_ms),
+        func.max(LLMCall.latency_ms),
+        func.sum(case((LLMCall.status != "ok", 1), else_=0))
+    ).filter(
+        LLMCall.user_id == current_user.id,
+        LLMCall.created_at >= since
+    ).group_by(LLMCall.endpoint).all()
+
+    endpoints = [
+        {
+            "endpoint": endpoint,
+            "calls": calls,
+            "errors": int(errors or 0),
+            "prompt_tokens": int(prompt_tokens),
+            "completion_tokens": int(completion_tokens),
+            "avg_latency_ms": round(float(avg_latency or 0), 1),
+            "max_latency_ms": max_latency
+        }
+        for endpoint, calls, prompt_tokens, completion_tokens, avg_latency, max_latency, errors in rows
+    ]
+    total_tokens = sum(e["prompt_tokens"] + e["completion_tokens"] for e in endpoints)
+
+    return {
+        "success": True,
+        "window_hours": int(TOKEN_WINDOW.total_seconds() // 3600),
+        "total_tokens": total_tokens,
+        "token_budget": LLM_USER_TOKENS_PER_DAY or None,
+        "remaining_tokens": max(LLM_USER_TOKENS_PER_DAY - total_tokens, 0) if LLM_USER_TOKENS_PER_DAY else None,
+        "requests_per_minute_limit": LLM_USER_REQUESTS_PER_MINUTE or None,
+        "endpoints": endpoints
+    }
+
+@router.get("/llm/metrics", response_model=dict)
+async def get_llm_metrics(current_user: User = Depends(get_current_user)):
+    """Get process-wide LLM call counters per endpoint"""
+    return {
+        "success": True,
+        "global_token_budget": LLM_GLOBAL_TOKENS_PER_DAY or None,
+        "global_requests_per_minute_limit": LLM_GLOBAL_REQUESTS_PER_MINUTE or None,
+        "endpoints": llm_metrics.snapshot()
+    }
+
+@router.get("/llm/providers", response_model=dict)
+async def get_llm_providers(current_user: User = Depends(get_current_user)):
+    """Get the routing state of each LLM provider: circuit breaker and recent latency"""
+    return {
+        "success": True,
+        "providers": llm_router.state()
+    }
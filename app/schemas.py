@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, TypeAdapter, field_validator
 from typing import List, Dict, Optional, Union
 from datetime import date, datetime
 
@@ -49,6 +49,8 @@ class ProjectRequest(BaseModel):
     daily_hours: int = 8
     working_days_per_week: int = 5
     technologies: Optional[List[str]] = None
+    start_date: Optional[date] = None
+    holiday_set: Optional[str] = None
 
 class ProjectAnalysis(BaseModel):
     project_name: str
@@ -59,6 +61,14 @@ class ProjectAnalysis(BaseModel):
     technology_stack: List[str]
     complexity_level: str
 
+    @field_validator("time_estimation", mode="before")
+    @classmethod
+    def stringify_time_estimation(cls, value):
+        # Models often return bare numbers here, e.g. "base_hours_required": 120
+        if isinstance(value, dict):
+            return {key: str(item) for key, item in value.items() if item is not None}
+        return value
+
 class ProjectResponse(BaseModel):
     id: int
     project_name: str
@@ -92,12 +102,42 @@ class ProjectSummaryResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Search schemas
+class SearchHit(BaseModel):
+    chunk_id: int
+    chunk_index: int
+    score: float
+    text: str
+
+class ProjectSearchResult(BaseModel):
+    project_id: Optional[int] = None
+    project_name: Optional[str] = None
+    document_id: int
+    filename: str
+    score: float
+    chunks: List[SearchHit]
+
+class SearchResponse(BaseModel):
+    success: bool
+    message: str
+    query: str
+    results: List[ProjectSearchResult] = []
+    error: Optional[str] = None
+
+# Built once at import; validating and encoding a list through one adapter avoids
+# constructing each model by hand and then re-validating it for response_model
+ProjectSummaryListAdapter = TypeAdapter(List[ProjectSummaryResponse])
+
 # API Response schemas
 class AnalysisResponse(BaseModel):
     success: bool
     message: str
     analysis: Optional[ProjectAnalysis] = None
     project_id: Optional[int] = None
+    # Earlier similar project whose analysis was reused, or passed to the LLM as a reference
+    reference_project_id: Optional[int] = None
+    reference_similarity: Optional[float] = None
+    analysis_reused: bool = False
     error: Optional[str] = None
 
 class StandardResponse(BaseModel):
@@ -116,6 +156,103 @@ class TechStackResponse(BaseModel):
     technology_categories: Optional[Dict[str, List[str]]] = None
     error: Optional[str] = None
 
+class UploadAnalysisResponse(BaseModel):
+    success: bool
+    message: str
+    project_id: Optional[int] = None
+    analysis: Optional[AnalysisResponse] = None
+    tech_stack: Optional[TechStackResponse] = None
+    error: Optional[str] = None
+
+class TechRecommendations(BaseModel):
+    recommended_technologies: List[str]
+
+# Revision schemas
+class ProjectRevision(ProjectAnalysis):
+    change_summary: str = ""
+
+class ChunkDiffStats(BaseModel):
+    total_chunks: int
+    unchanged_chunks: int
+    added_chunks: int
+    removed_chunks: int
+    embedded_chunks: int
+
+class RevisionResponse(BaseModel):
+    success: bool
+    message: str
+    project_id: Optional[int] = None
+    document_id: Optional[int] = None
+    previous_document_id: Optional[int] = None
+    revision: Optional[int] = None
+    analysis: Optional[ProjectAnalysis] = None
+    change_summary: Optional[str] = None
+    chunks: Optional[ChunkDiffStats] = None
+    error: Optional[str] = None
+
+# Daily task schemas
+class DailyTask(BaseModel):
+    task: str
+    estimated_hours: Union[int, float]
+
+class DailyTaskPlan(BaseModel):
+    day: Optional[str] = None
+    date: Optional[str] = None
+    planned_hours: Optional[Union[int, float]] = None
+    tasks: List[DailyTask]
+
+class CalendarDay(BaseModel):
+    day: int
+    date: date
+    weekday: str
+    planned_hours: Union[int, float]
+    tasks: List[DailyTask]
+    tasks_done: Optional[int] = None  # None until the day's log has been generated
+    tasks_total: Optional[int] = None
+
+class ProjectCalendarResponse(BaseModel):
+    success: bool
+    message: str
+    project_id: int
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    working_days_per_week: Optional[int] = None
+    holiday_set: Optional[str] = None
+    days: List[CalendarDay] = []
+    error: Optional[str] = None
+
+# Batch task check-off schemas
+class TaskStatusChange(BaseModel):
+    task_index: Optional[int] = None  # position in the day's task list; preferred over task text
+    task: Optional[str] = None
+    estimated_hours: Optional[Union[int, float]] = None
+    task_done: bool
+
+class DailyLogUpdate(BaseModel):
+    project_id: int
+    day_number: int
+    expected_version: Optional[int] = None  # version the client last saw; stale versions conflict
+    changes: List[TaskStatusChange]
+
+class BatchTaskUpdateRequest(BaseModel):
+    updates: List[DailyLogUpdate]
+
+class DailyLogUpdateResult(BaseModel):
+    project_id: int
+    day_number: int
+    status: str  # updated, conflict, not_found or invalid
+    version: Optional[int] = None
+    completed_count: Optional[int] = None
+    remaining_count: Optional[int] = None
+    total: Optional[int] = None
+    error: Optional[str] = None
+
+class BatchTaskUpdateResponse(BaseModel):
+    success: bool
+    message: str
+    results: List[DailyLogUpdateResult] = []
+    error: Optional[str] = None
+
 class ProjectRequestWithTech(BaseModel):
     project_name: Optional[str] = None
     daily_hours: int = 8
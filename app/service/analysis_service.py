@@ -1,17 +1,49 @@
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Hashable, List, Optional, Tuple, Union
+import asyncio
 from sqlalchemy.orm import Session
-import json
-import requests
-import os
 from dotenv import load_dotenv
 
+from app.http_cache import project_cache_key, project_list_cache_key, response_cache
 from app.models import Document, Project
-from app.schemas import ProjectRequest, ProjectAnalysis, AnalysisResponse, ProjectRequestWithTech, TechStackResponse
-from app.service.document_service import DocumentService
+from app.schemas import (
+    ProjectRequest,
+    ProjectAnalysis,
+    AnalysisResponse,
+    ChunkDiffStats,
+    ProjectRequestWithTech,
+    ProjectRevision,
+    RevisionResponse,
+    TechRecommendations,
+    TechStackResponse
+)
+from app.service.day_planner import plan_days
+from app.service.document_service import ChunkDiff, DocumentService
+from app.service.llm_json import LLMResponseParseError, parse_llm_json
+from app.service.llm_service import LLMBudgetExceeded, chat_completion
+from app.service.prompt_builder import PromptStats, compact_json, prompt_builder
+from app.service.similar_projects import SimilarProjects, adapt_analysis, can_reuse, project_analysis
+from app.telemetry import span
+from app.service.tech_detector import categorize, detect_technologies
 
 load_dotenv()
 
+ANALYSIS_CONTEXT_LIMIT = 8000
+ANALYSIS_HEAD_CHARS = 4000
+
+# Revisions send only changed sections; most of the budget goes to new or edited text
+REVISION_CONTEXT_LIMIT = ANALYSIS_CONTEXT_LIMIT
+REVISION_ADDED_SHARE = 0.75
+
+# Retrieval facets used to assemble analysis context for documents over the limit
+ANALYSIS_FACETS = [
+    "project scope, objectives and deliverables",
+    "functional requirements and features",
+    "timeline, milestones and deadlines",
+    "technology stack, frameworks, databases and integrations",
+    "non-functional requirements: performance, security, hosting",
+]
+
 class AnalysisService:
     def __init__(self, db: Session):
         self.db = db
@@ -62,10 +94,34 @@ class AnalysisService:
     #             error=str(e)
     #         )
 
-    async def analyze_project(self, document: Document, project_request: ProjectRequest, user_id: int) -> AnalysisResponse:
+    async def analyze_project(
+        self,
+        document: Document,
+        project_request: ProjectRequest,
+        user_id: int,
+        analysis_content: Optional[str] = None
+    ) -> AnalysisResponse:
         """Analyze project document and create project record"""
         try:
-            analysis_content = self._prepare_analysis_content(document)
+            similar = SimilarProjects(self.db).nearest(document, user_id)
+            reference = similar[0] if similar else None
+            if reference is not None and can_reuse(reference, project_request):
+                # Near-duplicate of an earlier spec: adapt its analysis instead of calling the LLM
+                analysis = adapt_analysis(reference.analysis, project_request)
+                with span("create_project_record"):
+                    project_id = await self._create_project_record(analysis, document, user_id, project_request)
+                return AnalysisResponse(
+                    success=True,
+                    message="Project analysis reused from a similar project",
+                    analysis=analysis,
+                    project_id=project_id,
+                    reference_project_id=reference.project_id,
+                    reference_similarity=reference.similarity,
+                    analysis_reused=True
+                )
+            
+            if analysis_content is None:
+                analysis_content = self._prepare_analysis_content(document)
             
             analysis_prompt = f"""
     Please analyze this project document and provide:
@@ -79,28 +135,39 @@ class AnalysisService:
     Include 1.5x buffer multiplier for realistic human work estimation.
     """
             
-            mistral_response = self._call_mistral_api(
+            # The LLM call blocks, so it runs in a worker thread to keep the event loop free
+            mistral_response = await asyncio.to_thread(
+                self._call_mistral_api,
                 prompt=analysis_prompt,
                 document_context=analysis_content,
                 project_name=project_request.project_name,
                 daily_hours=project_request.daily_hours,
                 working_days_per_week=project_request.working_days_per_week,
-                technologies=project_request.technologies  # pass technologies to API call
+                technologies=project_request.technologies,  # pass technologies to API call
+                user_id=user_id,
+                reference_hint=prompt_builder.reference_project_hint(
+                    reference.analysis.model_dump(), reference.similarity, cache_key=("reference", reference.project_id)
+                ) if reference is not None else None
             )
             
             analysis = self._parse_mistral_response(mistral_response)
             
-            project_id = await self._create_project_record(
-                analysis, document, user_id
-            )
+            with span("create_project_record"):
+                project_id = await self._create_project_record(
+                    analysis, document, user_id, project_request
+                )
             
             return AnalysisResponse(
                 success=True,
                 message="Project analysis completed successfully",
                 analysis=analysis,
-                project_id=project_id
+                project_id=project_id,
+                reference_project_id=reference.project_id if reference is not None else None,
+                reference_similarity=reference.similarity if reference is not None else None
             )
             
+        except LLMBudgetExceeded:
+            raise
         except Exception as e:
             return AnalysisResponse(
                 success=False,
@@ -112,9 +179,25 @@ class AnalysisService:
     def _prepare_analysis_content(self, document: Document) -> str:
         """Prepare document content for analysis"""
         content = document.content
-        if len(content) > 8000:
-            content = content[:8000] + "..."
-        return content
+        if len(content) <= ANALYSIS_CONTEXT_LIMIT:
+            return content
+        
+        # Keep the opening of the document and fill the rest with the chunks
+        # retrieved for each analysis facet, instead of cutting off the tail
+        head = content[:ANALYSIS_HEAD_CHARS]
+        sections = [head]
+        used = len(head)
+        facet_chunks = self.doc_service.get_relevant_chunks_batch(document.id, ANALYSIS_FACETS, top_k=2)
+        for facet in ANALYSIS_FACETS:
+            for chunk in facet_chunks.get(facet, []):
+                if chunk in head or chunk in sections or used + len(chunk) > ANALYSIS_CONTEXT_LIMIT:
+                    continue
+                sections.append(chunk)
+                used += len(chunk)
+        
+        if len(sections) == 1:
+            return content[:ANALYSIS_CONTEXT_LIMIT] + "..."
+        return "\n\n...\n\n".join(sections)
     
 #     def _call_mistral_api(self, prompt: str, document_context: str, project_name: str = None, daily_hours: int = 8, working_days_per_week: int = 5) -> str:
 #         """Call Mistral API for project analysis"""
@@ -239,9 +322,11 @@ class AnalysisService:
         project_name: str = None,
         daily_hours: int = 8,
         working_days_per_week: int = 5,
-        technologies: Optional[List[str]] = None
+        technologies: Optional[List[str]] = None,
+        user_id: Optional[int] = None,
+        reference_hint: Optional[str] = None
     ) -> str:
-        """Call Mistral API for project analysis, optionally guided by user-specified technologies"""
+        """Call Mistral API for project analysis, optionally guided by user-specified technologies and a similar earlier project"""
         buffer_multiplier = 1.5
 
         # Construct technology context
@@ -326,6 +411,7 @@ class AnalysisService:
 
     {technology_context}
 
+    {reference_hint or ""}
     WORK PARAMETERS:
     - Daily Hours: {daily_hours}
     - Working Days per Week: {working_days_per_week}
@@ -342,141 +428,53 @@ class AnalysisService:
     5. Ensure your output is in the exact JSON format specified.
     """
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {os.getenv('MISTRAL_API_KEY')}"
-        }
-
-        data = {
-            "model": "mistral-small-latest",
-            "messages": [
+        return chat_completion(
+            messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.3,
-            "max_tokens": 2000
-        }
-
-        try:
-            response = requests.post(
-                "https://api.mistral.ai/v1/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-
-            if response.status_code != 200:
-                raise Exception(f"Mistral API error: {response.text}")
-
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"API request failed: {str(e)}")
-
-
-    def _call_mistral_api_for_daily_tasks(self, project_analysis: dict, target_date: str, day_number: int, daily_hours: int = 8) -> str:
-        """Call Mistral API for generating daily task breakdown"""
-        
-        system_prompt = f"""You are an expert Task Planning Assistant specialized in breaking down software development projects into daily actionable tasks.
-
-    CORE CAPABILITIES:
-    1. Daily Task Breakdown from Project Analysis
-    2. Realistic Daily Hour Allocation
-    3. Task Sequencing and Dependencies
-    4. Progress-based Task Planning
-
-    DAILY TASK RULES:
-    - Generate tasks for exactly {daily_hours} hours per day
-    - Tasks should be specific and actionable
-    - Consider logical task dependencies and sequence
-    - Each task should have realistic hour estimates
-    - Total daily hours must equal {daily_hours}
-    - Tasks should align with the overall project timeline
-    - Consider development best practices and workflow
-
-    RESPONSE FORMAT REQUIREMENTS:
-    Return a valid JSON object with the following structure:
-    {{
-        "day": "Day {day_number}",
-        "date": "{target_date}",
-        "planned_hours": {daily_hours},
-        "tasks": [
-            {{"task": "Specific task description", "estimated_hours": X}},
-            {{"task": "Another specific task description", "estimated_hours": X}}
-        ]
-    }}
-
-    TASK PLANNING METHODOLOGY:
-    1. Analyze the project phase for Day {day_number}
-    2. Break down complex tasks into daily chunks
-    3. Ensure task continuity and logical progression
-    4. Allocate exactly {daily_hours} hours across all tasks
-    5. Make tasks actionable and measurable
-    """
-
-        user_prompt = f"""
-    DAILY TASK REQUEST for Day {day_number}
-
-    TARGET DATE: {target_date}
-    DAILY HOURS: {daily_hours}
-
-    PROJECT ANALYSIS CONTEXT:
-    {project_analysis}
+            endpoint="analysis",
+            user_id=user_id,
+            max_tokens=2000
+        )
 
-    Please generate a daily task breakdown for Day {day_number} that:
-    1. Fits within {daily_hours} hours total
-    2. Contains specific, actionable tasks
-    3. Follows logical development sequence
-    4. Aligns with the project timeline and phases
-    5. Each task has realistic hour estimates that sum to {daily_hours}
-    """
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {os.getenv('MISTRAL_API_KEY')}"
-        }
+    def _call_mistral_api_for_daily_tasks(
+        self,
+        project_analysis: dict,
+        target_date: str,
+        day_number: int,
+        daily_hours: int = 8,
+        user_id: Optional[int] = None,
+        cache_key: Optional[Hashable] = None
+    ) -> Tuple[str, PromptStats]:
+        """Call Mistral API for generating daily task breakdown, with only day N's slice of the project"""
+        system_prompt, user_prompt, prompt_stats = prompt_builder.daily_task_prompts(
+            project_analysis=project_analysis,
+            target_date=target_date,
+            day_number=day_number,
+            daily_hours=daily_hours,
+            cache_key=cache_key
+        )
 
-        data = {
-            "model": "mistral-small-latest",
-            "messages": [
+        response = chat_completion(
+            messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.3,
-            "max_tokens": 1000
-        }
-
-        try:
-            response = requests.post(
-                "https://api.mistral.ai/v1/chat/completions", 
-                headers=headers, 
-                json=data,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Mistral API error: {response.text}")
-            
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-            
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"API request failed: {str(e)}")
+            endpoint="daily_tasks",
+            user_id=user_id,
+            max_tokens=1000
+        )
+        return response, prompt_stats
 
     
     def _parse_mistral_response(self, response_text: str) -> ProjectAnalysis:
         """Parse Mistral API response and convert to ProjectAnalysis model"""
         try:
-            response_text = response_text.strip()
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start == -1 or json_end == 0:
-                raise ValueError("No JSON found in response")
-            json_str = response_text[json_start:json_end]
-            analysis_data = json.loads(json_str)
-            return ProjectAnalysis(**analysis_data)
-        except (json.JSONDecodeError, ValueError, TypeError) as e:
+            return parse_llm_json(response_text, ProjectAnalysis)
+        except LLMResponseParseError as e:
+            print(f"Analysis parsing error: {e}")
             return ProjectAnalysis(
                 project_name="Project Analysis Failed",
                 project_summary="Analysis could not be completed due to response parsing error.",
@@ -495,52 +493,213 @@ class AnalysisService:
                 complexity_level="Unknown"
             )
 
-    async def _create_project_record(self, analysis: ProjectAnalysis, document: Document, user_id: int) -> int:
+    async def _create_project_record(
+        self,
+        analysis: ProjectAnalysis,
+        document: Document,
+        user_id: int,
+        project_request: ProjectRequest
+    ) -> int:
         """Create project record in database"""
         try:
             project = Project(
-                project_name=analysis.project_name,
-                project_summary=analysis.project_summary,
-                scope_and_deliverables=analysis.scope_and_deliverables,
-                developer_tasks=analysis.developer_tasks,
-                technology_stack=analysis.technology_stack,
-                complexity_level=analysis.complexity_level,
-                base_hours_required=analysis.time_estimation.get("base_hours_required"),
-                total_hours_estimated=analysis.time_estimation.get("total_hours_estimated"),
-                total_duration_weeks=analysis.time_estimation.get("total_duration_weeks"),
-                total_duration_days=analysis.time_estimation.get("total_duration_days"),
-                development_phase=analysis.time_estimation.get("development_phase"),
-                testing_phase=analysis.time_estimation.get("testing_phase"),
-                deployment_phase=analysis.time_estimation.get("deployment_phase"),
-                buffer_included=analysis.time_estimation.get("buffer_included"),
+                **self._analysis_columns(analysis, project_request),
+                start_date=project_request.start_date or date.today(),
+                holiday_set=project_request.holiday_set,
                 user_id=user_id,
                 document_id=document.id
             )
             self.db.add(project)
             self.db.commit()
             self.db.refresh(project)
+            response_cache.invalidate(project_list_cache_key(user_id))
             return project.id
         except Exception as e:
             self.db.rollback()
             raise Exception(f"Failed to create project record: {str(e)}")
 
+    def _analysis_columns(self, analysis: ProjectAnalysis, project_request: ProjectRequest) -> dict:
+        """Project column values for an analysis, with its tasks planned into days"""
+        return {
+            "project_name": analysis.project_name,
+            "project_summary": analysis.project_summary,
+            "scope_and_deliverables": analysis.scope_and_deliverables,
+            "developer_tasks": analysis.developer_tasks,
+            "technology_stack": analysis.technology_stack,
+            "complexity_level": analysis.complexity_level,
+            "base_hours_required": analysis.time_estimation.get("base_hours_required"),
+            "total_hours_estimated": analysis.time_estimation.get("total_hours_estimated"),
+            "total_duration_weeks": analysis.time_estimation.get("total_duration_weeks"),
+            "total_duration_days": analysis.time_estimation.get("total_duration_days"),
+            "development_phase": analysis.time_estimation.get("development_phase"),
+            "testing_phase": analysis.time_estimation.get("testing_phase"),
+            "deployment_phase": analysis.time_estimation.get("deployment_phase"),
+            "buffer_included": analysis.time_estimation.get("buffer_included"),
+            "daily_hours": project_request.daily_hours,
+            "working_days_per_week": project_request.working_days_per_week,
+            "day_plan": plan_days(analysis.developer_tasks, project_request.daily_hours),
+        }
+
+    async def revise_project(
+        self,
+        project: Project,
+        document: Document,
+        diff: ChunkDiff,
+        project_request: ProjectRequest,
+        user_id: int
+    ) -> RevisionResponse:
+        """Update a project for a revised spec, sending only the changed sections to the LLM"""
+        try:
+            current = project_analysis(project)
+            if not diff.added and not diff.removed:
+                analysis = current
+                change_summary = "No content changes from the previous revision."
+            else:
+                mistral_response = await asyncio.to_thread(
+                    self._call_mistral_api_for_revision,
+                    current, diff, project_request, user_id=user_id
+                )
+                revision = parse_llm_json(mistral_response, ProjectRevision)
+                analysis = ProjectAnalysis(**revision.model_dump(exclude={"change_summary"}))
+                change_summary = revision.change_summary or "Project analysis updated for the revised document."
+
+            with span("update_project_record"):
+                for column, value in self._analysis_columns(analysis, project_request).items():
+                    setattr(project, column, value)
+                project.document_id = document.id
+                project.change_summary = change_summary
+                self.db.commit()
+            response_cache.invalidate(project_list_cache_key(user_id))
+            response_cache.invalidate(project_cache_key(user_id, project.id))
+
+            return RevisionResponse(
+                success=True,
+                message="Project updated for the revised document",
+                project_id=project.id,
+                document_id=document.id,
+                previous_document_id=document.previous_version_id,
+                revision=document.revision,
+                analysis=analysis,
+                change_summary=change_summary,
+                chunks=ChunkDiffStats(
+                    total_chunks=diff.unchanged + len(diff.added),
+                    unchanged_chunks=diff.unchanged,
+                    added_chunks=len(diff.added),
+                    removed_chunks=len(diff.removed),
+                    embedded_chunks=diff.embedded
+                )
+            )
+
+        except LLMBudgetExceeded:
+            raise
+        except LLMResponseParseError as e:
+            # The project keeps its previous analysis; the revision document stays stored
+            self.db.rollback()
+            return RevisionResponse(
+                success=False,
+                message="Failed to parse revision response",
+                project_id=project.id,
+                document_id=document.id,
+                error=str(e)
+            )
+        except Exception as e:
+            self.db.rollback()
+            return RevisionResponse(
+                success=False,
+                message="Revision analysis failed",
+                project_id=project.id,
+                document_id=document.id,
+                error=str(e)
+            )
+
+    def _call_mistral_api_for_revision(
+        self,
+        current: ProjectAnalysis,
+        diff: ChunkDiff,
+        project_request: ProjectRequest,
+        user_id: Optional[int] = None
+    ) -> str:
+        """Call Mistral API to update an analysis from the sections a revision added or removed"""
+        buffer_multiplier = 1.5
+        added_limit = int(REVISION_CONTEXT_LIMIT * REVISION_ADDED_SHARE)
+        added = _fit_sections(diff.added, added_limit)
+        removed = _fit_sections(diff.removed, REVISION_CONTEXT_LIMIT - min(len(added), added_limit))
+        technologies = ', '.join(project_request.technologies) if project_request.technologies else "None specified"
+
+        system_prompt = f"""You are a Project Revision Assistant specialized in updating software project analyses when the specification document is revised.
+
+    You receive the CURRENT ANALYSIS of the previous revision and ONLY the sections of the document that were added, edited or removed. Unchanged sections are not shown and still apply.
+
+    REVISION RULES:
+    - Keep every part of the current analysis that the changes do not affect
+    - Add, remove or re-estimate developer tasks only where the changed sections require it
+    - Re-estimate BASE hours, then apply the {buffer_multiplier}x buffer to get REALISTIC hours
+    - Recalculate durations from REALISTIC hours: {project_request.daily_hours} hours/day, {project_request.working_days_per_week} days/week
+    - Describe the changes in "change_summary" (2-4 sentences: what changed in the spec and how the estimate moved)
+
+    RESPONSE FORMAT REQUIREMENTS:
+    Return a valid JSON object with the fields of the current analysis (project_name, project_summary, scope_and_deliverables, time_estimation, developer_tasks, technology_stack, complexity_level) plus "change_summary"."""
+
+        user_prompt = f"""
+    CURRENT ANALYSIS:
+    {compact_json(current.model_dump())}
+
+    USER-SPECIFIED TECHNOLOGIES: {technologies}
+
+    UNCHANGED SECTIONS: {diff.unchanged} (not shown)
+
+    NEW OR EDITED SECTIONS ({len(diff.added)}):
+    {added or "None"}
+
+    REMOVED SECTIONS ({len(diff.removed)}):
+    {removed or "None"}
+
+    Return the updated analysis with "change_summary" as JSON.
+    """
+
+        return chat_completion(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            endpoint="revision",
+            user_id=user_id,
+            max_tokens=2000
+        )
+
    
-    async def extract_technology_stack(self, document: Document) -> TechStackResponse:
-        """Extract technology stack from document"""
+    async def extract_technology_stack(
+        self,
+        document: Document,
+        include_recommendations: bool = False,
+        content: Optional[str] = None
+    ) -> TechStackResponse:
+        """Extract technology stack from document, asking the LLM only for recommendations"""
         try:
-            content = self._prepare_content(document)
+            detection = detect_technologies(document.content)
             
-            mistral_response = self._call_mistral_for_tech_extraction(content)
-            tech_data = self._parse_tech_response(mistral_response)
+            recommended_technologies = []
+            technology_categories = detection.categories
+            if include_recommendations:
+                if content is None:
+                    content = self._prepare_content(document)
+                mistral_response = await asyncio.to_thread(
+                    self._call_mistral_for_tech_extraction,
+                    content, detection.detected, user_id=document.user_id
+                )
+                recommended_technologies = self._parse_tech_response(mistral_response)
+                technology_categories = categorize(detection.detected + recommended_technologies)
             
             return TechStackResponse(
                 success=True,
                 message="Technology stack extracted successfully",
-                detected_technologies=tech_data["detected_technologies"],
-                recommended_technologies=tech_data["recommended_technologies"],
-                technology_categories=tech_data["technology_categories"]
+                detected_technologies=detection.detected,
+                recommended_technologies=recommended_technologies,
+                technology_categories=technology_categories
             )
             
+        except LLMBudgetExceeded:
+            raise
         except Exception as e:
             return TechStackResponse(
                 success=False,
@@ -548,6 +707,49 @@ class AnalysisService:
                 error=str(e)
             )
     
+    async def analyze_with_tech_stack(
+        self,
+        document: Document,
+        project_request: ProjectRequest,
+        user_id: int,
+        include_recommendations: bool = True
+    ) -> AsyncIterator[Tuple[str, Union[AnalysisResponse, TechStackResponse]]]:
+        """Run analysis and tech stack extraction concurrently, yielding ("analysis" | "tech_stack", result) as each finishes"""
+        # Both passes share one retrieval context, built once from the document's cached index
+        analysis_content = self._prepare_analysis_content(document)
+        tasks = {
+            asyncio.ensure_future(
+                self.analyze_project(document, project_request, user_id, analysis_content=analysis_content)
+            ): "analysis",
+            asyncio.ensure_future(
+                self.extract_technology_stack(document, include_recommendations, content=analysis_content)
+            ): "tech_stack",
+        }
+        pending = set(tasks)
+        analysis_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        yield tasks[task], task.result()
+                    elif tasks[task] == "tech_stack":
+                        # The analysis may be committed already, so a failed tech pass is a partial result
+                        yield "tech_stack", TechStackResponse(
+                            success=False,
+                            message="Technology extraction failed",
+                            error=str(error)
+                        )
+                    else:
+                        # Raised once the tech pass is done: cancelling it would not stop its LLM call, only discard it
+                        analysis_error = error
+            if analysis_error is not None:
+                raise analysis_error
+        finally:
+            for task in pending:
+                task.cancel()
+    
     def _prepare_content(self, document: Document) -> str:
         """Prepare document content for tech extraction"""
         content = document.content
@@ -555,102 +757,68 @@ class AnalysisService:
             content = content[:8000] + "..."
         return content
     
-    def _call_mistral_for_tech_extraction(self, content: str) -> str:
-        """Call Mistral API for technology stack extraction"""
-        system_prompt = """You are a Technology Stack Analysis Assistant specialized in identifying and recommending technologies from project documents.
+    def _call_mistral_for_tech_extraction(self, content: str, detected_technologies: List[str], user_id: Optional[int] = None) -> str:
+        """Call Mistral API for technology recommendations"""
+        system_prompt = """You are a Technology Stack Analysis Assistant specialized in recommending technologies for project documents.
 
 IMPORTANT: You must respond with ONLY valid JSON. Do not include any markdown, explanations, or additional text.
 
 CORE CAPABILITIES:
-1. Detect mentioned technologies in documents
-2. Recommend suitable technologies based on project requirements
-3. Categorize technologies by type
-4. Provide technology alternatives
+1. Recommend suitable technologies based on project requirements
+2. Complement the technologies the document already mentions
+3. Provide technology alternatives where the document leaves gaps
 
 RESPONSE FORMAT REQUIREMENTS:
 Respond with ONLY this exact JSON structure (no markdown, no explanations):
 {
-    "detected_technologies": ["list of technologies mentioned in document"],
-    "recommended_technologies": ["list of recommended technologies based on project needs"],
-    "technology_categories": {
-        "frontend": ["frontend technologies"],
-        "backend": ["backend technologies"], 
-        "database": ["database technologies"],
-        "cloud": ["cloud platforms"],
-        "mobile": ["mobile technologies"],
-        "tools": ["development tools"],
-        "other": ["other technologies"]
-    }
+    "recommended_technologies": ["list of recommended technologies based on project needs"]
 }"""
 
+        detected = ', '.join(detected_technologies) if detected_technologies else "None"
         user_prompt = f"""
 Analyze the following document content and respond with ONLY valid JSON (no markdown, no explanations):
 
+TECHNOLOGIES ALREADY MENTIONED IN THE DOCUMENT:
+{detected}
+
 DOCUMENT CONTENT:
 {content}
 
-Extract mentioned technologies, recommend suitable ones, and categorize them. Return only the JSON response."""
-
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {os.getenv('MISTRAL_API_KEY')}"
-        }
+Recommend suitable technologies that are not already mentioned. Return only the JSON response."""
 
-        data = {
-            "model": "mistral-small-latest",
-            "messages": [
+        return chat_completion(
+            messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.3,
-            "max_tokens": 1500
-        }
-
-        try:
-            response = requests.post(
-                "https://api.mistral.ai/v1/chat/completions", 
-                headers=headers, 
-                json=data,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Mistral API error: {response.text}")
-            
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-            
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"API request failed: {str(e)}")
+            endpoint="tech_recommendations",
+            user_id=user_id,
+            max_tokens=500
+        )
     
-    def _parse_tech_response(self, response: str) -> dict:
-        """Parse Mistral response for technology data"""
+    def _parse_tech_response(self, response: str) -> List[str]:
+        """Parse Mistral response for recommended technologies"""
         try:
-            # Clean the response - remove markdown code blocks if present
-            cleaned_response = response.strip()
-            if cleaned_response.startswith('```json'):
-                cleaned_response = cleaned_response[7:]
-            if cleaned_response.endswith('```'):
-                cleaned_response = cleaned_response[:-3]
-            cleaned_response = cleaned_response.strip()
-            
-            return json.loads(cleaned_response)
-        except json.JSONDecodeError as e:
-            # If JSON parsing fails, create a fallback response
+            return parse_llm_json(response, TechRecommendations).recommended_technologies
+        except LLMResponseParseError as e:
+            # Detected technologies are still returned, so no recommendations is a safe fallback
             print(f"JSON parsing error: {e}")
             print(f"Raw response: {response}")
-            
-            # Return a default structure with error info
-            return {
-                "detected_technologies": [],
-                "recommended_technologies": ["React", "Node.js", "MongoDB", "Express.js"],
-                "technology_categories": {
-                    "frontend": ["React", "HTML", "CSS", "JavaScript"],
-                    "backend": ["Node.js", "Express.js", "Python", "FastAPI"],
-                    "database": ["MongoDB", "PostgreSQL", "MySQL"],
-                    "cloud": ["AWS", "Google Cloud", "Azure"],
-                    "mobile": ["React Native", "Flutter"],
-                    "tools": ["Git", "Docker", "VS Code"],
-                    "other": []
-                }
-            }
\ No newline at end of file
+            return []
+
+
+def _fit_sections(sections: List[str], limit: int) -> str:
+    """Join sections up to `limit` characters, noting how many were left out"""
+    kept = []
+    used = 0
+    for section in sections:
+        if used + len(section) > limit:
+            break
+        kept.append(section)
+        used += len(section)
+    if not kept and sections:
+        kept.append(sections[0][:limit] + "...")
+    text = "\n---\n".join(kept)
+    if len(kept) < len(sections):
+        text += f"\n[... {len(sections) - len(kept)} more sections omitted]"
+    return text
@@ -0,0 +1,296 @@
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import base64
+import io
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import JSON, Date, DateTime, Integer, LargeBinary, Table, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import DailyLog, Document, DocumentChunk, Project
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+
+# Dependency order: rows only reference tables listed before them. Documents travel with
+# projects and chunks because both reference them by foreign key.
+TRANSFER_TABLES: Dict[str, Table] = {
+    "documents": Document.__table__,
+    "projects": Project.__table__,
+    "document_chunks": DocumentChunk.__table__,
+    "daily_logs": DailyLog.__table__,
+}
+
+# Foreign keys rewritten on import, as column -> table whose new ids it refers to. Rows
+# whose required key cannot be resolved are skipped; nullable keys are cleared instead.
+REMAPPED_KEYS = {
+    "documents": {"previous_version_id": "documents"},
+    "projects": {"document_id": "documents"},
+    "document_chunks": {"document_id": "documents"},
+    "daily_logs": {"project_id": "projects"},
+}
+
+# JSON columns are written to Parquet as JSON text, except where a native type is more useful
+ARROW_TYPE_OVERRIDES = {
+    ("documents", "embedding"): pa.list_(pa.float32()),
+    ("document_chunks", "embedding"): pa.list_(pa.float32()),
+}
+
+
+class TransferError(ValueError):
+    pass
+
+
+def _arrow_type(table_name: str, column) -> pa.DataType:
+    override = ARROW_TYPE_OVERRIDES.get((table_name, column.name))
+    if override is not None:
+        return override
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(column.type, Date):
+        return pa.date32()
+    if isinstance(column.type, LargeBinary):
+        return pa.binary()
+    return pa.string()
+
+
+def arrow_schema(table_name: str) -> pa.Schema:
+    table = TRANSFER_TABLES[table_name]
+    return pa.schema([pa.field(column.name, _arrow_type(table_name, column)) for column in table.columns])
+
+
+def _is_json_text(table_name: str, column) -> bool:
+    return isinstance(column.type, JSON) and (table_name, column.name) not in ARROW_TYPE_OVERRIDES
+
+
+def _to_json_value(column, value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    return value
+
+
+def _from_json_value(column, value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Date):
+        return date.fromisoformat(value)
+    if isinstance(column.type, LargeBinary):
+        return base64.b64decode(value)
+    return value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after each Parquet row group"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class BulkExporter:
+    """Streams table rows through server-side cursors, holding one batch in memory at a time"""
+
+    def __init__(self, db: Session, user_id: Optional[int] = None, batch_size: int = EXPORT_BATCH_SIZE):
+        self.db = db
+        self.user_id = user_id
+        self.batch_size = batch_size
+
+    def _query(self, table_name: str):
+        table = TRANSFER_TABLES[table_name]
+        query = select(table).order_by(table.c.id)
+        if self.user_id is None:
+            return query
+        if table_name == "document_chunks":
+            documents = TRANSFER_TABLES["documents"]
+            return query.where(table.c.document_id.in_(
+                select(documents.c.id).where(documents.c.user_id == self.user_id)
+            ))
+        return query.where(table.c.user_id == self.user_id)
+
+    def iter_batches(self, table_name: str) -> Iterator[List[Dict[str, Any]]]:
+        result = self.db.execute(
+            self._query(table_name).execution_options(stream_results=True, yield_per=self.batch_size)
+        )
+        for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+    def iter_ndjson(self, table_names: Iterable[str]) -> Iterator[bytes]:
+        """One {"table": ..., "row": {...}} object per line, tables in dependency order"""
+        for table_name in _ordered(table_names):
+            columns = list(TRANSFER_TABLES[table_name].columns)
+            for batch in self.iter_batches(table_name):
+                lines = [
+                    json.dumps({
+                        "table": table_name,
+                        "row": {column.name: _to_json_value(column, row[column.name]) for column in columns}
+                    }, ensure_ascii=False)
+                    for row in batch
+                ]
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    def iter_parquet(self, table_name: str) -> Iterator[bytes]:
+        """A Parquet file for one table, yielded one row group at a time"""
+        schema = arrow_schema(table_name)
+        json_columns = [column.name for column in TRANSFER_TABLES[table_name].columns if _is_json_text(table_name, column)]
+        sink = _ChunkSink()
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for batch in self.iter_batches(table_name):
+                for row in batch:
+                    for name in json_columns:
+                        if row[name] is not None:
+                            row[name] = json.dumps(row[name], ensure_ascii=False)
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                yield sink.drain()
+        yield sink.drain()
+
+    def write_parquet(self, table_name: str, path: str) -> int:
+        with open(path, "wb") as f:
+            for chunk in self.iter_parquet(table_name):
+                f.write(chunk)
+        return pq.ParquetFile(path).metadata.num_rows
+
+
+class BulkImporter:
+    """Inserts exported rows for one user, assigning new ids and rewriting foreign keys"""
+
+    def __init__(self, db: Session, user_id: int, batch_size: int = IMPORT_BATCH_SIZE):
+        self.db = db
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.id_maps: Dict[str, Dict[int, int]] = {name: {} for name in TRANSFER_TABLES}
+        self.counts: Dict[str, Dict[str, int]] = {name: {"imported": 0, "skipped": 0} for name in TRANSFER_TABLES}
+
+    def import_records(self, records: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Dict[str, int]]:
+        """Import (table, row) pairs in dependency order; commits once at the end"""
+        buffer: List[Dict[str, Any]] = []
+        current: Optional[str] = None
+        order = list(TRANSFER_TABLES)
+
+        for table_name, row in records:
+            if table_name not in TRANSFER_TABLES:
+                raise TransferError(f"Unknown table: {table_name}")
+            if table_name != current:
+                self._flush(current, buffer)
+                if current is not None and order.index(table_name) < order.index(current):
+                    raise TransferError(f"{table_name} rows must come before {current} rows")
+                current = table_name
+            if self._references_buffered(table_name, row, buffer):
+                # A revision can point at a document in the same batch; insert that one first
+                self._flush(current, buffer)
+            buffer.append(row)
+            if len(buffer) >= self.batch_size:
+                self._flush(current, buffer)
+
+        self._flush(current, buffer)
+        self.db.commit()
+        return self.counts
+
+    def _references_buffered(self, table_name: str, row: Dict[str, Any], buffer: List[Dict[str, Any]]) -> bool:
+        referenced = {
+            row.get(column) for column, target in REMAPPED_KEYS.get(table_name, {}).items()
+            if target == table_name and row.get(column) is not None
+        }
+        return bool(referenced) and any(buffered_row.get("id") in referenced for buffered_row in buffer)
+
+    def _flush(self, table_name: Optional[str], buffer: List[Dict[str, Any]]):
+        if not buffer:
+            return
+        table = TRANSFER_TABLES[table_name]
+        remapped = REMAPPED_KEYS.get(table_name, {})
+
+        old_ids = []
+        rows = []
+        for row in buffer:
+            values = {key: value for key, value in row.items() if key in table.c and key != "id"}
+            if "user_id" in table.c:
+                values["user_id"] = self.user_id
+            missing = False
+            for column, target in remapped.items():
+                new_id = self.id_maps[target].get(values.get(column))
+                if new_id is None and not table.c[column].nullable:
+                    missing = True
+                    break
+                values[column] = new_id
+            if missing:
+                self.counts[table_name]["skipped"] += 1
+                continue
+            old_ids.append(row.get("id"))
+            rows.append(values)
+        buffer.clear()
+
+        if not rows:
+            return
+        new_ids = self.db.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        id_map = self.id_maps[table_name]
+        for old_id, new_id in zip(old_ids, new_ids):
+            if old_id is not None:
+                id_map[old_id] = new_id
+        self.counts[table_name]["imported"] += len(rows)
+
+
+def iter_ndjson_records(lines: Iterable[bytes]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Parse an NDJSON export back into (table, row) pairs with native column values"""
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            table_name = record["table"]
+            table = TRANSFER_TABLES[table_name]
+            row = record["row"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise TransferError(f"Invalid record on line {number}: {e}")
+        yield table_name, {
+            key: _from_json_value(table.c[key], value) if key in table.c else value
+            for key, value in row.items()
+        }
+
+
+def iter_parquet_records(path: str, table_name: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Read a per-table Parquet export back into (table, row) pairs, one row group batch at a time"""
+    table = TRANSFER_TABLES[table_name]
+    json_columns = [column.name for column in table.columns if _is_json_text(table_name, column)]
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        for row in batch.to_pylist():
+            for name in json_columns:
+                if row.get(name) is not None:
+                    row[name] = json.loads(row[name])
+            yield table_name, row
+
+
+def _ordered(table_names: Iterable[str]) -> List[str]:
+    requested = set(table_names)
+    unknown = requested - set(TRANSFER_TABLES)
+    if unknown:
+        raise TransferError(f"Unknown tables: {', '.join(sorted(unknown))}")
+    return [name for name in TRANSFER_TABLES if name in requested]
@@ -0,0 +1,295 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.http_cache import daily_log_cache_key, response_cache
+from app.models import DailyLog, Project
+from app.schemas import DailyLogUpdate, DailyLogUpdateResult, DailyTaskPlan, TaskStatusChange
+from app.service.analysis_service import AnalysisService
+from app.service.day_planner import plan_days
+from app.service.llm_json import parse_llm_json
+from app.service.prompt_builder import PromptStats
+from app.service.single_flight import SingleFlight, advisory_xact_lock
+from app.telemetry import coalesced_requests_total
+
+MAX_BATCH_UPDATES = 500
+
+# Concurrent identical generate requests in this worker share one LLM call
+DAILY_TASKS_FLIGHT = "daily_tasks"
+daily_task_flights = SingleFlight(DAILY_TASKS_FLIGHT)
+
+DAILY_LOGS = DailyLog.__table__
+
+# One statement executed with a parameter set per log; the version guard keeps it
+# from overwriting an edit committed since the logs were read
+BATCH_UPDATE_STATEMENT = (
+    DAILY_LOGS.update()
+    .where(DAILY_LOGS.c.id == bindparam("log_id"), DAILY_LOGS.c.version == bindparam("expected_version"))
+    .values(
+        tasks=bindparam("new_tasks", type_=DAILY_LOGS.c.tasks.type),
+        version=DAILY_LOGS.c.version + 1,
+        updated_at=func.now()
+    )
+)
+
+
+class DailyLogService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply_batch(self, user_id: int, updates: List[DailyLogUpdate]) -> List[DailyLogUpdateResult]:
+        """Apply task status changes for many (project, day) logs in one transaction"""
+        keys = [(update.project_id, update.day_number) for update in updates]
+        logs = self._lock_logs(user_id, set(keys))
+
+        results: List[Optional[DailyLogUpdateResult]] = [None] * len(updates)
+        params = []
+        pending: List[Tuple[int, Dict[str, Any]]] = []
+        seen = set()
+
+        for position, update in enumerate(updates):
+            key = (update.project_id, update.day_number)
+            log = logs.get(key)
+            if key in seen:
+                results[position] = self._result(update, "invalid", error="Duplicate update for this project/day")
+                continue
+            seen.add(key)
+
+            if log is None:
+                results[position] = self._result(update, "not_found", error="Daily log not found for this project/day")
+                continue
+            if update.expected_version is not None and update.expected_version != log["version"]:
+                results[position] = self._result(
+                    update, "conflict", version=log["version"],
+                    error=f"Log was modified (version {log['version']}, expected {update.expected_version})"
+                )
+                continue
+
+            tasks, error = self._apply_changes(log["tasks"], update.changes)
+            if error:
+                results[position] = self._result(update, "invalid", version=log["version"], error=error)
+                continue
+
+            params.append({"log_id": log["id"], "expected_version": log["version"], "new_tasks": tasks})
+            pending.append((position, {"tasks": tasks, "version": log["version"] + 1}))
+
+        if params:
+            updated = self.db.execute(BATCH_UPDATE_STATEMENT, params).rowcount
+            if updated not in (-1, len(params)):
+                # Rows are locked where the database supports it, so this only happens when
+                # another writer slipped in between; report conflicts rather than partial writes
+                self.db.rollback()
+                for position, _ in pending:
+                    results[position] = self._result(updates[position], "conflict", error="Log was modified concurrently")
+                return results
+
+        self.db.commit()
+
+        for position, state in pending:
+            update = updates[position]
+            completed = sum(1 for task in state["tasks"] if task.get("task_done"))
+            results[position] = self._result(
+                update, "updated",
+                version=state["version"],
+                completed_count=completed,
+                remaining_count=len(state["tasks"]) - completed,
+                total=len(state["tasks"])
+            )
+            response_cache.invalidate(daily_log_cache_key(user_id, update.project_id, update.day_number))
+
+        return results
+
+    def _lock_logs(self, user_id: int, keys: set) -> Dict[Tuple[int, int], Dict[str, Any]]:
+        """Fetch every targeted log in one query, locking the rows until commit (SELECT ... FOR UPDATE)"""
+        if not keys:
+            return {}
+        rows = self.db.execute(
+            select(DAILY_LOGS.c.id, DAILY_LOGS.c.project_id, DAILY_LOGS.c.day_number, DAILY_LOGS.c.tasks, DAILY_LOGS.c.version)
+            .where(DAILY_LOGS.c.user_id == user_id, tuple_(DAILY_LOGS.c.project_id, DAILY_LOGS.c.day_number).in_(list(keys)))
+            .with_for_update()
+        ).mappings()
+        return {(row["project_id"], row["day_number"]): dict(row) for row in rows}
+
+    def _apply_changes(self, tasks: List[Dict[str, Any]], changes: List[TaskStatusChange]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        updated = [dict(task) for task in tasks]
+        by_key = {(task["task"], task["estimated_hours"]): index for index, task in enumerate(updated)}
+
+        for change in changes:
+            if change.task_index is not None:
+                index = change.task_index
+                if not 0 <= index < len(updated):
+                    return tasks, f"task_index {index} is out of range"
+            else:
+                index = by_key.get((change.task, change.estimated_hours))
+                if index is None:
+                    return tasks, f"Task not found: {change.task!r}"
+            updated[index]["task_done"] = change.task_done
+
+        return updated, None
+
+    def _result(self, update: DailyLogUpdate, status: str, **fields) -> DailyLogUpdateResult:
+        return DailyLogUpdateResult(project_id=update.project_id, day_number=update.day_number, status=status, **fields)
+
+    def generate_day(
+        self,
+        project_id: int,
+        user_id: int,
+        target_date: str,
+        day_number: int,
+        daily_hours: int,
+        refine: bool = False
+    ) -> Dict[str, Any]:
+        """Save day N's tasks from the project's day plan, or from the LLM when refine is set.
+
+        Holds the day's advisory lock until the log is committed.
+        """
+        planned_date = datetime.strptime(target_date, "%Y-%m-%d").date()
+        seen = self._day_log_state(project_id, user_id, day_number)
+
+        if advisory_xact_lock(self.db, f"daily_tasks:{project_id}:{day_number}"):
+            current = self._day_log_state(project_id, user_id, day_number)
+            # Another worker saved this day while we waited for the lock; answer with its result
+            if current is not None and current != seen and current.target_date == planned_date and current.planned_hours == daily_hours:
+                coalesced_requests_total.inc(flight=DAILY_TASKS_FLIGHT, source="advisory_lock")
+                return self._daily_tasks_response(day_number, target_date, daily_hours, current.tasks, None, coalesced=True)
+
+        project = self.db.query(Project).filter(Project.id == project_id, Project.user_id == user_id).first()
+        if project is None:
+            raise LookupError("Project does not exist or access denied")
+
+        prompt_stats = None
+        if refine:
+            final_tasks, prompt_stats = self._refined_tasks(project, user_id, target_date, day_number, daily_hours)
+        else:
+            final_tasks = self._planned_tasks(project, day_number, daily_hours)
+
+        # Carry over the previous day's unfinished tasks
+        if day_number > 1:
+            previous_log = self.db.query(DailyLog).filter_by(
+                project_id=project.id,
+                user_id=user_id,
+                day_number=day_number - 1
+            ).first()
+
+            if previous_log and previous_log.tasks:
+                for task in previous_log.tasks:
+                    if not task.get("task_done"):
+                        final_tasks.append({
+                            "task": task["task"],
+                            "estimated_hours": task["estimated_hours"],
+                            "task_done": False
+                        })
+
+        existing_log = self.db.query(DailyLog).filter_by(
+            project_id=project.id,
+            user_id=user_id,
+            day_number=day_number
+        ).first()
+
+        if existing_log:
+            existing_log.tasks = final_tasks
+            existing_log.planned_hours = daily_hours
+            existing_log.target_date = planned_date
+        else:
+            self.db.add(DailyLog(
+                project_id=project.id,
+                user_id=user_id,
+                day_number=day_number,
+                target_date=planned_date,
+                planned_hours=daily_hours,
+                tasks=final_tasks
+            ))
+
+        self.db.commit()
+        response_cache.invalidate(daily_log_cache_key(user_id, project.id, day_number))
+        return self._daily_tasks_response(
+            day_number, target_date, daily_hours, final_tasks, prompt_stats._asdict() if prompt_stats else None
+        )
+
+    def _planned_tasks(self, project: Project, day_number: int, daily_hours: int) -> List[Dict[str, Any]]:
+        """Day N of the project's day plan; a different daily_hours is planned on the fly"""
+        if project.day_plan is not None and project.daily_hours == daily_hours:
+            plan = project.day_plan
+        else:
+            plan = plan_days(project.developer_tasks or [], daily_hours)
+            if project.day_plan is None and project.daily_hours in (None, daily_hours):
+                # Projects created before day plans get theirs on first use
+                project.day_plan = plan
+                project.daily_hours = daily_hours
+
+        if not 1 <= day_number <= len(plan):
+            return []
+        return [
+            {"task": task["task"], "estimated_hours": task["estimated_hours"], "task_done": False}
+            for task in plan[day_number - 1]["tasks"]
+        ]
+
+    def _refined_tasks(
+        self,
+        project: Project,
+        user_id: int,
+        target_date: str,
+        day_number: int,
+        daily_hours: int
+    ) -> Tuple[List[Dict[str, Any]], PromptStats]:
+        """Day N's tasks broken down by the LLM"""
+        project_analysis = {
+            "project_name": project.project_name,
+            "project_summary": project.project_summary,
+            "scope_and_deliverables": project.scope_and_deliverables,
+            "time_estimation": {
+                "base_hours_required": project.base_hours_required,
+                "total_hours_estimated": project.total_hours_estimated,
+                "total_duration_weeks": project.total_duration_weeks,
+                "total_duration_days": project.total_duration_days,
+                "development_phase": project.development_phase,
+                "testing_phase": project.testing_phase,
+                "deployment_phase": project.deployment_phase,
+                "buffer_included": project.buffer_included
+            },
+            "developer_tasks": project.developer_tasks,
+            "technology_stack": project.technology_stack,
+            "complexity_level": project.complexity_level
+        }
+
+        daily_task_response, prompt_stats = AnalysisService(self.db)._call_mistral_api_for_daily_tasks(
+            project_analysis=project_analysis,
+            target_date=target_date,
+            day_number=day_number,
+            daily_hours=daily_hours,
+            user_id=user_id,
+            cache_key=(project.id, project.updated_at or project.created_at)
+        )
+        daily_plan = parse_llm_json(daily_task_response, DailyTaskPlan)
+
+        # Ensure all new tasks have `task_done: False`
+        return [{**task.model_dump(), "task_done": False} for task in daily_plan.tasks], prompt_stats
+
+    def _day_log_state(self, project_id: int, user_id: int, day_number: int):
+        return self.db.execute(
+            select(DAILY_LOGS.c.id, DAILY_LOGS.c.version, DAILY_LOGS.c.target_date, DAILY_LOGS.c.planned_hours, DAILY_LOGS.c.tasks)
+            .where(DAILY_LOGS.c.project_id == project_id, DAILY_LOGS.c.user_id == user_id, DAILY_LOGS.c.day_number == day_number)
+        ).first()
+
+    def _daily_tasks_response(
+        self,
+        day_number: int,
+        target_date: str,
+        daily_hours: int,
+        tasks: List[Dict[str, Any]],
+        prompt_stats: Optional[Dict[str, Any]],
+        coalesced: bool = False
+    ) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "message": "Daily tasks generated and saved successfully",
+            "daily_tasks": {
+                "day": f"Day {day_number}",
+                "date": target_date,
+                "planned_hours": daily_hours,
+                "tasks": tasks
+            },
+            "prompt_stats": prompt_stats,
+            "coalesced": coalesced
+        }
@@ -0,0 +1,59 @@
+from math import ceil, floor
+from typing import Any, Dict, List, Tuple, Union
+
+from app.service.task_parsing import ScheduledTask, schedule_tasks, strip_task_prefix, task_number, tasks_for_day
+
+
+def order_tasks(developer_tasks: List[str]) -> List[Tuple[int, str]]:
+    """Tasks with their original index, in "Task N" order when every task is numbered"""
+    indexed = list(enumerate(developer_tasks))
+    numbers = [task_number(task) for task in developer_tasks]
+    if all(number is not None for number in numbers):
+        indexed.sort(key=lambda item: numbers[item[0]])
+    return indexed
+
+
+def plan_days(developer_tasks: List[str], daily_hours: float) -> List[Dict[str, Any]]:
+    """Pack developer tasks, in order, into working days of daily_hours.
+
+    Tasks are laid end to end and cut at day boundaries, so every day but the last is
+    full and a task longer than a day spans several. Day numbers count working days.
+    """
+    if daily_hours <= 0 or not developer_tasks:
+        return []
+
+    ordered = order_tasks(developer_tasks)
+    schedule = schedule_tasks([task for _, task in ordered], default_hours=daily_hours)
+    days = []
+    for day_number in range(1, ceil(schedule[-1].end_hour / daily_hours) + 1):
+        day_start = (day_number - 1) * daily_hours
+        day_end = day_number * daily_hours
+        tasks = [
+            {
+                "task": _task_label(task, day_number, daily_hours),
+                "estimated_hours": _hours(min(task.end_hour, day_end) - max(task.start_hour, day_start)),
+                "task_index": ordered[task.index][0],
+            }
+            for task in tasks_for_day(schedule, day_number, daily_hours)
+        ]
+        days.append({
+            "day": day_number,
+            "planned_hours": _hours(sum(task["estimated_hours"] for task in tasks)),
+            "tasks": tasks,
+        })
+    return days
+
+
+def _task_label(task: ScheduledTask, day_number: int, daily_hours: float) -> str:
+    """Task text, numbered by part when it spans several days so each day's entries stay distinct"""
+    first_day = floor(task.start_hour / daily_hours) + 1
+    last_day = ceil(task.end_hour / daily_hours)
+    label = strip_task_prefix(task.task)
+    if last_day > first_day:
+        label = f"{label} (part {day_number - first_day + 1} of {last_day - first_day + 1})"
+    return label
+
+
+def _hours(value: float) -> Union[int, float]:
+    value = round(float(value), 2)
+    return int(value) if value.is_integer() else value
@@ -1,32 +1,137 @@
+from collections import Counter, OrderedDict
 from sqlalchemy.orm import Session
 from fastapi import UploadFile, HTTPException
-from typing import List, Optional
-import io
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import hashlib
+import os
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
 from app.models import Document, DocumentChunk
+from app.service.lexical_index import BM25Index, reciprocal_rank_fusion, term_frequencies
+from app.service.pdf_extraction import PDF_LIBRARY, extract_pdf_text
+from app.service.vector_index import document_indexes, user_indexes
+from app.telemetry import span
+from app.upload_limits import ReceivedUpload, receive_upload
+
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "64"))
+HYBRID_CANDIDATES = 20
+
+_embedding_model = None
+_embedding_model_lock = Lock()
+
+_index_cache: "OrderedDict[int, DocumentIndex]" = OrderedDict()
+_index_cache_lock = Lock()
+
+
+class ChunkDiff(NamedTuple):
+    """Chunks of a revision compared with the previous version's, matched by content hash"""
+    added: List[str]
+    removed: List[str]
+    unchanged: int
+    embedded: int
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_embedding_model() -> SentenceTransformer:
+    """Load the sentence embedding model once per process"""
+    global _embedding_model
+    if _embedding_model is None:
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                _embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+    return _embedding_model
+
+
+class DocumentIndex:
+    """In-memory hybrid (BM25 + vector) retrieval index over one document's chunks"""
+
+    def __init__(self, chunks: List[DocumentChunk]):
+        self.texts = [chunk.chunk_text for chunk in chunks]
+        self.bm25 = BM25Index([
+            (chunk.term_frequencies, chunk.token_count or 0)
+            if chunk.term_frequencies is not None
+            else term_frequencies(chunk.chunk_text)
+            for chunk in chunks
+        ])
+
+        embedded = [i for i, chunk in enumerate(chunks) if chunk.embedding]
+        self.embedded_positions = np.array(embedded, dtype=np.int64)
+        if embedded:
+            matrix = np.asarray([chunks[i].embedding for i in embedded], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.embeddings = matrix / norms
+        else:
+            self.embeddings = None
+
+    def search(self, query: str, query_embedding: np.ndarray, top_k: int, hybrid: bool = True) -> List[str]:
+        """Rank chunks by reciprocal rank fusion of vector and BM25 rankings"""
+        candidates = max(top_k, HYBRID_CANDIDATES)
+        rankings = []
+
+        if self.embeddings is not None:
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            query_norm = np.linalg.norm(query_vector)
+            if query_norm:
+                similarities = self.embeddings @ (query_vector / query_norm)
+                order = np.argsort(-similarities)[:candidates]
+                rankings.append(self.embedded_positions[order].tolist())
+
+        if hybrid:
+            lexical = self.bm25.scores(query)
+            matches = [i for i, score in enumerate(lexical) if score > 0]
+            matches.sort(key=lexical.__getitem__, reverse=True)
+            rankings.append(matches[:candidates])
+
+        ranked = reciprocal_rank_fusion(rankings)
+        return [self.texts[i] for i in ranked[:top_k]]
+
+
+def _cache_document_index(document_id: int, index: DocumentIndex):
+    with _index_cache_lock:
+        _index_cache[document_id] = index
+        _index_cache.move_to_end(document_id)
+        while len(_index_cache) > RETRIEVAL_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+
+
+def _cached_document_index(document_id: int) -> Optional[DocumentIndex]:
+    with _index_cache_lock:
+        index = _index_cache.get(document_id)
+        if index is not None:
+            _index_cache.move_to_end(document_id)
+        return index
 
-try:
-    import fitz
-    PDF_LIBRARY = "pymupdf"
-except ImportError:
-    try:
-        from pypdf import PdfReader
-        PDF_LIBRARY = "pypdf"
-        fitz = None
-    except ImportError:
-        PDF_LIBRARY = None
-        fitz = None
 
 class DocumentService:
     def __init__(self, db: Session):
         self.db = db
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedding_model = get_embedding_model()
     
     async def process_document(self, file: UploadFile, user_id: int) -> Optional[Document]:
         """Process uploaded document and save to database"""
+        document, _ = await self.process_document_version(file, user_id)
+        return document
+    
+    async def process_document_version(
+        self,
+        file: UploadFile,
+        user_id: int,
+        previous: Optional[Document] = None
+    ) -> Tuple[Document, ChunkDiff]:
+        """Process an upload, as a new revision of `previous` if given, reusing embeddings of unchanged chunks"""
         try:
-            content = await self._extract_content(file)
+            with span("receive_upload", filename=file.filename):
+                upload = await receive_upload(file)
+            
+            with span("extract_content", filename=file.filename):
+                content = await asyncio.to_thread(self._extract_content, upload)
             
             if len(content.strip()) < 100:
                 raise HTTPException(
@@ -34,25 +139,30 @@ class DocumentService:
                     detail="Document must contain at least 100 characters for meaningful analysis"
                 )
             
-            file.file.seek(0, 2)  
-            file_size = file.file.tell()
-            file.file.seek(0)  
-            
             document = Document(
                 filename=file.filename,
                 content=content,
-                file_type=file.filename.split('.')[-1].lower(),
-                file_size=file_size,
-                user_id=user_id
+                file_type=upload.file_type,
+                file_size=upload.size,
+                file_sha256=upload.sha256,
+                user_id=user_id,
+                previous_version_id=previous.id if previous is not None else None,
+                revision=previous.revision + 1 if previous is not None else 1
             )
             
             self.db.add(document)
             self.db.commit()
             self.db.refresh(document)
             
-            await self._create_chunks(document)
+            with span("create_chunks", document_id=document.id):
+                diff = await self._create_chunks(document, previous)
+            
+            if previous is not None:
+                # Search and similarity only consider the latest revision of a spec
+                user_indexes.remove_document(user_id, previous.id)
+                document_indexes.remove_document(user_id, previous.id)
             
-            return document
+            return document, diff
             
         except HTTPException:
             raise
@@ -60,47 +170,23 @@ class DocumentService:
             self.db.rollback()
             raise HTTPException(status_code=500, detail=f"Document processing failed: {str(e)}")
     
-    async def _extract_content(self, file: UploadFile) -> str:
-        """Extract text content from uploaded files"""
+    def _extract_content(self, upload: ReceivedUpload) -> str:
+        """Extract text content from a received upload"""
         content = ""
         
-        if file.filename.endswith(".pdf"):
-            pdf_bytes = await file.read()
-            
-            if PDF_LIBRARY == "pymupdf" and fitz is not None:
-                try:
-                    doc = fitz.open(stream=io.BytesIO(pdf_bytes), filetype="pdf")
-                    content = ""
-                    for page in doc:
-                        content += page.get_text() + "\n"
-                    doc.close()
-                except Exception as e:
-                    print(f"PyMuPDF failed: {e}")
-                    raise
-                    
-            elif PDF_LIBRARY == "pypdf":
-                try:
-                    pdf_reader = PdfReader(io.BytesIO(pdf_bytes))
-                    content = ""
-                    for page in pdf_reader.pages:
-                        content += page.extract_text() + "\n"
-                except Exception as e:
-                    print(f"PyPDF failed: {e}")
-                    raise
-            else:
+        if upload.file_type == "pdf":
+            if PDF_LIBRARY is None:
                 raise HTTPException(
                     status_code=500, 
                     detail="No PDF library available. Please install PyMuPDF or pypdf"
                 )
-                
-        elif file.filename.endswith(".txt"):
-            content_bytes = await file.read()
-            content = content_bytes.decode("utf-8")
+            try:
+                content = extract_pdf_text(upload.data)
+            except Exception as e:
+                print(f"PDF extraction failed: {e}")
+                raise
         else:
-            raise HTTPException(
-                status_code=400, 
-                detail="Unsupported file type. Only PDF and TXT files are allowed."
-            )
+            content = upload.text
         
         if not content.strip():
             raise HTTPException(
@@ -136,55 +222,132 @@ class DocumentService:
         
         return chunks
     
-    async def _create_chunks(self, document: Document):
-        """Create text chunks and generate embeddings"""
+    async def _create_chunks(self, document: Document, previous: Optional[Document] = None) -> ChunkDiff:
+        """Create text chunks, embeddings and the lexical index, copying unchanged chunks from `previous`"""
         try:
-            chunks = self._chunk_text(document.content)
+            chunk_texts = self._chunk_text(document.content)
+            hashes = [chunk_hash(chunk_text) for chunk_text in chunk_texts]
+            previous_chunks = self._previous_chunks(previous.id) if previous is not None else []
+            reusable = {hash_: row for hash_, row in previous_chunks if row.embedding}
             
-            for i, chunk_text in enumerate(chunks):
-                embedding = self.embedding_model.encode(chunk_text).tolist()
-                
-                chunk = DocumentChunk(
+            # Only text not already embedded in the previous revision goes through the model
+            to_embed = list(dict.fromkeys(
+                chunk_text for chunk_text, hash_ in zip(chunk_texts, hashes) if hash_ not in reusable
+            ))
+            with span("embedding", chunks=len(to_embed)):
+                fresh = dict(zip(to_embed, self.embedding_model.encode(to_embed))) if to_embed else {}
+            
+            chunks = []
+            embeddings = []
+            for i, (chunk_text, hash_) in enumerate(zip(chunk_texts, hashes)):
+                row = reusable.get(hash_)
+                if row is not None:
+                    embedding = np.asarray(row.embedding, dtype=np.float32)
+                    frequencies, token_count = row.term_frequencies, row.token_count
+                    if frequencies is None:
+                        frequencies, token_count = term_frequencies(chunk_text)
+                else:
+                    embedding = fresh[chunk_text]
+                    frequencies, token_count = term_frequencies(chunk_text)
+                embeddings.append(embedding)
+                chunks.append(DocumentChunk(
                     document_id=document.id,
                     chunk_text=chunk_text,
                     chunk_index=i,
-                    embedding=embedding
-                )
-                
-                self.db.add(chunk)
+                    content_hash=hash_,
+                    embedding=embedding.tolist(),
+                    term_frequencies=frequencies,
+                    token_count=token_count
+                ))
             
+            # Build the retrieval index before commit expires the chunk attributes
+            index = DocumentIndex(chunks)
+            document_embedding = np.mean(embeddings, axis=0) if chunks else None
+            if document_embedding is not None:
+                document.embedding = document_embedding.tolist()
+            
+            self.db.add_all(chunks)
+            self.db.flush()
+            chunk_ids = [chunk.id for chunk in chunks]
             self.db.commit()
             
+            _cache_document_index(document.id, index)
+            user_indexes.add_document(document.user_id, document.id, chunk_ids, embeddings)
+            if document_embedding is not None:
+                document_indexes.add_document(document.user_id, document.id, [document.id], [document_embedding])
+            
+            return _diff_chunks(chunk_texts, hashes, previous_chunks, embedded=len(to_embed))
+            
         except Exception as e:
             self.db.rollback()
             raise HTTPException(status_code=500, detail=f"Chunk creation failed: {str(e)}")
     
-    def get_relevant_chunks(self, document_id: int, query: str, top_k: int = 3) -> List[str]:
-        """Get most relevant chunks for a query using similarity search"""
-        try:
-            query_embedding = self.embedding_model.encode(query).tolist()
-            
+    def _previous_chunks(self, document_id: int) -> List[Tuple[str, DocumentChunk]]:
+        """(content hash, row) for a document's chunks in order; rows from before hashing are hashed here"""
+        rows = self.db.query(
+            DocumentChunk.content_hash,
+            DocumentChunk.chunk_text,
+            DocumentChunk.embedding,
+            DocumentChunk.term_frequencies,
+            DocumentChunk.token_count
+        ).filter(DocumentChunk.document_id == document_id).order_by(DocumentChunk.chunk_index).all()
+        return [(row.content_hash or chunk_hash(row.chunk_text), row) for row in rows]
+    
+    def _get_document_index(self, document_id: int) -> DocumentIndex:
+        """Return the cached retrieval index for a document, loading it on a miss"""
+        index = _cached_document_index(document_id)
+        if index is None:
             chunks = self.db.query(DocumentChunk).filter(
                 DocumentChunk.document_id == document_id
-            ).all()
-            
-            if not chunks:
-                return []
+            ).order_by(DocumentChunk.chunk_index).all()
+            index = DocumentIndex(chunks)
+            if chunks:
+                _cache_document_index(document_id, index)
+        return index
+    
+    def get_relevant_chunks(self, document_id: int, query: str, top_k: int = 3, hybrid: bool = True) -> List[str]:
+        """Get most relevant chunks for a query using hybrid lexical + vector search"""
+        return self.get_relevant_chunks_batch(document_id, [query], top_k, hybrid)[query]
+    
+    def get_relevant_chunks_batch(
+        self,
+        document_id: int,
+        queries: List[str],
+        top_k: int = 3,
+        hybrid: bool = True
+    ) -> Dict[str, List[str]]:
+        """Run several retrieval queries against one document, embedding the queries in a single batch"""
+        try:
+            index = self._get_document_index(document_id)
             
-            similarities = []
-            for chunk in chunks:
-                if chunk.embedding:
-                    similarity = self._cosine_similarity(query_embedding, chunk.embedding)
-                    similarities.append((chunk.chunk_text, similarity))
+            if not index.texts or not queries:
+                return {query: [] for query in queries}
             
-            similarities.sort(key=lambda x: x[1], reverse=True)
-            return [chunk_text for chunk_text, _ in similarities[:top_k]]
+            query_embeddings = self.embedding_model.encode(queries)
+            return {
+                query: index.search(query, embedding, top_k, hybrid)
+                for query, embedding in zip(queries, query_embeddings)
+            }
             
         except Exception as e:
             print(f"Error getting relevant chunks: {str(e)}")
-            return []
-    
-    def _cosine_similarity(self, a: List[float], b: List[float]) -> float:
-        """Calculate cosine similarity between two vectors"""
-        import numpy as np
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
\ No newline at end of file
+            return {query: [] for query in queries}
+
+
+def _diff_chunks(chunk_texts: List[str], hashes: List[str], previous_chunks: List[Tuple[str, DocumentChunk]], embedded: int) -> ChunkDiff:
+    """Multiset diff by hash, so repeated boilerplate paragraphs are matched one for one"""
+    remaining = Counter(hash_ for hash_, _ in previous_chunks)
+    added = []
+    for chunk_text, hash_ in zip(chunk_texts, hashes):
+        if remaining[hash_] > 0:
+            remaining[hash_] -= 1
+        else:
+            added.append(chunk_text)
+
+    removed = []
+    for hash_, row in previous_chunks:
+        if remaining[hash_] > 0:
+            remaining[hash_] -= 1
+            removed.append(row.chunk_text)
+
+    return ChunkDiff(added=added, removed=removed, unchanged=len(chunk_texts) - len(added), embedded=embedded)
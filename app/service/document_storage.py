@@ -0,0 +1,15 @@
+import os
+
+import zstandard
+
+DOCUMENT_ZSTD_LEVEL = int(os.getenv("DOCUMENT_ZSTD_LEVEL", "9"))
+
+
+def compress_text(text: str) -> bytes:
+    """zstd-compress document text for storage"""
+    # Compressor objects are not thread-safe, and creating one is cheap next to compressing a document
+    return zstandard.ZstdCompressor(level=DOCUMENT_ZSTD_LEVEL).compress(text.encode("utf-8"))
+
+
+def decompress_text(data: bytes) -> str:
+    return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
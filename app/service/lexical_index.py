@@ -0,0 +1,71 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Keeps technology names such as "c++", "c#", "node.js" and "asp.net" intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+
+STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "in", "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "was",
+    "were", "will", "with", "we", "our", "you", "your", "should", "must", "can",
+})
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into lexical terms"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def term_frequencies(text: str) -> Tuple[Dict[str, int], int]:
+    """Return the term frequency map and token count used by the BM25 index"""
+    tokens = tokenize(text)
+    return dict(Counter(tokens)), len(tokens)
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of chunks, built from precomputed term frequencies"""
+
+    def __init__(self, documents: Sequence[Tuple[Dict[str, int], int]]):
+        self.lengths = [length for _, length in documents]
+        self.size = len(documents)
+        self.average_length = (sum(self.lengths) / self.size) if self.size else 0.0
+
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        for i, (tf, _) in enumerate(documents):
+            for term, freq in tf.items():
+                self.postings.setdefault(term, []).append((i, freq))
+        self.idf = {
+            term: math.log(1 + (self.size - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        """Score every indexed chunk against the query"""
+        results = [0.0] * self.size
+        if not self.average_length:
+            return results
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for i, freq in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[i] / self.average_length)
+                results[i] += idf * freq * (BM25_K1 + 1) / (freq + norm)
+        return results
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[int]], k: int = RRF_K) -> List[int]:
+    """Fuse several ranked lists of chunk positions into a single ranking"""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, position in enumerate(ranking):
+            fused[position] = fused.get(position, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused, key=fused.get, reverse=True)
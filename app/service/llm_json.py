@@ -0,0 +1,174 @@
+import json
+import re
+from typing import Iterator, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+T = TypeVar("T", bound=BaseModel)
+
+FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.DOTALL)
+TRAILING_COMMA_PATTERN = re.compile(r",\s*[}\]]")
+MAX_TRUNCATION_REPAIRS = 20
+
+CLOSERS = {"{": "}", "[": "]"}
+
+
+class LLMResponseParseError(ValueError):
+    """Raised when no JSON object in an LLM response validates against the expected schema"""
+
+
+def _scan(text: str) -> Tuple[List[str], bool, List[int]]:
+    """Walk text once, tracking open brackets, string state and structural comma positions"""
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    commas: List[int] = []
+
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(char)
+        elif char in "}]":
+            if stack:
+                stack.pop()
+        elif char == ",":
+            commas.append(i)
+
+    return stack, in_string, commas
+
+
+def iter_json_objects(text: str) -> Iterator[str]:
+    """Yield every top-level {...} span in text, including a trailing unterminated one"""
+    depth = 0
+    start = -1
+    in_string = False
+    escaped = False
+
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"' and depth:
+            in_string = True
+        elif char == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif char == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                yield text[start:i + 1]
+
+    if depth:
+        yield text[start:]
+
+
+def strip_trailing_commas(fragment: str) -> str:
+    """Remove commas directly before a closing bracket, ignoring commas inside strings"""
+    if not TRAILING_COMMA_PATTERN.search(fragment):
+        return fragment
+    _, _, commas = _scan(fragment)
+    dangling = {
+        i for i in commas
+        if fragment[i + 1:].lstrip()[:1] in ("}", "]")
+    }
+    if not dangling:
+        return fragment
+    return "".join(char for i, char in enumerate(fragment) if i not in dangling)
+
+
+def close_truncated(fragment: str) -> str:
+    """Close an unterminated string and any open brackets at the end of a fragment"""
+    stack, in_string, _ = _scan(fragment)
+    if in_string:
+        fragment += '"'
+    fragment = fragment.rstrip().rstrip(",").rstrip()
+    if fragment.endswith(":"):
+        fragment += " null"
+    return fragment + "".join(CLOSERS[opener] for opener in reversed(stack))
+
+
+def _repairs(fragment: str) -> Iterator[object]:
+    """Yield parsed versions of a fragment, from the least to the most aggressive repair"""
+    try:
+        yield json.loads(fragment)
+        return
+    except json.JSONDecodeError:
+        fragment = strip_trailing_commas(fragment)
+    try:
+        yield json.loads(fragment)
+        return
+    except json.JSONDecodeError:
+        pass
+
+    # Truncated output: close what is open, then keep dropping the last (possibly
+    # incomplete) item so a later schema check can settle on a version that validates
+    _, _, commas = _scan(fragment)
+    candidate = fragment
+    for _ in range(MAX_TRUNCATION_REPAIRS):
+        try:
+            yield json.loads(strip_trailing_commas(close_truncated(candidate)))
+        except json.JSONDecodeError:
+            pass
+        if not commas:
+            return
+        candidate = candidate[:commas.pop()]
+
+
+def iter_json_candidates(text: str) -> Iterator[dict]:
+    """Yield every JSON object that can be recovered from an LLM response, best candidates first"""
+    text = text.strip()
+    if text.startswith("{"):
+        # JSON response mode usually returns a bare object
+        try:
+            data = json.loads(text)
+            if isinstance(data, dict):
+                yield data
+        except json.JSONDecodeError:
+            pass
+
+    seen = set()
+    sources = FENCE_PATTERN.findall(text) + [text]
+    for source in sources:
+        for fragment in iter_json_objects(source):
+            if fragment in seen:
+                continue
+            seen.add(fragment)
+            for data in _repairs(fragment):
+                if isinstance(data, dict):
+                    yield data
+
+
+def extract_json_object(text: str) -> dict:
+    """Return the first JSON object that can be recovered from an LLM response"""
+    for data in iter_json_candidates(text):
+        return data
+    raise LLMResponseParseError("No JSON object found in response")
+
+
+def parse_llm_json(text: str, model: Type[T]) -> T:
+    """Return the first JSON object in an LLM response that validates against model"""
+    last_error: Optional[Exception] = None
+    for data in iter_json_candidates(text):
+        try:
+            return model.model_validate(data)
+        except ValidationError as e:
+            last_error = e
+
+    if last_error is not None:
+        raise LLMResponseParseError(f"Response did not match {model.__name__}: {last_error}")
+    raise LLMResponseParseError("No JSON object found in response")
@@ -0,0 +1,398 @@
+from concurrent.futures import Future, wait
+from threading import Lock, Thread
+from typing import Any, Coroutine, Dict, List, NamedTuple, Optional, Set
+import asyncio
+import json
+import os
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+from app.telemetry import llm_provider_duration_seconds, llm_provider_requests_total
+
+load_dotenv()
+
+# JSON list of OpenAI-compatible chat completion endpoints, tried in latency order, e.g.
+# [{"name": "mistral", "url": "https://api.mistral.ai/v1/chat/completions", "model": "mistral-small-latest",
+#   "api_key_env": "MISTRAL_API_KEY"},
+#  {"name": "local", "url": "http://localhost:11434/v1/chat/completions", "model": "llama3.1", "json_mode": false}]
+# Without it the single Mistral endpoint from MISTRAL_API_URL / MISTRAL_MODEL is used.
+LLM_PROVIDERS = os.getenv("LLM_PROVIDERS", "")
+MISTRAL_API_URL = os.getenv("MISTRAL_API_URL", "https://api.mistral.ai/v1/chat/completions")
+MISTRAL_MODEL = os.getenv("MISTRAL_MODEL", "mistral-small-latest")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+# On shutdown, in-flight calls get this long to finish before they are cancelled
+LLM_DRAIN_TIMEOUT_SECONDS = float(os.getenv("LLM_DRAIN_TIMEOUT_SECONDS", str(LLM_TIMEOUT_SECONDS)))
+
+# Interactive endpoints send a second request to the next provider if the first is slow
+LLM_HEDGED_ENDPOINTS = {name.strip() for name in os.getenv("LLM_HEDGED_ENDPOINTS", "daily_tasks,tech_recommendations").split(",") if name.strip()}
+# Fixed hedge delay; 0 derives it from the primary provider's recent latency
+LLM_HEDGE_DELAY_MS = float(os.getenv("LLM_HEDGE_DELAY_MS", "0"))
+HEDGE_LATENCY_FACTOR = 1.5
+HEDGE_DEFAULT_DELAY_MS = 2000
+HEDGE_MIN_DELAY_MS = 250
+
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+LATENCY_EWMA_ALPHA = 0.3
+
+# Statuses worth retrying on another provider; other 4xx mean the request itself is wrong
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class ProviderError(Exception):
+    """An LLM request failed; `retryable` failures fall back to the next provider"""
+
+    def __init__(
+        self,
+        message: str,
+        status: str = "error",
+        retryable: bool = True,
+        provider: Optional[str] = None,
+        model: Optional[str] = None
+    ):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.provider = provider
+        self.model = model
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial request through after a cooldown"""
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, cooldown_seconds: float = LLM_BREAKER_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class LLMResult(NamedTuple):
+    content: str
+    usage: Dict[str, Any]
+    provider: str
+    model: str
+
+
+class Provider:
+    """One OpenAI-compatible chat completions endpoint with its latency estimate and breaker"""
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        model: str,
+        api_key: Optional[str] = None,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        json_mode: bool = True
+    ):
+        self.name = name
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        self.json_mode = json_mode
+        self.breaker = CircuitBreaker()
+        self.latency_ms: Optional[float] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "Provider":
+        api_key = config.get("api_key")
+        if api_key is None and config.get("api_key_env"):
+            api_key = os.getenv(config["api_key_env"])
+        return cls(
+            name=config["name"],
+            url=config["url"],
+            model=config["model"],
+            api_key=api_key,
+            timeout=float(config.get("timeout", LLM_TIMEOUT_SECONDS)),
+            json_mode=bool(config.get("json_mode", True))
+        )
+
+    def observe_latency(self, latency_ms: float):
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += LATENCY_EWMA_ALPHA * (latency_ms - self.latency_ms)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created on the router's loop and reused, so connections stay pooled between calls
+        if self._client is None:
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            self._client = httpx.AsyncClient(headers=headers, timeout=self.timeout)
+        return self._client
+
+    async def complete(self, request: Dict[str, Any]) -> LLMResult:
+        payload = dict(request, model=self.model)
+        if not self.json_mode:
+            payload.pop("response_format", None)
+
+        try:
+            response = await self.client.post(self.url, json=payload)
+        except httpx.TimeoutException as e:
+            raise self._error(f"request timed out ({e})", "timeout")
+        except httpx.HTTPError as e:
+            raise self._error(f"request failed ({e})", "connection_error")
+
+        if response.status_code != 200:
+            raise self._error(
+                f"API error: {response.text}",
+                f"http_{response.status_code}",
+                retryable=response.status_code in RETRYABLE_STATUS_CODES
+            )
+        try:
+            result = response.json()
+            content = result["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise self._error(f"malformed response ({e})", "bad_response")
+        return LLMResult(content, result.get("usage") or {}, self.name, self.model)
+
+    def _error(self, message: str, status: str, retryable: bool = True) -> ProviderError:
+        return ProviderError(f"{self.name}: {message}", status=status, retryable=retryable, provider=self.name, model=self.model)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "model": self.model,
+            "url": self.url,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "latency_ewma_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+        }
+
+
+class LLMRouter:
+    """Routes chat completions across providers: fastest available first, falling back on
+    failure, hedging interactive endpoints, with a circuit breaker per provider.
+
+    Requests run on a private event loop thread, so a hedged request that loses can be
+    cancelled (its connection is closed) while callers keep a blocking interface.
+    """
+
+    def __init__(self, providers: List[Provider], hedged_endpoints=LLM_HEDGED_ENDPOINTS, hedge_delay_ms: float = LLM_HEDGE_DELAY_MS):
+        if not providers:
+            raise ValueError("At least one LLM provider is required")
+        self.providers = providers
+        self.hedged_endpoints = set(hedged_endpoints)
+        self.hedge_delay_ms = hedge_delay_ms
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[Thread] = None
+        self._in_flight: Set[Future] = set()
+        self._lock = Lock()
+
+    def complete(self, request: Dict[str, Any], endpoint: str) -> LLMResult:
+        """Blocking call from any thread; raises ProviderError when every provider fails"""
+        return self._submit(self._complete(request, endpoint)).result()
+
+    def ranked(self) -> List[Provider]:
+        """Providers whose circuit allows a request, lowest recent latency first; untried ones lead"""
+        order = {id(provider): position for position, provider in enumerate(self.providers)}
+        candidates = [provider for provider in self.providers if provider.breaker.state != "open"]
+        return sorted(candidates, key=lambda provider: (provider.latency_ms or 0.0, order[id(provider)]))
+
+    def state(self) -> List[Dict[str, Any]]:
+        return [provider.state() for provider in self.providers]
+
+    def close(self, drain_timeout: float = LLM_DRAIN_TIMEOUT_SECONDS):
+        """Let in-flight calls finish (up to drain_timeout), then close provider connections and stop the loop thread"""
+        deadline = time.monotonic() + drain_timeout
+        while True:
+            with self._lock:
+                in_flight = set(self._in_flight)
+            remaining = deadline - time.monotonic()
+            if not in_flight or remaining <= 0:
+                break
+            print(f"⏳ Draining {len(in_flight)} in-flight LLM calls")
+            # Calls started while draining are picked up on the next pass
+            wait(in_flight, timeout=remaining)
+
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+            abandoned = set(self._in_flight)
+        if loop is None:
+            return
+        for future in abandoned:
+            future.cancel()
+        if abandoned:
+            print(f"⚠️ Cancelled {len(abandoned)} LLM calls still running after {drain_timeout:g}s")
+        asyncio.run_coroutine_threadsafe(self._aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    async def _aclose(self):
+        for provider in self.providers:
+            await provider.aclose()
+
+    def _submit(self, coroutine: Coroutine) -> Future:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = Thread(target=self._loop.run_forever, name="llm-router", daemon=True)
+                self._thread.start()
+            future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+            self._in_flight.add(future)
+        # Outside the lock: the callback runs at once if the call has already finished
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future: Future):
+        with self._lock:
+            self._in_flight.discard(future)
+
+    async def _complete(self, request: Dict[str, Any], endpoint: str) -> LLMResult:
+        providers = self.ranked()
+        if not providers:
+            raise ProviderError("All LLM providers are unavailable (circuits open)", status="circuit_open")
+
+        errors: List[ProviderError] = []
+        if endpoint in self.hedged_endpoints and len(providers) > 1:
+            result = await self._hedged(providers[0], providers[1], request, errors)
+            if result is not None:
+                return result
+            providers = providers[2:]
+
+        for provider in providers:
+            try:
+                return await self._attempt(provider, request)
+            except ProviderError as e:
+                if not e.retryable:
+                    raise
+                errors.append(e)
+
+        last = errors[-1] if errors else ProviderError("No LLM provider accepted the request")
+        raise ProviderError(
+            "; ".join(str(e) for e in errors) or str(last),
+            status=last.status,
+            provider=last.provider,
+            model=last.model
+        )
+
+    async def _hedged(self, primary: Provider, backup: Provider, request: Dict[str, Any], errors: List[ProviderError]) -> Optional[LLMResult]:
+        """Start the primary; if it has not answered within the hedge delay, race the backup against it"""
+        first = asyncio.ensure_future(self._attempt(primary, request))
+        done, _ = await asyncio.wait({first}, timeout=self._hedge_delay(primary) / 1000)
+        if done:
+            try:
+                return first.result()
+            except ProviderError as e:
+                if not e.retryable:
+                    raise
+                errors.append(e)
+            # The primary failed fast, so the backup is a plain fallback
+            try:
+                return await self._attempt(backup, request)
+            except ProviderError as e:
+                if not e.retryable:
+                    raise
+                errors.append(e)
+                return None
+
+        pending = {first, asyncio.ensure_future(self._attempt(backup, request))}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        return task.result()
+                    except ProviderError as e:
+                        if not e.retryable:
+                            raise
+                        errors.append(e)
+        finally:
+            # First response wins; the other request is cancelled and its connection closed
+            for task in pending:
+                task.cancel()
+        return None
+
+    def _hedge_delay(self, provider: Provider) -> float:
+        if self.hedge_delay_ms > 0:
+            return self.hedge_delay_ms
+        if provider.latency_ms is None:
+            return HEDGE_DEFAULT_DELAY_MS
+        return max(HEDGE_MIN_DELAY_MS, provider.latency_ms * HEDGE_LATENCY_FACTOR)
+
+    async def _attempt(self, provider: Provider, request: Dict[str, Any]) -> LLMResult:
+        if not provider.breaker.allow():
+            raise provider._error("circuit open", "circuit_open")
+
+        status = "error"
+        start = time.perf_counter()
+        try:
+            result = await provider.complete(request)
+            status = "ok"
+            provider.breaker.record_success()
+            # Only successes are sampled: a fast 429 or 503 must not make a provider look fastest
+            provider.observe_latency((time.perf_counter() - start) * 1000)
+            return result
+        except ProviderError as e:
+            status = e.status
+            if e.retryable:
+                provider.breaker.record_failure()
+            else:
+                provider.breaker.record_success()
+            raise
+        except asyncio.CancelledError:
+            status = "cancelled"
+            # A cancelled trial request says nothing about the provider's health
+            provider.breaker.trial_in_flight = False
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            llm_provider_requests_total.inc(provider=provider.name, status=status)
+            llm_provider_duration_seconds.observe(elapsed, provider=provider.name, status=status)
+
+
+def load_providers() -> List[Provider]:
+    if LLM_PROVIDERS.strip():
+        return [Provider.from_config(config) for config in json.loads(LLM_PROVIDERS)]
+    return [Provider(
+        name="mistral",
+        url=MISTRAL_API_URL,
+        model=MISTRAL_MODEL,
+        api_key=os.getenv("MISTRAL_API_KEY")
+    )]
+
+
+llm_router = LLMRouter(load_providers())
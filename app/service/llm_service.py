@@ -0,0 +1,230 @@
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Deque, Dict, List, Optional
+import os
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models import LLMCall
+from app.service.llm_router import ProviderError, llm_router
+from app.telemetry import llm_rejections_total, llm_request_duration_seconds, llm_tokens_total, span
+
+load_dotenv()
+
+# Budgets; 0 disables a limit
+LLM_USER_REQUESTS_PER_MINUTE = int(os.getenv("LLM_USER_REQUESTS_PER_MINUTE", "20"))
+LLM_GLOBAL_REQUESTS_PER_MINUTE = int(os.getenv("LLM_GLOBAL_REQUESTS_PER_MINUTE", "300"))
+LLM_USER_TOKENS_PER_DAY = int(os.getenv("LLM_USER_TOKENS_PER_DAY", "200000"))
+LLM_GLOBAL_TOKENS_PER_DAY = int(os.getenv("LLM_GLOBAL_TOKENS_PER_DAY", "5000000"))
+
+RATE_WINDOW_SECONDS = 60
+TOKEN_WINDOW = timedelta(days=1)
+
+
+class LLMBudgetExceeded(Exception):
+    """Raised before an LLM call when a rate or token budget is exhausted"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMMetrics:
+    """In-process LLM call counters, aggregated per endpoint"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._endpoints: Dict[str, Dict[str, float]] = defaultdict(lambda: {
+            "calls": 0,
+            "errors": 0,
+            "rejected": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "latency_ms_total": 0.0,
+            "latency_ms_max": 0.0,
+        })
+
+    def record(self, endpoint: str, status: str, prompt_tokens: int, completion_tokens: int, latency_ms: float):
+        with self._lock:
+            stats = self._endpoints[endpoint]
+            stats["calls"] += 1
+            if status != "ok":
+                stats["errors"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["latency_ms_total"] += latency_ms
+            stats["latency_ms_max"] = max(stats["latency_ms_max"], latency_ms)
+
+    def record_rejection(self, endpoint: str):
+        with self._lock:
+            self._endpoints[endpoint]["rejected"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {endpoint: dict(stats) for endpoint, stats in self._endpoints.items()}
+
+
+class RateLimiter:
+    """Sliding one-minute window of call timestamps, per user and global"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls: Dict[Optional[int], Deque[float]] = defaultdict(deque)
+
+    def acquire(self, key: Optional[int], limit: int) -> Optional[int]:
+        """Record a call, or return the seconds to wait if the limit is reached"""
+        if limit <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            window = self._calls[key]
+            while window and now - window[0] >= RATE_WINDOW_SECONDS:
+                window.popleft()
+            if len(window) >= limit:
+                return max(1, int(RATE_WINDOW_SECONDS - (now - window[0])) + 1)
+            window.append(now)
+            return None
+
+    def release(self, key: Optional[int]):
+        """Give back the most recent call of a key, for a call that was not made after all"""
+        with self._lock:
+            window = self._calls.get(key)
+            if window:
+                window.pop()
+
+
+llm_metrics = LLMMetrics()
+_user_rate = RateLimiter()
+_global_rate = RateLimiter()
+
+
+def tokens_used(user_id: Optional[int] = None, window: timedelta = TOKEN_WINDOW) -> int:
+    """Total tokens spent in the window, for one user or globally"""
+    db = SessionLocal()
+    try:
+        query = db.query(func.coalesce(func.sum(LLMCall.total_tokens), 0)).filter(
+            LLMCall.created_at >= datetime.now(timezone.utc) - window
+        )
+        if user_id is not None:
+            query = query.filter(LLMCall.user_id == user_id)
+        return int(query.scalar())
+    finally:
+        db.close()
+
+
+def check_budget(user_id: Optional[int], endpoint: str):
+    """Raise LLMBudgetExceeded if this call would exceed a rate or token budget"""
+    retry_after = None
+    reason = None
+
+    if LLM_GLOBAL_TOKENS_PER_DAY and tokens_used() >= LLM_GLOBAL_TOKENS_PER_DAY:
+        retry_after, reason = 3600, "Global daily LLM token budget exhausted"
+    elif user_id is not None and LLM_USER_TOKENS_PER_DAY and tokens_used(user_id) >= LLM_USER_TOKENS_PER_DAY:
+        retry_after, reason = 3600, "Daily LLM token budget exhausted for this user"
+    else:
+        if user_id is not None:
+            retry_after = _user_rate.acquire(user_id, LLM_USER_REQUESTS_PER_MINUTE)
+            reason = "LLM request rate exceeded for this user"
+        if retry_after is None:
+            retry_after = _global_rate.acquire(None, LLM_GLOBAL_REQUESTS_PER_MINUTE)
+            reason = "Global LLM request rate exceeded"
+            if retry_after is not None and user_id is not None:
+                # The call is not made, so it must not count against the user's rate
+                _user_rate.release(user_id)
+
+    if retry_after is not None:
+        llm_metrics.record_rejection(endpoint)
+        llm_rejections_total.inc(endpoint=endpoint)
+        raise LLMBudgetExceeded(reason, retry_after)
+
+
+def record_llm_call(
+    endpoint: str,
+    user_id: Optional[int],
+    model: str,
+    status: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    latency_ms: float,
+    provider: Optional[str] = None
+):
+    """Persist one LLM call in its own session so request transactions are unaffected"""
+    llm_metrics.record(endpoint, status, prompt_tokens, completion_tokens, latency_ms)
+    llm_request_duration_seconds.observe(latency_ms / 1000, endpoint=endpoint, status=status)
+    llm_tokens_total.inc(prompt_tokens, endpoint=endpoint, kind="prompt")
+    llm_tokens_total.inc(completion_tokens, endpoint=endpoint, kind="completion")
+    db = SessionLocal()
+    try:
+        db.add(LLMCall(
+            user_id=user_id,
+            endpoint=endpoint,
+            provider=provider,
+            model=model,
+            status=status,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            latency_ms=int(latency_ms)
+        ))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Failed to record LLM call: {e}")
+    finally:
+        db.close()
+
+
+def chat_completion(
+    messages: List[Dict[str, str]],
+    endpoint: str,
+    user_id: Optional[int] = None,
+    max_tokens: int = 1000,
+    temperature: float = 0.3,
+    json_mode: bool = True
+) -> str:
+    """Call the chat completions API with budget checks and usage accounting"""
+    check_budget(user_id, endpoint)
+
+    data = {
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }
+    if json_mode:
+        data["response_format"] = {"type": "json_object"}
+
+    status = "error"
+    result = None
+    failure: Optional[ProviderError] = None
+    start = time.perf_counter()
+    try:
+        # The router picks the provider and model, falling back or hedging as configured
+        with span("llm_call", endpoint=endpoint) as call_span:
+            result = llm_router.complete(data, endpoint)
+            call_span.set_attribute("provider", result.provider)
+            call_span.set_attribute("model", result.model)
+        content = result.content
+        status = "ok"
+        return content
+
+    except ProviderError as e:
+        status = e.status
+        failure = e
+        raise Exception(f"API request failed: {str(e)}")
+    finally:
+        usage = result.usage if result is not None else {}
+        source = result or failure
+        record_llm_call(
+            endpoint=endpoint,
+            user_id=user_id,
+            model=(source.model if source is not None else None) or "unknown",
+            status=status,
+            prompt_tokens=int(usage.get("prompt_tokens") or 0),
+            completion_tokens=int(usage.get("completion_tokens") or 0),
+            latency_ms=(time.perf_counter() - start) * 1000,
+            provider=source.provider if source is not None else None
+        )
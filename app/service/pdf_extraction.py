@@ -0,0 +1,274 @@
+from collections import OrderedDict, defaultdict
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import hashlib
+import io
+import os
+import re
+
+import orjson
+
+from app.shared_cache import shared_cache
+from app.telemetry import pdf_pages_extracted_total
+
+try:
+    import fitz
+    PDF_LIBRARY = "pymupdf"
+except ImportError:
+    try:
+        from pypdf import PdfReader
+        PDF_LIBRARY = "pypdf"
+        fitz = None
+    except ImportError:
+        PDF_LIBRARY = None
+        fitz = None
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+PDF_PAGE_CACHE_SIZE = int(os.getenv("PDF_PAGE_CACHE_SIZE", "2048"))
+PDF_PAGE_CACHE_TTL_SECONDS = float(os.getenv("PDF_PAGE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))  # Shared store only
+
+# Blocks wholly inside the top or bottom tenth of a page are header or footer candidates
+MARGIN_FRACTION = 0.1
+# Blocks at least this share of the text width span the columns, and separate bands of them
+SPANNING_FRACTION = 0.6
+# A header or footer repeats on at least this share of pages (and at least twice)
+REPEATED_FRACTION = 0.5
+
+DIGITS = re.compile(r"\d+")
+
+
+class PageBlock(NamedTuple):
+    text: str
+    margin: str = ""  # "header", "footer" or "" for body text and tables
+
+
+class LayoutElement(NamedTuple):
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    text: str
+
+
+class PageCache:
+    """LRU of extracted pages keyed by content hash, so revisions only parse changed pages.
+
+    With SHARED_CACHE_STORE=postgres, misses fall through to the shared cache, so a
+    revision handled by another worker still finds the pages extracted here.
+    """
+
+    def __init__(self, max_entries: int = PDF_PAGE_CACHE_SIZE, store=shared_cache):
+        self.max_entries = max_entries
+        self.store = store if store.shared else None
+        self._entries: "OrderedDict[str, Tuple[PageBlock, ...]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[Tuple[PageBlock, ...]]:
+        with self._lock:
+            blocks = self._entries.get(key)
+            if blocks is not None:
+                self._entries.move_to_end(key)
+                return blocks
+        if self.store is None:
+            return None
+        value = self.store.get(f"pdf-page:{key}")
+        if value is None:
+            return None
+        blocks = tuple(PageBlock(*block) for block in orjson.loads(value))
+        self._remember(key, blocks)
+        return blocks
+
+    def set(self, key: str, blocks: Tuple[PageBlock, ...]):
+        self._remember(key, blocks)
+        if self.store is not None:
+            self.store.set(f"pdf-page:{key}", orjson.dumps([list(block) for block in blocks]), PDF_PAGE_CACHE_TTL_SECONDS)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, blocks: Tuple[PageBlock, ...]):
+        with self._lock:
+            self._entries[key] = blocks
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+page_cache = PageCache()
+
+
+def extract_pdf_text(data: bytes) -> str:
+    """Text of a PDF in reading order, with tables as rows and repeated headers and footers removed.
+
+    There is no OCR: pages without a text layer contribute nothing.
+    """
+    if PDF_LIBRARY == "pypdf":
+        reader = PdfReader(io.BytesIO(data))
+        return "".join((page.extract_text() or "") + "\n" for page in reader.pages)
+
+    document = fitz.open(stream=data, filetype="pdf")
+    plumber = None
+    try:
+        pages = []
+        for page in document:
+            key = page_key(document, page)
+            blocks = page_cache.get(key)
+            if blocks is None:
+                tables = []
+                # pdfplumber's table finder costs tens of milliseconds a page; only ruled pages can have its tables
+                if pdfplumber is not None and has_ruling_lines(page):
+                    if plumber is None:
+                        plumber = pdfplumber.open(io.BytesIO(data))
+                    tables = page_tables(plumber.pages[page.number])
+                blocks = layout_blocks(page, tables)
+                page_cache.set(key, blocks)
+                pdf_pages_extracted_total.inc(source="parsed")
+            else:
+                pdf_pages_extracted_total.inc(source="cache")
+            pages.append(blocks)
+    finally:
+        if plumber is not None:
+            plumber.close()
+        document.close()
+
+    repeated = repeated_margin_text(pages)
+    return "\n\n".join(
+        "\n\n".join(
+            block.text for block in blocks
+            if not (block.margin and (block.margin, normalize_margin_text(block.text)) in repeated)
+        )
+        for blocks in pages
+    )
+
+
+def page_key(document, page) -> str:
+    """Hash of what a page draws: its size, content stream, form and image streams, and fonts"""
+    digest = hashlib.sha256()
+    digest.update(f"{tuple(page.rect)}:{page.rotation}".encode())
+    digest.update(page.read_contents())
+    for xref, *_ in page.get_xobjects():
+        digest.update(document.xref_stream(xref) or b"")
+    for font in page.get_fonts():
+        digest.update(f"{font[3]}:{font[5]}".encode())
+    return digest.hexdigest()
+
+
+def has_ruling_lines(page) -> bool:
+    """Whether a PyMuPDF page draws at least two horizontal and two vertical rules, the least a ruled table needs"""
+    horizontal = vertical = 0
+    for path in page.get_drawings():
+        for item in path["items"]:
+            if item[0] == "re":
+                horizontal += 2
+                vertical += 2
+            elif item[0] == "l":
+                start, end = item[1], item[2]
+                if abs(start.y - end.y) < 1:
+                    horizontal += 1
+                elif abs(start.x - end.x) < 1:
+                    vertical += 1
+        if horizontal >= 2 and vertical >= 2:
+            return True
+    return False
+
+
+def page_tables(page) -> List[LayoutElement]:
+    """Ruled tables on a pdfplumber page, each rendered as pipe-separated rows"""
+    tables = []
+    for table in page.find_tables():
+        rows = [
+            "| " + " | ".join(" ".join((cell or "").split()) for cell in row) + " |"
+            for row in table.extract()
+            if any(cell for cell in row)
+        ]
+        if rows:
+            tables.append(LayoutElement(*table.bbox, "\n".join(rows)))
+    return tables
+
+
+def layout_blocks(page, tables: List[LayoutElement]) -> Tuple[PageBlock, ...]:
+    """A PyMuPDF page's text blocks and the given tables, in reading order"""
+    elements = list(tables)
+    for x0, y0, x1, y1, text, _, block_type in page.get_text("blocks"):
+        if block_type != 0:
+            continue
+        # Table text is already in the table element
+        center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+        if any(t.x0 <= center_x <= t.x1 and t.y0 <= center_y <= t.y1 for t in tables):
+            continue
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        if lines:
+            elements.append(LayoutElement(x0, y0, x1, y1, "\n".join(lines)))
+
+    height = page.rect.height
+    return tuple(
+        PageBlock(element.text, _margin(element, height) if element not in tables else "")
+        for element in reading_order(elements)
+    )
+
+
+def reading_order(elements: List[LayoutElement]) -> List[LayoutElement]:
+    """Order elements top to bottom in bands split by spanning elements, each band column by column.
+
+    Columns are the groups of elements whose horizontal extents overlap, so a two-column
+    page reads down the left column before the right one instead of interleaving lines.
+    """
+    if not elements:
+        return []
+    left = min(element.x0 for element in elements)
+    right = max(element.x1 for element in elements)
+    spanning_width = (right - left) * SPANNING_FRACTION
+
+    ordered: List[LayoutElement] = []
+    band: List[LayoutElement] = []
+    for element in sorted(elements, key=lambda e: (e.y0, e.x0)):
+        if element.x1 - element.x0 >= spanning_width:
+            ordered.extend(_columns_in_order(band))
+            band = []
+            ordered.append(element)
+        else:
+            band.append(element)
+    ordered.extend(_columns_in_order(band))
+    return ordered
+
+
+def _columns_in_order(band: List[LayoutElement]) -> List[LayoutElement]:
+    columns: List[List[LayoutElement]] = []
+    column_right = None
+    for element in sorted(band, key=lambda e: e.x0):
+        if column_right is None or element.x0 >= column_right:
+            columns.append([])
+            column_right = element.x1
+        columns[-1].append(element)
+        column_right = max(column_right, element.x1)
+    return [element for column in columns for element in sorted(column, key=lambda e: (e.y0, e.x0))]
+
+
+def _margin(element: LayoutElement, height: float) -> str:
+    if element.y1 <= height * MARGIN_FRACTION:
+        return "header"
+    if element.y0 >= height * (1 - MARGIN_FRACTION):
+        return "footer"
+    return ""
+
+
+def normalize_margin_text(text: str) -> str:
+    """Page numbers and dates differ from page to page, so digits are ignored when matching"""
+    return " ".join(DIGITS.sub("#", text.lower()).split())
+
+
+def repeated_margin_text(pages: List[Tuple[PageBlock, ...]]) -> Set[Tuple[str, str]]:
+    """(margin, normalized text) of header and footer blocks repeated across pages"""
+    if len(pages) < 2:
+        return set()
+    counts: Dict[Tuple[str, str], int] = defaultdict(int)
+    for blocks in pages:
+        for key in {(block.margin, normalize_margin_text(block.text)) for block in blocks if block.margin}:
+            counts[key] += 1
+    threshold = max(2, len(pages) * REPEATED_FRACTION)
+    return {key for key, count in counts.items() if count >= threshold}
@@ -0,0 +1,146 @@
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import DailyLog, Document, Project
+
+# Columns each read endpoint returns; rows are serialized straight from these tuples
+PROJECT_SUMMARY_COLUMNS = (
+    Project.id,
+    Project.project_name,
+    Project.project_summary,
+    Project.complexity_level,
+    Project.total_duration_weeks,
+    Project.created_at,
+)
+
+PROJECT_DETAIL_COLUMNS = (
+    Project.id,
+    Project.project_name,
+    Project.project_summary,
+    Project.scope_and_deliverables,
+    Project.developer_tasks,
+    Project.technology_stack,
+    Project.complexity_level,
+    Project.base_hours_required,
+    Project.total_hours_estimated,
+    Project.total_duration_weeks,
+    Project.total_duration_days,
+    Project.development_phase,
+    Project.testing_phase,
+    Project.deployment_phase,
+    Project.buffer_included,
+    Project.created_at,
+)
+
+DOCUMENT_METADATA_COLUMNS = (
+    Document.id,
+    Document.filename,
+    Document.file_type,
+    Document.file_size,
+    Document.created_at,
+)
+
+
+PROJECT_SCHEDULE_COLUMNS = (
+    Project.id,
+    Project.developer_tasks,
+    Project.daily_hours,
+    Project.working_days_per_week,
+    Project.holiday_set,
+    Project.start_date,
+    Project.created_at,
+    Project.day_plan,
+)
+
+DAILY_LOG_COLUMNS = (
+    DailyLog.target_date,
+    DailyLog.planned_hours,
+    DailyLog.tasks,
+    DailyLog.version,
+)
+
+
+class ProjectQueries:
+    """Read queries for project endpoints, selecting only the columns each response needs"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_project_summaries(self, user_id: int) -> List[Dict[str, Any]]:
+        rows = self.db.query(*PROJECT_SUMMARY_COLUMNS).filter(Project.user_id == user_id).all()
+        keys = [column.key for column in PROJECT_SUMMARY_COLUMNS]
+        return [dict(zip(keys, row)) for row in rows]
+
+    def get_project_detail(self, project_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """Project with its document metadata in one query, without the document text"""
+        row = (
+            self.db.query(*PROJECT_DETAIL_COLUMNS, *DOCUMENT_METADATA_COLUMNS)
+            .join(Document, Project.document_id == Document.id)
+            .filter(Project.id == project_id, Project.user_id == user_id)
+            .first()
+        )
+        if row is None:
+            return None
+
+        split = len(PROJECT_DETAIL_COLUMNS)
+        detail = dict(zip((column.key for column in PROJECT_DETAIL_COLUMNS), row[:split]))
+        detail["document"] = dict(zip((column.key for column in DOCUMENT_METADATA_COLUMNS), row[split:]))
+        return detail
+
+    def get_daily_log(self, project_id: int, user_id: int, day_number: int) -> Optional[Dict[str, Any]]:
+        row = (
+            self.db.query(*DAILY_LOG_COLUMNS)
+            .filter(DailyLog.project_id == project_id, DailyLog.user_id == user_id, DailyLog.day_number == day_number)
+            .first()
+        )
+        if row is None:
+            return None
+        return {"date": row.target_date, "planned_hours": row.planned_hours, "tasks": row.tasks, "version": row.version}
+
+    def get_project_schedule(self, project_id: int, user_id: int):
+        return (
+            self.db.query(*PROJECT_SCHEDULE_COLUMNS)
+            .filter(Project.id == project_id, Project.user_id == user_id)
+            .first()
+        )
+
+    def daily_log_progress(self, project_id: int, user_id: int) -> Dict[int, Tuple[int, int]]:
+        """(done, total) task counts for every generated day of a project"""
+        rows = (
+            self.db.query(DailyLog.day_number, DailyLog.tasks)
+            .filter(DailyLog.project_id == project_id, DailyLog.user_id == user_id)
+            .all()
+        )
+        return {
+            row.day_number: (sum(1 for task in row.tasks if task.get("task_done")), len(row.tasks))
+            for row in rows
+        }
+
+    # Version queries back the ETags: each returns a small tuple that changes whenever the
+    # resource does, or None when it does not exist
+
+    def project_summaries_version(self, user_id: int) -> Tuple:
+        return tuple(
+            self.db.query(
+                func.count(Project.id),
+                func.max(Project.id),
+                func.sum(Project.version)
+            ).filter(Project.user_id == user_id).one()
+        )
+
+    def project_version(self, project_id: int, user_id: int) -> Optional[Tuple]:
+        row = (
+            self.db.query(Project.id, Project.version)
+            .filter(Project.id == project_id, Project.user_id == user_id)
+            .first()
+        )
+        return tuple(row) if row else None
+
+    def daily_log_version(self, project_id: int, user_id: int, day_number: int) -> Optional[Tuple]:
+        row = (
+            self.db.query(DailyLog.id, DailyLog.version, func.coalesce(DailyLog.updated_at, DailyLog.created_at))
+            .filter(DailyLog.project_id == project_id, DailyLog.user_id == user_id, DailyLog.day_number == day_number)
+            .first()
+        )
+        return tuple(row) if row else None
@@ -0,0 +1,174 @@
+from collections import OrderedDict
+from functools import lru_cache
+from string import Template
+from threading import Lock
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+import json
+
+from app.service.task_parsing import schedule_tasks, strip_task_prefix, tasks_for_day
+
+DIGEST_CACHE_SIZE = 256
+SUMMARY_CHARS = 400
+CHARS_PER_TOKEN = 4
+
+DAILY_TASK_SYSTEM_TEMPLATE = Template("""You are an expert Task Planning Assistant specialized in breaking down software development projects into daily actionable tasks.
+
+CORE CAPABILITIES:
+1. Daily Task Breakdown from Project Analysis
+2. Realistic Daily Hour Allocation
+3. Task Sequencing and Dependencies
+4. Progress-based Task Planning
+
+DAILY TASK RULES:
+- Generate tasks for exactly $daily_hours hours per day
+- Tasks should be specific and actionable
+- Work on the TASKS IN SCOPE first, in order, continuing where the previous day stopped
+- Each task should have realistic hour estimates
+- Total daily hours must equal $daily_hours
+- Consider development best practices and workflow
+
+RESPONSE FORMAT REQUIREMENTS:
+Return a valid JSON object with the following structure:
+{"day": "Day N", "date": "YYYY-MM-DD", "planned_hours": $daily_hours, "tasks": [{"task": "Specific task description", "estimated_hours": X}]}
+""")
+
+DAILY_TASK_USER_TEMPLATE = Template("""DAILY TASK REQUEST for Day $day_number
+TARGET DATE: $target_date
+DAILY HOURS: $daily_hours
+
+PROJECT DIGEST:
+$digest
+
+TASKS IN SCOPE FOR DAY $day_number (hours_done = hours of the task planned before today):
+$tasks
+
+Generate the Day $day_number breakdown as JSON with "day": "Day $day_number", "date": "$target_date", and task hours summing to $daily_hours.
+""")
+
+REFERENCE_PROJECT_TEMPLATE = Template("""REFERENCE PROJECT (earlier analysis of a similar document, similarity $similarity):
+$digest
+REFERENCE DEVELOPER TASKS: $tasks
+Use the reference to calibrate estimates and the task breakdown. Analyze THIS document and change whatever differs.
+""")
+REFERENCE_TASK_LIMIT = 15
+
+NO_TASKS_IN_SCOPE = "[] (all developer tasks are scheduled before this day: plan testing, fixes, documentation and deployment work)"
+
+
+class PromptStats(NamedTuple):
+    context_chars_before: int
+    context_chars_after: int
+    estimated_tokens_saved: int
+    reduction_pct: float
+
+
+class PromptBuilder:
+    """Builds compact LLM prompts from precompiled templates"""
+
+    def __init__(self):
+        self._digests: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = Lock()
+
+    def project_digest(self, project_analysis: Dict[str, Any], cache_key: Optional[Hashable] = None) -> str:
+        """Compact JSON summary of a project, cached per cache_key (e.g. project id + updated_at)"""
+        if cache_key is not None:
+            with self._lock:
+                digest = self._digests.get(cache_key)
+                if digest is not None:
+                    self._digests.move_to_end(cache_key)
+                    return digest
+
+        estimate = project_analysis.get("time_estimation") or {}
+        summary = project_analysis.get("project_summary") or ""
+        digest = compact_json({
+            "name": project_analysis.get("project_name"),
+            "summary": summary[:SUMMARY_CHARS],
+            "complexity": project_analysis.get("complexity_level"),
+            "stack": project_analysis.get("technology_stack") or [],
+            "estimate": {
+                key: value for key, value in {
+                    "total_hours": estimate.get("total_hours_estimated"),
+                    "duration_days": estimate.get("total_duration_days"),
+                    "development": estimate.get("development_phase"),
+                    "testing": estimate.get("testing_phase"),
+                    "deployment": estimate.get("deployment_phase"),
+                }.items() if value
+            },
+            "task_count": len(project_analysis.get("developer_tasks") or []),
+        })
+
+        if cache_key is not None:
+            with self._lock:
+                self._digests[cache_key] = digest
+                while len(self._digests) > DIGEST_CACHE_SIZE:
+                    self._digests.popitem(last=False)
+        return digest
+
+    def daily_task_prompts(
+        self,
+        project_analysis: Dict[str, Any],
+        target_date: str,
+        day_number: int,
+        daily_hours: int,
+        cache_key: Optional[Hashable] = None
+    ) -> Tuple[str, str, PromptStats]:
+        """Return the system prompt, the user prompt and the context size reduction for day N"""
+        digest = self.project_digest(project_analysis, cache_key)
+
+        schedule = schedule_tasks(project_analysis.get("developer_tasks") or [], default_hours=daily_hours)
+        day_start = (day_number - 1) * daily_hours
+        in_scope = [
+            {
+                "task": strip_task_prefix(task.task),
+                "hours": task.hours,
+                "hours_done": round(max(0.0, day_start - task.start_hour), 2),
+            }
+            for task in tasks_for_day(schedule, day_number, daily_hours)
+        ]
+        tasks = compact_json(in_scope) if in_scope else NO_TASKS_IN_SCOPE
+
+        system_prompt = daily_task_system_prompt(daily_hours)
+        user_prompt = DAILY_TASK_USER_TEMPLATE.substitute(
+            day_number=day_number,
+            target_date=target_date,
+            daily_hours=daily_hours,
+            digest=digest,
+            tasks=tasks
+        )
+
+        # Previously the whole project_analysis dict was inlined with repr()
+        before = len(str(project_analysis))
+        after = len(digest) + len(tasks)
+        stats = PromptStats(
+            context_chars_before=before,
+            context_chars_after=after,
+            estimated_tokens_saved=max(0, before - after) // CHARS_PER_TOKEN,
+            reduction_pct=round(100 * (1 - after / before), 1) if before else 0.0
+        )
+        return system_prompt, user_prompt, stats
+
+    def reference_project_hint(
+        self,
+        project_analysis: Dict[str, Any],
+        similarity: float,
+        cache_key: Optional[Hashable] = None
+    ) -> str:
+        """Compact few-shot hint from an earlier analysis of a similar document"""
+        tasks = [strip_task_prefix(task) for task in (project_analysis.get("developer_tasks") or [])[:REFERENCE_TASK_LIMIT]]
+        return REFERENCE_PROJECT_TEMPLATE.substitute(
+            similarity=f"{similarity:.2f}",
+            digest=self.project_digest(project_analysis, cache_key),
+            tasks=compact_json(tasks)
+        )
+
+
+@lru_cache(maxsize=32)
+def daily_task_system_prompt(daily_hours: int) -> str:
+    return DAILY_TASK_SYSTEM_TEMPLATE.substitute(daily_hours=daily_hours)
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+prompt_builder = PromptBuilder()
@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from typing import Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Document, DocumentChunk, Project
+from app.schemas import ProjectSearchResult, SearchHit
+from app.service.document_service import get_embedding_model
+from app.service.vector_index import user_indexes
+from app.telemetry import span
+
+CHUNKS_PER_PROJECT = 3
+# Chunk hits fetched per requested project, so grouping still fills top_k projects
+HITS_PER_PROJECT = 5
+
+
+class SearchService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search(self, user_id: int, query: str, top_k: int = 5) -> List[ProjectSearchResult]:
+        """Semantic search over all of a user's documents, grouped by project"""
+        index = user_indexes.get_or_build(self.db, user_id)
+        with span("vector_search", chunks=len(index)):
+            query_vector = get_embedding_model().encode([query])[0]
+            hits = index.search(query_vector, top_k * HITS_PER_PROJECT)
+        if not hits:
+            return []
+
+        chunk_rows = self.db.execute(
+            select(DocumentChunk.id, DocumentChunk.chunk_index, DocumentChunk.chunk_text)
+            .where(DocumentChunk.id.in_([chunk_id for chunk_id, _, _ in hits]))
+        ).all()
+        chunks = {row.id: row for row in chunk_rows}
+
+        owner_rows = self.db.execute(
+            select(Document.id, Document.filename, Project.id.label("project_id"), Project.project_name)
+            .outerjoin(Project, Project.document_id == Document.id)
+            .where(Document.id.in_({document_id for _, document_id, _ in hits}), Document.user_id == user_id)
+            .order_by(Project.id)
+        ).all()
+        owners: Dict[int, list] = {}
+        for row in owner_rows:
+            owners.setdefault(row.id, []).append(row)
+
+        groups: "OrderedDict[tuple, ProjectSearchResult]" = OrderedDict()
+        for chunk_id, document_id, score in hits:
+            chunk = chunks.get(chunk_id)
+            if chunk is None:
+                continue
+            for owner in owners.get(document_id, []):
+                # Documents without a project (e.g. tech-stack only uploads) form their own group
+                key = ("project", owner.project_id) if owner.project_id is not None else ("document", document_id)
+                group = groups.get(key)
+                if group is None:
+                    if len(groups) >= top_k:
+                        continue
+                    group = groups[key] = ProjectSearchResult(
+                        project_id=owner.project_id,
+                        project_name=owner.project_name,
+                        document_id=document_id,
+                        filename=owner.filename,
+                        score=round(score, 4),
+                        chunks=[]
+                    )
+                if len(group.chunks) < CHUNKS_PER_PROJECT:
+                    group.chunks.append(SearchHit(
+                        chunk_id=chunk_id,
+                        chunk_index=chunk.chunk_index,
+                        score=round(score, 4),
+                        text=chunk.chunk_text
+                    ))
+
+        return list(groups.values())
@@ -0,0 +1,141 @@
+from math import ceil
+from typing import Any, Dict, List, NamedTuple
+import os
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Document, Project
+from app.schemas import ProjectAnalysis, ProjectRequest
+from app.service.task_parsing import parse_task_hours
+from app.service.vector_index import document_indexes
+from app.telemetry import span
+
+# Above REUSE the earlier analysis is adapted locally and the LLM is skipped; above HINT it
+# is passed to the LLM as a reference. Cosine similarity of mean chunk embeddings.
+SIMILAR_PROJECT_REUSE_THRESHOLD = float(os.getenv("SIMILAR_PROJECT_REUSE_THRESHOLD", "0.97"))
+SIMILAR_PROJECT_HINT_THRESHOLD = float(os.getenv("SIMILAR_PROJECT_HINT_THRESHOLD", "0.85"))
+SIMILAR_DOCUMENT_CANDIDATES = 10
+FAILED_ANALYSIS_COMPLEXITY = "Unknown"
+
+SIMILAR_PROJECT_COLUMNS = (
+    Project.id,
+    Project.document_id,
+    Project.project_name,
+    Project.project_summary,
+    Project.scope_and_deliverables,
+    Project.developer_tasks,
+    Project.technology_stack,
+    Project.complexity_level,
+    Project.base_hours_required,
+    Project.total_hours_estimated,
+    Project.total_duration_weeks,
+    Project.total_duration_days,
+    Project.development_phase,
+    Project.testing_phase,
+    Project.deployment_phase,
+    Project.buffer_included,
+)
+
+TIME_ESTIMATION_FIELDS = (
+    "base_hours_required",
+    "total_hours_estimated",
+    "total_duration_weeks",
+    "total_duration_days",
+    "development_phase",
+    "testing_phase",
+    "deployment_phase",
+    "buffer_included",
+)
+
+
+class SimilarProject(NamedTuple):
+    project_id: int
+    document_id: int
+    similarity: float
+    analysis: ProjectAnalysis
+
+
+class SimilarProjects:
+    """Finds a user's earlier projects whose documents are close to a new upload"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def nearest(self, document: Document, user_id: int, limit: int = 1) -> List[SimilarProject]:
+        """Most similar earlier projects, best first, skipping the document itself"""
+        if document.embedding is None:
+            return []
+
+        with span("similar_projects"):
+            index = document_indexes.get_or_build(self.db, user_id)
+            hits = [
+                (document_id, score)
+                for _, document_id, score in index.search(np.asarray(document.embedding), SIMILAR_DOCUMENT_CANDIDATES + 1)
+                if document_id != document.id and score >= SIMILAR_PROJECT_HINT_THRESHOLD
+            ]
+            if not hits:
+                return []
+
+            # Latest project per document; documents uploaded only for tech extraction have none
+            rows = self.db.execute(
+                select(*SIMILAR_PROJECT_COLUMNS)
+                .where(Project.user_id == user_id, Project.document_id.in_([document_id for document_id, _ in hits]))
+                .order_by(Project.id.desc())
+            ).all()
+            projects: Dict[int, Any] = {}
+            for row in rows:
+                projects.setdefault(row.document_id, row)
+
+        similar = []
+        for document_id, score in hits:
+            row = projects.get(document_id)
+            # Analyses that failed to parse are stored with an "Unknown" complexity; never build on them
+            if row is None or row.complexity_level == FAILED_ANALYSIS_COMPLEXITY:
+                continue
+            similar.append(SimilarProject(row.id, document_id, round(score, 4), project_analysis(row)))
+            if len(similar) >= limit:
+                break
+        return similar
+
+
+def can_reuse(similar: SimilarProject, project_request: ProjectRequest) -> bool:
+    """Reuse only near-duplicates whose stack already covers any technologies the user asked for"""
+    if similar.similarity < SIMILAR_PROJECT_REUSE_THRESHOLD:
+        return False
+    if project_request.technologies:
+        stack = {technology.lower() for technology in similar.analysis.technology_stack}
+        return all(technology.lower() in stack for technology in project_request.technologies)
+    return True
+
+
+def adapt_analysis(analysis: ProjectAnalysis, project_request: ProjectRequest) -> ProjectAnalysis:
+    """Copy an earlier analysis, renamed and with its durations recomputed for the requested schedule"""
+    time_estimation = dict(analysis.time_estimation)
+    total_hours = parse_task_hours(time_estimation.get("total_hours_estimated") or "")
+    if total_hours and project_request.daily_hours > 0 and project_request.working_days_per_week > 0:
+        days = ceil(total_hours / project_request.daily_hours)
+        weeks = round(days / project_request.working_days_per_week, 1)
+        time_estimation["total_duration_days"] = f"{days} working days"
+        time_estimation["total_duration_weeks"] = (
+            f"{weeks:g} weeks (based on {project_request.daily_hours}h/day, {project_request.working_days_per_week}d/wk)"
+        )
+
+    return analysis.model_copy(update={
+        "project_name": project_request.project_name or analysis.project_name,
+        "time_estimation": time_estimation,
+    })
+
+
+def project_analysis(row) -> ProjectAnalysis:
+    """ProjectAnalysis from a Project, or a row selecting the same columns"""
+    return ProjectAnalysis(
+        project_name=row.project_name,
+        project_summary=row.project_summary,
+        scope_and_deliverables=row.scope_and_deliverables,
+        time_estimation={field: getattr(row, field) for field in TIME_ESTIMATION_FIELDS if getattr(row, field)},
+        developer_tasks=row.developer_tasks or [],
+        technology_stack=row.technology_stack or [],
+        complexity_level=row.complexity_level
+    )
@@ -0,0 +1,51 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.telemetry import coalesced_requests_total
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Shares one in-flight call among concurrent callers with the same key, within this process"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Result of fn(), and whether it was shared with an earlier identical call"""
+        task = self._flights.get(key)
+        shared = task is not None
+        if shared:
+            coalesced_requests_total.inc(flight=self.name, source="in_process")
+        else:
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        # A caller that disconnects must not cancel the call for everyone else waiting on it
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            # Marks the exception as retrieved when every waiter has gone away
+            task.exception()
+
+
+def advisory_xact_lock(db: Session, key: str) -> bool:
+    """Block until this transaction holds a Postgres advisory lock on key, shared by every worker.
+
+    The lock is released on commit or rollback. Other databases have no advisory locks,
+    so this returns False and callers rely on the in-process single flight alone.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    # Keys are hashed to the lock's bigint; a collision only serializes two unrelated calls
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtextextended(:key, 0))"), {"key": key})
+    return True
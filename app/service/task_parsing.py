@@ -0,0 +1,56 @@
+import re
+from typing import List, NamedTuple, Optional
+
+# "Task 2: Build API - 20 hours", "(12 hrs)", "8-10 hours", "6h"
+HOURS_PATTERN = re.compile(
+    r"(\d+(?:\.\d+)?)(?:\s*(?:-|–|to)\s*(\d+(?:\.\d+)?))?\s*(?:hours?|hrs?|h)\b",
+    re.IGNORECASE
+)
+TASK_PREFIX_PATTERN = re.compile(r"^\s*task\s*\d+\s*[:.)-]\s*", re.IGNORECASE)
+TASK_NUMBER_PATTERN = re.compile(r"^\s*task\s*(\d+)", re.IGNORECASE)
+
+
+class ScheduledTask(NamedTuple):
+    index: int
+    task: str
+    hours: float
+    start_hour: float
+    end_hour: float
+
+
+def parse_task_hours(task: str) -> Optional[float]:
+    """Return the hour estimate embedded in a developer task, using the upper bound of ranges"""
+    matches = HOURS_PATTERN.findall(task)
+    if not matches:
+        return None
+    low, high = matches[-1]
+    return float(high or low)
+
+
+def strip_task_prefix(task: str) -> str:
+    """Drop the "Task N:" numbering the analysis prompt asks for"""
+    return TASK_PREFIX_PATTERN.sub("", task).strip()
+
+
+def task_number(task: str) -> Optional[int]:
+    """The N of a "Task N:" prefix, if the task has one"""
+    match = TASK_NUMBER_PATTERN.match(task)
+    return int(match.group(1)) if match else None
+
+
+def schedule_tasks(developer_tasks: List[str], default_hours: float) -> List[ScheduledTask]:
+    """Lay developer tasks end to end on a cumulative hour line, in the order given"""
+    scheduled = []
+    cursor = 0.0
+    for index, task in enumerate(developer_tasks):
+        hours = parse_task_hours(task) or default_hours
+        scheduled.append(ScheduledTask(index, task, hours, cursor, cursor + hours))
+        cursor += hours
+    return scheduled
+
+
+def tasks_for_day(schedule: List[ScheduledTask], day_number: int, daily_hours: float) -> List[ScheduledTask]:
+    """Tasks whose hours overlap day N when the schedule is worked daily_hours per day"""
+    day_start = (day_number - 1) * daily_hours
+    day_end = day_number * daily_hours
+    return [task for task in schedule if task.start_hour < day_end and task.end_hour > day_start]
@@ -0,0 +1,256 @@
+import re
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+TECHNOLOGY_CATEGORIES = ["frontend", "backend", "database", "cloud", "mobile", "tools", "other"]
+
+# Canonical technology name -> aliases matched case-insensitively.
+# The canonical name itself is always matched.
+TECHNOLOGY_DICTIONARY: Dict[str, Dict[str, List[str]]] = {
+    "frontend": {
+        "React": ["ReactJS", "React.js"],
+        "Angular": ["AngularJS", "Angular.js"],
+        "Vue.js": ["Vue", "VueJS"],
+        "Svelte": ["SvelteKit"],
+        "Next.js": ["NextJS"],
+        "Nuxt.js": ["Nuxt", "NuxtJS"],
+        "HTML": ["HTML5"],
+        "CSS": ["CSS3"],
+        "Sass": ["SCSS"],
+        "Tailwind CSS": ["Tailwind", "TailwindCSS"],
+        "Bootstrap": [],
+        "Material UI": ["MUI"],
+        "JavaScript": ["ECMAScript", "Vanilla JS"],
+        "TypeScript": [],
+        "jQuery": [],
+        "Redux": [],
+        "Webpack": [],
+        "Vite": [],
+        "D3.js": ["D3"],
+        "Three.js": [],
+        "Streamlit": [],
+    },
+    "backend": {
+        "Node.js": ["NodeJS"],
+        "Express.js": ["ExpressJS"],
+        "NestJS": ["Nest.js"],
+        "Python": [],
+        "Django": [],
+        "Flask": [],
+        "FastAPI": [],
+        "Java": [],
+        "Spring Boot": ["SpringBoot"],
+        "Kotlin": [],
+        "C#": [],
+        ".NET": ["ASP.NET", "dotnet", ".NET Core"],
+        "PHP": [],
+        "Laravel": [],
+        "Symfony": [],
+        "Ruby": [],
+        "Ruby on Rails": ["Rails", "RoR"],
+        "Golang": [],
+        "Rust": [],
+        "Scala": [],
+        "Elixir": ["Phoenix"],
+        "C++": [],
+        "GraphQL": ["Apollo"],
+        "REST API": ["RESTful", "REST APIs"],
+        "gRPC": [],
+        "WebSockets": ["WebSocket", "Socket.IO"],
+    },
+    "database": {
+        "PostgreSQL": ["Postgres", "pgvector"],
+        "MySQL": [],
+        "MariaDB": [],
+        "SQLite": [],
+        "Microsoft SQL Server": ["SQL Server", "MSSQL"],
+        "Oracle Database": ["Oracle DB", "Oracle"],
+        "SAP HANA": ["HANA"],
+        "MongoDB": ["Mongo"],
+        "Redis": [],
+        "Cassandra": [],
+        "DynamoDB": [],
+        "Firestore": [],
+        "Couchbase": [],
+        "CouchDB": [],
+        "Neo4j": [],
+        "Elasticsearch": ["Elastic Search", "OpenSearch"],
+        "Snowflake": [],
+        "BigQuery": [],
+        "Amazon Redshift": ["Redshift"],
+        "Supabase": [],
+        "Pinecone": [],
+        "Weaviate": [],
+        "ClickHouse": [],
+        "InfluxDB": [],
+    },
+    "cloud": {
+        "AWS": ["Amazon Web Services"],
+        "AWS Lambda": ["Lambda functions"],
+        "Amazon S3": ["S3"],
+        "Amazon EC2": ["EC2"],
+        "Google Cloud": ["GCP", "Google Cloud Platform"],
+        "Microsoft Azure": ["Azure"],
+        "Firebase": [],
+        "Heroku": [],
+        "Vercel": [],
+        "Netlify": [],
+        "DigitalOcean": ["Digital Ocean"],
+        "Cloudflare": [],
+        "Kubernetes": ["K8s", "EKS", "GKE", "AKS"],
+        "OpenShift": [],
+    },
+    "mobile": {
+        "React Native": [],
+        "Flutter": [],
+        "Dart": [],
+        "Swift": ["SwiftUI"],
+        "Objective-C": [],
+        "Android": ["Android SDK"],
+        "iOS": [],
+        "Ionic": [],
+        "Xamarin": [],
+        "Kotlin Multiplatform": [],
+        "Expo": [],
+    },
+    "tools": {
+        "Git": [],
+        "GitHub": ["GitHub Actions"],
+        "GitLab": ["GitLab CI"],
+        "Bitbucket": [],
+        "Docker": ["Docker Compose", "Dockerfile"],
+        "Terraform": [],
+        "Ansible": [],
+        "Jenkins": [],
+        "CircleCI": [],
+        "Jira": [],
+        "Postman": [],
+        "Swagger": ["OpenAPI"],
+        "Figma": [],
+        "Nginx": [],
+        "Apache HTTP Server": ["Apache2", "httpd"],
+        "Prometheus": [],
+        "Grafana": [],
+        "Sentry": [],
+        "Jest": [],
+        "Cypress": [],
+        "Selenium": [],
+        "Playwright": [],
+        "pytest": [],
+    },
+    "other": {
+        "Apache Kafka": ["Kafka"],
+        "RabbitMQ": [],
+        "Apache Spark": ["Spark", "PySpark"],
+        "Apache Airflow": ["Airflow"],
+        "Hadoop": [],
+        "Celery": [],
+        "OpenAI": ["ChatGPT", "GPT-4", "GPT-3.5"],
+        "Mistral AI": ["Mistral"],
+        "LangChain": [],
+        "TensorFlow": [],
+        "PyTorch": [],
+        "scikit-learn": ["sklearn"],
+        "Pandas": [],
+        "NumPy": [],
+        "Hugging Face": ["HuggingFace", "Transformers"],
+        "Stripe": [],
+        "PayPal": [],
+        "Twilio": [],
+        "SendGrid": [],
+        "Auth0": [],
+        "OAuth 2.0": ["OAuth", "OAuth2"],
+        "JWT": ["JSON Web Token", "JSON Web Tokens"],
+        "Keycloak": [],
+        "Salesforce": [],
+        "SAP": ["SAP ERP", "S/4HANA"],
+        "Shopify": [],
+        "WordPress": [],
+        "Power BI": ["PowerBI"],
+        "Tableau": [],
+        "Blockchain": ["Ethereum", "Solidity"],
+        "MQTT": [],
+    },
+}
+
+# Names that are also everyday words: only matched with this exact capitalization
+CASE_SENSITIVE_ALIASES = frozenset({
+    "Swift", "Dart", "Rust", "Ruby", "Rails", "Spark", "Airflow", "Phoenix", "Expo",
+    "Ionic", "Jest", "Sentry", "Celery", "Pandas", "Stripe", "Transformers", "Oracle",
+    "Bootstrap", "Flask", "Snowflake", "Pinecone", "Apollo", "Prometheus", "React", "Playwright",
+    "Flutter",
+})
+
+_BOUNDARY_BEFORE = r"(?<![\w+#.-])"
+_BOUNDARY_AFTER = r"(?![\w+#]|\.\w)"
+
+
+class TechnologyDetection(NamedTuple):
+    detected: List[str]
+    categories: Dict[str, List[str]]
+
+
+def _trie_regex(aliases: Iterable[str]) -> str:
+    """Build a regex trie from aliases, so matching shares common prefixes instead of
+    trying every alternative at every position"""
+    trie: Dict[str, dict] = {}
+    for alias in set(aliases):
+        node = trie
+        for char in alias:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: Dict[str, dict]) -> str:
+        end = "" in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Regex alternation is leftmost-first, so the optional suffix keeps the longest alias
+        return f"(?:{body})?" if end else body
+
+    return render(trie)
+
+
+def _build_lookup() -> Dict[str, Tuple[str, str]]:
+    lookup = {}
+    for category, technologies in TECHNOLOGY_DICTIONARY.items():
+        for name, aliases in technologies.items():
+            for alias in [name, *aliases]:
+                lookup[alias.lower()] = (name, category)
+    return lookup
+
+
+def _compile_pattern() -> re.Pattern:
+    """Compile the whole dictionary into one regex so a document is scanned in a single pass"""
+    case_sensitive = {alias.lower() for alias in CASE_SENSITIVE_ALIASES}
+    insensitive = _trie_regex(alias for alias in _LOOKUP if alias not in case_sensitive)
+    sensitive = _trie_regex(CASE_SENSITIVE_ALIASES)
+    return re.compile(f"{_BOUNDARY_BEFORE}(?:(?i:{insensitive})|{sensitive}){_BOUNDARY_AFTER}")
+
+
+_LOOKUP = _build_lookup()
+_PATTERN = _compile_pattern()
+
+
+def categorize(technologies: Iterable[str]) -> Dict[str, List[str]]:
+    """Bucket technology names into the technology categories, using "other" for unknown names"""
+    categories: Dict[str, List[str]] = {category: [] for category in TECHNOLOGY_CATEGORIES}
+    for technology in technologies:
+        name, category = _LOOKUP.get(technology.lower(), (technology, "other"))
+        if name not in categories[category]:
+            categories[category].append(name)
+    return categories
+
+
+def detect_technologies(text: str) -> TechnologyDetection:
+    """Scan text once for known technologies, in order of first mention"""
+    detected: List[str] = []
+    categories: Dict[str, List[str]] = {category: [] for category in TECHNOLOGY_CATEGORIES}
+
+    for match in _PATTERN.finditer(text):
+        name, category = _LOOKUP[match.group(0).lower()]
+        if name not in categories[category]:
+            detected.append(name)
+            categories[category].append(name)
+
+    return TechnologyDetection(detected=detected, categories=categories)
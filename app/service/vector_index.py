@@ -0,0 +1,217 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import os
+import secrets
+
+import numpy as np
+from sqlalchemy import Select, exists, select
+from sqlalchemy.orm import Session, aliased
+
+from app.models import Document, DocumentChunk
+from app.shared_cache import shared_cache
+from app.telemetry import span
+
+USER_INDEX_CACHE_SIZE = int(os.getenv("USER_INDEX_CACHE_SIZE", "16"))
+INDEX_BUILD_BATCH_SIZE = 2000
+INDEX_GENERATION_TTL_SECONDS = 7 * 24 * 3600
+
+
+class UserVectorIndex:
+    """Normalized embeddings (chunks, or whole documents) across one user's documents, appended to as documents arrive"""
+
+    def __init__(self):
+        self.chunk_ids = np.empty(0, dtype=np.int64)
+        self.document_ids = np.empty(0, dtype=np.int64)
+        self.matrix: Optional[np.ndarray] = None
+        self.documents = set()
+        self.generation: Optional[bytes] = None  # The user's shared generation when the index was built
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.chunk_ids) + sum(len(ids) for ids, _, _ in self._pending)
+
+    def add(self, chunk_ids: Sequence[int], document_ids: Sequence[int], embeddings) -> int:
+        """Queue embeddings for the next search; rows of documents already indexed are skipped"""
+        document_ids = np.asarray(document_ids, dtype=np.int64)
+        with self._lock:
+            keep = np.array([document_id not in self.documents for document_id in document_ids], dtype=bool)
+            if not keep.any():
+                return 0
+            vectors = np.asarray(embeddings, dtype=np.float32)[keep]
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._pending.append((np.asarray(chunk_ids, dtype=np.int64)[keep], document_ids[keep], vectors / norms))
+            return int(keep.sum())
+
+    def consolidate(self):
+        """Merge queued embeddings into the search matrix"""
+        with self._lock:
+            self._consolidate()
+
+    def remove_document(self, document_id: int):
+        with self._lock:
+            self._consolidate()
+            self.documents.discard(document_id)
+            if self.matrix is None:
+                return
+            keep = self.document_ids != document_id
+            self.chunk_ids = self.chunk_ids[keep]
+            self.document_ids = self.document_ids[keep]
+            self.matrix = self.matrix[keep]
+
+    def search(self, query_vector: np.ndarray, top_k: int) -> List[Tuple[int, int, float]]:
+        """(chunk_id, document_id, cosine similarity) for the top_k chunks"""
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        if not norm:
+            return []
+
+        with self._lock:
+            self._consolidate()
+            matrix, chunk_ids, document_ids = self.matrix, self.chunk_ids, self.document_ids
+        if matrix is None or not len(matrix):
+            return []
+
+        scores = matrix @ (query_vector / norm)
+        top_k = min(top_k, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(chunk_ids[i]), int(document_ids[i]), float(scores[i])) for i in top]
+
+    def _consolidate(self):
+        if not self._pending:
+            return
+        blocks = ([(self.chunk_ids, self.document_ids, self.matrix)] if self.matrix is not None else []) + self._pending
+        self.chunk_ids = np.concatenate([ids for ids, _, _ in blocks])
+        self.document_ids = np.concatenate([ids for _, ids, _ in blocks])
+        self.matrix = np.vstack([vectors for _, _, vectors in blocks])
+        self.documents.update(int(document_id) for document_id in np.unique(self.document_ids))
+        self._pending.clear()
+
+
+class UserIndexRegistry:
+    """LRU of per-user vector indexes, built on first search and updated as documents are chunked.
+
+    With a shared cache, each user has a generation token there that every change replaces,
+    and an index built under an older generation (another worker's change) is rebuilt.
+    """
+
+    def __init__(self, rows_query: Callable[[int], Select], span_name: str, max_users: int = USER_INDEX_CACHE_SIZE, store=shared_cache):
+        self.rows_query = rows_query
+        self.span_name = span_name
+        self.max_users = max_users
+        self.store = store if store.shared else None
+        self._indexes: "OrderedDict[int, UserVectorIndex]" = OrderedDict()
+        self._build_locks: Dict[int, Lock] = {}
+        self._lock = Lock()
+
+    def get(self, user_id: int) -> Optional[UserVectorIndex]:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+        if index is not None and self.store is not None and index.generation != self._generation(user_id):
+            self._drop(user_id)
+            return None
+        return index
+
+    def get_or_build(self, db: Session, user_id: int) -> UserVectorIndex:
+        index = self.get(user_id)
+        if index is not None:
+            return index
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(user_id, Lock())
+        with build_lock:
+            index = self.get(user_id)
+            if index is None:
+                # Read before building, so a change made during the build forces another one
+                generation = self._generation(user_id) if self.store is not None else None
+                with span(self.span_name, user_id=user_id):
+                    index = self._build(db, user_id)
+                index.generation = generation
+                with self._lock:
+                    self._indexes[user_id] = index
+                    while len(self._indexes) > self.max_users:
+                        evicted, _ = self._indexes.popitem(last=False)
+                        self._build_locks.pop(evicted, None)
+        return index
+
+    def add_document(self, user_id: int, document_id: int, chunk_ids: Sequence[int], embeddings):
+        """Append a newly chunked document to the user's index if it is loaded; otherwise it is read at build time"""
+        if self.store is not None:
+            self.invalidate(user_id)
+            return
+        index = self.get(user_id)
+        if index is not None and len(chunk_ids):
+            index.add(chunk_ids, [document_id] * len(chunk_ids), embeddings)
+
+    def remove_document(self, user_id: int, document_id: int):
+        if self.store is not None:
+            self.invalidate(user_id)
+            return
+        index = self.get(user_id)
+        if index is not None:
+            index.remove_document(document_id)
+
+    def invalidate(self, user_id: int):
+        """Drop a user's index so the next search rebuilds it (after bulk changes to their chunks)"""
+        self._drop(user_id)
+        if self.store is not None:
+            # Every worker, this one included, rebuilds from the database: patching the local
+            # index could not tell whether it had also missed another worker's change
+            self.store.set(self._generation_key(user_id), secrets.token_bytes(8), INDEX_GENERATION_TTL_SECONDS)
+
+    def _drop(self, user_id: int):
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+    def _generation_key(self, user_id: int) -> str:
+        return f"{self.span_name}:generation:{user_id}"
+
+    def _generation(self, user_id: int) -> Optional[bytes]:
+        return self.store.get(self._generation_key(user_id))
+
+    def _build(self, db: Session, user_id: int) -> UserVectorIndex:
+        index = UserVectorIndex()
+        result = db.execute(
+            self.rows_query(user_id).execution_options(stream_results=True, yield_per=INDEX_BUILD_BATCH_SIZE)
+        )
+        for partition in result.partitions():
+            index.add(
+                [row[0] for row in partition],
+                [row[1] for row in partition],
+                [row[2] for row in partition]
+            )
+        # Documents are only marked as indexed here, after all of their batches are queued
+        index.consolidate()
+        return index
+
+
+def _is_latest_revision():
+    newer = aliased(Document)
+    return ~exists().where(newer.previous_version_id == Document.id)
+
+
+def chunk_embedding_rows(user_id: int) -> Select:
+    """(chunk id, document id, embedding) for every embedded chunk of a user's documents"""
+    return (
+        select(DocumentChunk.id, DocumentChunk.document_id, DocumentChunk.embedding)
+        .join(Document, DocumentChunk.document_id == Document.id)
+        .where(Document.user_id == user_id, DocumentChunk.embedding.isnot(None), _is_latest_revision())
+    )
+
+
+def document_embedding_rows(user_id: int) -> Select:
+    """(document id, document id, embedding): one entry per document, keyed by the document itself"""
+    return (
+        select(Document.id, Document.id.label("document_id"), Document.embedding)
+        .where(Document.user_id == user_id, Document.embedding.isnot(None), _is_latest_revision())
+    )
+
+
+user_indexes = UserIndexRegistry(chunk_embedding_rows, "build_user_index")
+document_indexes = UserIndexRegistry(document_embedding_rows, "build_document_index")
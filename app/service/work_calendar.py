@@ -0,0 +1,78 @@
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+import json
+import os
+
+import numpy as np
+
+# Named holiday sets, as a JSON object of ISO date lists: {"us": ["2025-01-01", "2025-07-04"]}
+WORK_CALENDAR_HOLIDAYS = os.getenv("WORK_CALENDAR_HOLIDAYS", "{}")
+# Holiday set for projects that do not name one; empty means weekends only
+WORK_CALENDAR_DEFAULT_HOLIDAYS = os.getenv("WORK_CALENDAR_DEFAULT_HOLIDAYS", "")
+
+WEEKDAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+# 1970-01-01, day zero of datetime64[D], was a Thursday
+EPOCH_WEEKDAY = 3
+
+HOLIDAY_SETS: Dict[str, np.ndarray] = {
+    name: np.array(sorted(dates), dtype="datetime64[D]")
+    for name, dates in json.loads(WORK_CALENDAR_HOLIDAYS).items()
+}
+
+
+def weekmask(working_days_per_week: Optional[int]) -> str:
+    """Monday-first mask of working days: 5 is Monday to Friday, 6 adds Saturday"""
+    days = min(max(working_days_per_week or 5, 1), 7)
+    return "1" * days + "0" * (7 - days)
+
+
+@lru_cache(maxsize=64)
+def busday_calendar(mask: str, holiday_set: Optional[str]) -> np.busdaycalendar:
+    """One busdaycalendar per mask and holiday set; building one sorts and dedupes its holidays"""
+    holidays = HOLIDAY_SETS.get(holiday_set or WORK_CALENDAR_DEFAULT_HOLIDAYS, np.array([], dtype="datetime64[D]"))
+    return np.busdaycalendar(weekmask=mask, holidays=holidays)
+
+
+class WorkCalendar:
+    """Maps a project's working day numbers to dates; day 1 is the first working day on or after start"""
+
+    def __init__(self, start: date, working_days_per_week: Optional[int] = 5, holiday_set: Optional[str] = None):
+        self.mask = weekmask(working_days_per_week)
+        self.holiday_set = holiday_set or WORK_CALENDAR_DEFAULT_HOLIDAYS or None
+        self.calendar = busday_calendar(self.mask, self.holiday_set)
+        self.start = np.busday_offset(np.datetime64(start, "D"), 0, roll="forward", busdaycal=self.calendar)
+
+    def dates(self, day_numbers: Sequence[int]) -> np.ndarray:
+        """datetime64[D] dates for many day numbers in one vectorized call"""
+        offsets = np.asarray(day_numbers, dtype=np.int64) - 1
+        return np.busday_offset(self.start, offsets, roll="forward", busdaycal=self.calendar)
+
+    def date_for_day(self, day_number: int) -> date:
+        return self.dates([day_number])[0].item()
+
+    def day_for_date(self, value: date) -> Optional[int]:
+        """Day number of a working date, or None for days off and dates before the start"""
+        day = np.datetime64(value, "D")
+        if day < self.start or not np.is_busday(day, busdaycal=self.calendar):
+            return None
+        return int(np.busday_count(self.start, day, busdaycal=self.calendar)) + 1
+
+    def schedule(self, day_plan: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Day plan entries with their dates and weekdays"""
+        dates = self.dates([entry["day"] for entry in day_plan])
+        weekdays = (dates.astype(np.int64) + EPOCH_WEEKDAY) % 7
+        return [
+            {**entry, "date": day.item(), "weekday": WEEKDAY_NAMES[weekday]}
+            for entry, day, weekday in zip(day_plan, dates, weekdays.tolist())
+        ]
+
+
+def known_holiday_set(name: Optional[str]) -> bool:
+    return not name or name in HOLIDAY_SETS
+
+
+def project_calendar(project) -> WorkCalendar:
+    """Calendar for a Project, or a row with its schedule columns"""
+    start = project.start_date or (project.created_at.date() if project.created_at else date.today())
+    return WorkCalendar(start, project.working_days_per_week, project.holiday_set)
@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Tuple
+import os
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+SHARED_CACHE_STORE = os.getenv("SHARED_CACHE_STORE", "memory")  # "memory" (per worker) or "postgres" (shared)
+SHARED_CACHE_SIZE = int(os.getenv("SHARED_CACHE_SIZE", "4096"))  # Entries per worker for the memory store
+
+POSTGRES_PRUNE_INTERVAL_SECONDS = 300
+
+
+class MemoryCacheStore:
+    """Byte values with expiry in an LRU local to this worker"""
+
+    shared = False
+
+    def __init__(self, max_entries: int = SHARED_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class PostgresCacheStore:
+    """Byte values with expiry in an UNLOGGED table, so every worker and host sees the same entries.
+
+    UNLOGGED skips the write-ahead log: writes are cheap and the table is emptied after a
+    crash, which is fine for a cache.
+    """
+
+    shared = True
+
+    CREATE_STATEMENT = text("""
+        CREATE UNLOGGED TABLE IF NOT EXISTS shared_cache (
+            key text PRIMARY KEY,
+            value bytea NOT NULL,
+            expires_at double precision NOT NULL
+        )
+    """)
+    GET_STATEMENT = text(
+        "SELECT value FROM shared_cache WHERE key = :key AND expires_at > extract(epoch FROM clock_timestamp())"
+    )
+    SET_STATEMENT = text("""
+        INSERT INTO shared_cache (key, value, expires_at)
+        VALUES (:key, :value, extract(epoch FROM clock_timestamp()) + :ttl)
+        ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at
+    """)
+    DELETE_STATEMENT = text("DELETE FROM shared_cache WHERE key = :key")
+    PRUNE_STATEMENT = text("DELETE FROM shared_cache WHERE expires_at < extract(epoch FROM clock_timestamp())")
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._created = False
+        self._pruned_at = time.monotonic()
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with self._begin() as connection:
+                value = connection.execute(self.GET_STATEMENT, {"key": key}).scalar()
+            return bytes(value) if value is not None else None
+        except Exception as e:
+            # Fail open: a miss only costs recomputing the value
+            print(f"⚠️ Shared cache unavailable: {e}")
+            return None
+
+    def set(self, key: str, value: bytes, ttl_seconds: float):
+        try:
+            with self._begin() as connection:
+                connection.execute(self.SET_STATEMENT, {"key": key, "value": value, "ttl": ttl_seconds})
+                self._prune(connection)
+        except Exception as e:
+            print(f"⚠️ Shared cache unavailable: {e}")
+
+    def delete(self, key: str):
+        try:
+            with self._begin() as connection:
+                connection.execute(self.DELETE_STATEMENT, {"key": key})
+        except Exception as e:
+            # Fail open: the write being invalidated is already committed, so the request must not fail
+            print(f"⚠️ Shared cache unavailable, entry not invalidated: {key}: {e}")
+
+    def clear(self):
+        with self._begin() as connection:
+            connection.execute(text("TRUNCATE shared_cache"))
+
+    def _begin(self):
+        if not self._created:
+            with self.engine.begin() as connection:
+                connection.execute(self.CREATE_STATEMENT)
+            self._created = True
+        return self.engine.begin()
+
+    def _prune(self, connection):
+        if time.monotonic() - self._pruned_at < POSTGRES_PRUNE_INTERVAL_SECONDS:
+            return
+        self._pruned_at = time.monotonic()
+        connection.execute(self.PRUNE_STATEMENT)
+
+
+def build_store():
+    if SHARED_CACHE_STORE == "postgres":
+        # Imported here so the memory store (and benchmarks using it) need no DATABASE_URL
+        from app.database import engine
+        return PostgresCacheStore(engine)
+    return MemoryCacheStore()
+
+
+shared_cache = build_store()
@@ -0,0 +1,274 @@
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import os
+import secrets
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SPAN_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "2048"))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+class Counter:
+    """Monotonic counter with label values, rendered in Prometheus text format"""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(tuple(str(labels.get(label, "")) for label in self.labels), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with label values, rendered in Prometheus text format"""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, **labels: Any):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            # One slot per bucket, then +Inf, sum and count
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 3))
+            series[bisect_left(self.buckets, value)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(tuple(str(labels.get(label, "")) for label in self.labels))
+        return int(series[-1]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0.0
+                for bound, hits in zip(self.buckets + (float("inf"),), series):
+                    cumulative += hits
+                    le = "+Inf" if bound == float("inf") else _number(bound)
+                    lines.append(
+                        f"{self.name}_bucket{_label_text(self.labels + ('le',), key + (le,))} {_number(cumulative)}"
+                    )
+                lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_label_text(self.labels, key)} {_number(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, documentation, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _label_text(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request", "Database statements executed per HTTP request", ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS
+)
+pipeline_stage_duration_seconds = registry.histogram(
+    "pipeline_stage_duration_seconds", "Duration of instrumented pipeline stages", ("stage",)
+)
+llm_request_duration_seconds = registry.histogram(
+    "llm_request_duration_seconds", "LLM call latency by endpoint and status", ("endpoint", "status")
+)
+llm_tokens_total = registry.counter(
+    "llm_tokens_total", "LLM tokens by endpoint and kind", ("endpoint", "kind")
+)
+llm_rejections_total = registry.counter(
+    "llm_rejections_total", "LLM calls rejected by budget checks", ("endpoint",)
+)
+llm_provider_requests_total = registry.counter(
+    "llm_provider_requests_total", "LLM requests sent to each provider, by outcome", ("provider", "status")
+)
+llm_provider_duration_seconds = registry.histogram(
+    "llm_provider_duration_seconds", "LLM request latency per provider", ("provider", "status")
+)
+admission_rejections_total = registry.counter(
+    "admission_rejections_total", "Requests shed by admission control with 429", ("route", "reason")
+)
+coalesced_requests_total = registry.counter(
+    "coalesced_requests_total", "Duplicate requests answered by an identical in-flight one", ("flight", "source")
+)
+pdf_pages_extracted_total = registry.counter(
+    "pdf_pages_extracted_total", "PDF pages extracted, parsed or served from the page cache", ("source",)
+)
+
+
+# Tracing
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_time", "end_time", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_time = time.perf_counter()
+        self.end_time: Optional[float] = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_time or time.perf_counter()) - self.start_time)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "attributes": dict(self.attributes),
+        }
+
+
+class InMemorySpanExporter:
+    """Keeps the most recent finished spans in process, so traces can be inspected offline"""
+
+    def __init__(self, max_spans: int = SPAN_BUFFER_SIZE):
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self._lock = Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+
+    def get_finished_spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            spans = list(self._spans)
+        if trace_id is not None:
+            spans = [span for span in spans if span.trace_id == trace_id]
+        return spans
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+
+span_exporter = InMemorySpanExporter()
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str, *, stage: bool = True, **attributes: Any) -> Iterator[Span]:
+    """Trace a block as a child of the current span, recording its duration as a pipeline stage"""
+    parent = _current_span.get()
+    current = Span(
+        name,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        parent_id=parent.span_id if parent else None,
+        attributes=attributes
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException:
+        current.status = "error"
+        raise
+    finally:
+        current.end_time = time.perf_counter()
+        _current_span.reset(token)
+        if stage:
+            pipeline_stage_duration_seconds.observe(current.duration, stage=name)
+        span_exporter.export(current)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+# Database query counting
+
+_query_counter: ContextVar[Optional[List[int]]] = ContextVar("query_counter", default=None)
+
+
+@contextmanager
+def count_queries() -> Iterator[List[int]]:
+    """Count database statements executed in this context; the count is in the yielded list"""
+    counter = [0]
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+
+def instrument_engine(engine: Engine):
+    """Attach the statement counter to an engine"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_statement(conn, cursor, statement, parameters, context, executemany):
+        counter = _query_counter.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+def render_metrics() -> str:
+    return registry.render()
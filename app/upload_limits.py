@@ -0,0 +1,161 @@
+from typing import NamedTuple, Optional
+import codecs
+import hashlib
+import os
+
+import puremagic
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers
+from starlette.routing import compile_path
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_READ_CHUNK_BYTES = 1024 * 1024
+# Enough of the file to recognize its format, and to tell text from binary
+SNIFF_BYTES = 8192
+
+# Document upload routes; bulk import has its own, much larger, payloads
+UPLOAD_ROUTES = (
+    "/projects/upload-docs",
+    "/projects/upload-and-analyze",
+    "/projects/extract-tech-stack",
+    "/projects/project/{project_id}/revise",
+)
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class ReceivedUpload(NamedTuple):
+    file_type: str                # "pdf" or "txt", confirmed by content
+    size: int
+    sha256: str
+    data: Optional[bytes] = None  # PDF bytes, for the parser
+    text: Optional[str] = None    # Decoded text files
+
+
+def too_large_detail(max_bytes: int) -> str:
+    megabytes, remainder = divmod(max_bytes, 1024 * 1024)
+    limit = f"{megabytes} MB" if megabytes and not remainder else f"{max_bytes} byte"
+    return f"Upload exceeds the {limit} limit"
+
+
+class UploadLimitMiddleware:
+    """Rejects document uploads over the size limit while the body is still arriving.
+
+    A declared Content-Length over the limit is refused before any of the body is read;
+    otherwise bytes are counted as they are received, and the request is cut off with 413
+    as soon as the count passes the limit, before the multipart parser spools the rest.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_BYTES, paths=UPLOAD_ROUTES):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.patterns = [compile_path(path)[0] for path in paths]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not any(
+            pattern.match(scope["path"]) for pattern in self.patterns
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Once the limit is hit, the app's own error response (a form parsing 400) is dropped
+            if exceeded:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            pass
+        if exceeded and not response_started:
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        response = ORJSONResponse(
+            status_code=413,
+            content={"success": False, "message": "File too large", "error": too_large_detail(self.max_bytes)},
+            headers={"Connection": "close"}
+        )
+        await response(scope, receive, send)
+
+
+def sniff_file_type(head: bytes, filename: str) -> str:
+    """Confirm the upload's content matches its extension, from its first bytes"""
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    try:
+        detected = puremagic.from_string(head).lstrip(".").lower()
+    except puremagic.PureError:
+        detected = ""
+
+    if extension == "pdf":
+        if detected != "pdf":
+            raise HTTPException(status_code=415, detail="File is not a PDF document")
+        return "pdf"
+    if extension == "txt":
+        # Text has no signature, so binary data is caught by NUL bytes here or invalid UTF-8
+        # while decoding; text that happens to match a signature (XML, scripts) is accepted
+        if b"\x00" in head or detected == "pdf":
+            kind = f"a {detected.upper()} file" if detected else "binary data"
+            raise HTTPException(status_code=415, detail=f"Text file contains {kind}")
+        return "txt"
+    raise HTTPException(status_code=400, detail="Unsupported file type. Only PDF and TXT files are allowed.")
+
+
+async def receive_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> ReceivedUpload:
+    """Read an upload once, in chunks: sniff the first chunk, then hash, size-check and decode as bytes arrive"""
+    digest = hashlib.sha256()
+    size = 0
+    file_type = None
+    chunks = []
+    decoder = codecs.getincrementaldecoder("utf-8")()
+
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_READ_CHUNK_BYTES if file_type else SNIFF_BYTES)
+            if not chunk:
+                break
+            if file_type is None:
+                # Rejected here, before the rest of the file is read or anything is parsed
+                file_type = sniff_file_type(chunk, file.filename or "")
+
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=too_large_detail(max_bytes))
+            digest.update(chunk)
+            chunks.append(decoder.decode(chunk) if file_type == "txt" else chunk)
+
+        if file_type == "txt":
+            chunks.append(decoder.decode(b"", final=True))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=415, detail="Text file is not valid UTF-8")
+
+    if file_type is None:
+        raise HTTPException(status_code=400, detail="File appears to be empty or content could not be extracted")
+    if file_type == "txt":
+        return ReceivedUpload(file_type, size, digest.hexdigest(), text="".join(chunks))
+    return ReceivedUpload(file_type, size, digest.hexdigest(), data=b"".join(chunks))
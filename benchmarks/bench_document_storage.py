@@ -0,0 +1,171 @@
+"""Benchmark zstd-compressed, deferred Document.content storage.
+
+Reports the compression ratio and codec throughput for documents of 1 to 500
+pages, then loads the same documents into two SQLite databases, one with the
+previous uncompressed eager column and one with the compressed deferred column,
+and compares database size and row-fetch times for metadata-only and full-text
+reads.
+
+Usage:
+    python -m benchmarks.bench_document_storage [--documents 200] [--pages 1,10,100,500] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, undefer
+
+from app.models import Base, Document, User
+from app.service.document_storage import compress_text, decompress_text
+
+WORDS = (
+    "system user project data service api request response dashboard report module requirement "
+    "deliver feature integration database schema migration deploy release testing security access "
+    "role permission audit log event stream queue worker schedule notification email payment invoice "
+    "customer order product inventory search filter export import upload document analysis estimate "
+    "timeline milestone sprint backlog review approval workflow configuration monitoring alert metric "
+    "the a of to and in for with on by from as is be will should must can each all any new existing"
+).split()
+CHARS_PER_PAGE = 3000
+
+
+def make_text(pages: int, seed: int) -> str:
+    """Prose-like text with a realistic word distribution, about CHARS_PER_PAGE per page"""
+    rng = random.Random(seed)
+    words = []
+    size = 0
+    while size < pages * CHARS_PER_PAGE:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+        sentence = f"{sentence.capitalize()} {rng.randint(1, 999)}."
+        words.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(words)
+
+
+def codec_stats(pages_list, iterations: int) -> list:
+    results = []
+    for pages in pages_list:
+        text = make_text(pages, seed=pages)
+        raw = len(text.encode("utf-8"))
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            compressed = compress_text(text)
+        compress_s = (time.perf_counter() - start) / iterations
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            decompress_text(compressed)
+        decompress_s = (time.perf_counter() - start) / iterations
+
+        results.append({
+            "pages": pages,
+            "raw_bytes": raw,
+            "compressed_bytes": len(compressed),
+            "ratio": round(raw / len(compressed), 2),
+            "compress_mb_s": round(raw / compress_s / 1e6, 1),
+            "decompress_mb_s": round(raw / decompress_s / 1e6, 1),
+        })
+    return results
+
+
+def populate(path: str, texts: list, compressed: bool):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(User(id=1, username="bench", email="bench@example.com", hashed_password="x"))
+        for index, text in enumerate(texts):
+            document = Document(filename=f"doc-{index}.txt", file_type="txt", file_size=len(text), user_id=1)
+            if compressed:
+                document.content = text
+            else:
+                document.legacy_content = text
+            db.add(document)
+        db.commit()
+    return engine
+
+
+def timed_fetch(engine, repeats: int, *options, read_content: bool = False) -> float:
+    Session = sessionmaker(bind=engine)
+    best = float("inf")
+    for _ in range(repeats):
+        with Session() as db:
+            start = time.perf_counter()
+            documents = db.query(Document).options(*options).all()
+            if read_content:
+                for document in documents:
+                    document.content
+            best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def row_fetch_stats(documents: int, pages: int, repeats: int) -> dict:
+    texts = [make_text(pages, seed=index) for index in range(documents)]
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        compressed_path = os.path.join(tmp, "compressed.db")
+        legacy = populate(legacy_path, texts, compressed=False)
+        compressed = populate(compressed_path, texts, compressed=True)
+
+        result = {
+            "documents": documents,
+            "pages_per_document": pages,
+            "db_bytes": {
+                "uncompressed": os.path.getsize(legacy_path),
+                "zstd": os.path.getsize(compressed_path),
+            },
+            "fetch_ms": {
+                # The old mapping loaded the text column with every Document
+                "metadata_uncompressed_eager": round(timed_fetch(legacy, repeats, undefer(Document.legacy_content)), 2),
+                "metadata_zstd_deferred": round(timed_fetch(compressed, repeats), 2),
+                "full_text_uncompressed": round(timed_fetch(legacy, repeats, undefer(Document.legacy_content), read_content=True), 2),
+                "full_text_zstd": round(timed_fetch(compressed, repeats, undefer(Document.content_zstd), read_content=True), 2),
+            },
+        }
+        legacy.dispose()
+        compressed.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--document-pages", type=int, default=20)
+    parser.add_argument("--pages", type=lambda value: [int(p) for p in value.split(",")], default=[1, 10, 100, 500])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    report = {
+        "codec": codec_stats(args.pages, args.iterations),
+        "row_fetch": row_fetch_stats(args.documents, args.document_pages, args.repeats),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'pages':>6}{'raw KB':>10}{'zstd KB':>10}{'ratio':>8}{'comp MB/s':>11}{'decomp MB/s':>13}")
+    for row in report["codec"]:
+        print(f"{row['pages']:>6}{row['raw_bytes'] / 1024:>10.1f}{row['compressed_bytes'] / 1024:>10.1f}"
+              f"{row['ratio']:>8}{row['compress_mb_s']:>11}{row['decompress_mb_s']:>13}")
+
+    fetch = report["row_fetch"]
+    print(f"\n{fetch['documents']} documents x {fetch['pages_per_document']} pages")
+    print(f"database size: {fetch['db_bytes']['uncompressed'] / 1e6:.1f} MB uncompressed, "
+          f"{fetch['db_bytes']['zstd'] / 1e6:.1f} MB zstd")
+    for name, value in fetch["fetch_ms"].items():
+        print(f"  {name:<30}{value:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
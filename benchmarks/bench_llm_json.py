@@ -0,0 +1,109 @@
+"""Benchmark LLM response parsing on a corpus of recorded responses.
+
+Compares the previous find('{')/rfind('}') and fence-stripping parsers with the
+shared tolerant parser in app.service.llm_json, reporting how many responses
+each recovers into a valid schema and the parse cost per response.
+
+Usage:
+    python -m benchmarks.bench_llm_json [--iterations 2000] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.schemas import DailyTaskPlan, ProjectAnalysis, TechRecommendations
+from app.service.llm_json import LLMResponseParseError, parse_llm_json
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "llm_responses.jsonl")
+
+SCHEMAS = {
+    "analysis": ProjectAnalysis,
+    "daily_tasks": DailyTaskPlan,
+    "tech": TechRecommendations,
+}
+
+
+def legacy_parse(kind: str, response: str):
+    """The parsing each call site used before the shared parser"""
+    if kind == "tech":
+        cleaned = response.strip()
+        if cleaned.startswith('```json'):
+            cleaned = cleaned[7:]
+        if cleaned.endswith('```'):
+            cleaned = cleaned[:-3]
+        return TechRecommendations(**json.loads(cleaned.strip()))
+
+    text = response.strip()
+    start = text.find('{')
+    end = text.rfind('}') + 1
+    if start == -1 or end == 0:
+        raise ValueError("No JSON found in response")
+    return SCHEMAS[kind](**json.loads(text[start:end]))
+
+
+def tolerant_parse(kind: str, response: str):
+    return parse_llm_json(response, SCHEMAS[kind])
+
+
+def load_corpus():
+    with open(CORPUS_PATH) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run(parser, corpus, iterations: int) -> dict:
+    recovered = []
+    for entry in corpus:
+        try:
+            parser(entry["kind"], entry["response"])
+            recovered.append(entry["name"])
+        except (ValueError, TypeError, LLMResponseParseError):
+            pass
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for entry in corpus:
+            try:
+                parser(entry["kind"], entry["response"])
+            except (ValueError, TypeError, LLMResponseParseError):
+                pass
+    elapsed = time.perf_counter() - start
+
+    return {
+        "recovered": len(recovered),
+        "total": len(corpus),
+        "recovered_names": recovered,
+        "us_per_response": round(elapsed / (iterations * len(corpus)) * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable results")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    results = {
+        "benchmark": "llm_json",
+        "legacy": run(legacy_parse, corpus, args.iterations),
+        "tolerant": run(tolerant_parse, corpus, args.iterations),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name in ("legacy", "tolerant"):
+        result = results[name]
+        print(f"{name:>9}: recovered {result['recovered']}/{result['total']}, "
+              f"{result['us_per_response']} us/response")
+    missed = set(results["tolerant"]["recovered_names"]) - set(results["legacy"]["recovered_names"])
+    print(f"recovered only by tolerant parser: {', '.join(sorted(missed)) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark PDF text extraction, cold (empty page cache) and warm.
+
+Builds documents of prose pages with a share of ruled-table pages and times
+extract_pdf_text per page. Cold extraction is what a first upload pays; warm is a
+revision whose pages are all cached. "all pages to pdfplumber" times the table
+finder on every page, as before pages were screened for ruling lines.
+
+Usage:
+    python -m benchmarks.bench_pdf_extraction [--pages 1,10,100] [--table-every 10] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # noqa: E402
+
+from app.service import pdf_extraction  # noqa: E402
+from benchmarks.run_benchmarks import PAGE_TEXT  # noqa: E402
+
+
+def make_pdf(pages: int, table_every: int) -> bytes:
+    """Prose pages, with a ruled 4x3 table on every table_every-th page (0 for none)"""
+    document = fitz.open()
+    for page_number in range(1, pages + 1):
+        page = document.new_page()
+        if table_every and page_number % table_every == 0:
+            page.insert_textbox(fitz.Rect(50, 50, 550, 400), PAGE_TEXT.format(page=page_number) * 3, fontsize=9)
+            for row in range(5):
+                page.draw_line((50, 420 + row * 30), (550, 420 + row * 30))
+            for column in range(4):
+                page.draw_line((50 + column * 500 / 3, 420), (50 + column * 500 / 3, 540))
+            for row in range(4):
+                for column in range(3):
+                    page.insert_text((60 + column * 500 / 3, 440 + row * 30), f"cell {row}.{column}", fontsize=9)
+        else:
+            page.insert_textbox(fitz.Rect(50, 50, 550, 800), PAGE_TEXT.format(page=page_number) * 6, fontsize=9)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def time_extraction(data: bytes, repeats: int, cold: bool) -> float:
+    best = float("inf")
+    pdf_extraction.extract_pdf_text(data)
+    for _ in range(repeats):
+        if cold:
+            pdf_extraction.page_cache.clear()
+        start = time.perf_counter()
+        pdf_extraction.extract_pdf_text(data)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(pages_list, table_every: int, repeats: int) -> list:
+    results = []
+    screen = pdf_extraction.has_ruling_lines
+    for pages in pages_list:
+        data = make_pdf(pages, table_every)
+        cold_ms = time_extraction(data, repeats, cold=True)
+        warm_ms = time_extraction(data, repeats, cold=False)
+        pdf_extraction.has_ruling_lines = lambda page: True
+        try:
+            unscreened_ms = time_extraction(data, repeats, cold=True)
+        finally:
+            pdf_extraction.has_ruling_lines = screen
+        results.append({
+            "pages": pages,
+            "cold_ms_per_page": round(cold_ms / pages, 2),
+            "warm_ms_per_page": round(warm_ms / pages, 2),
+            "all_pages_to_pdfplumber_ms_per_page": round(unscreened_ms / pages, 2),
+            "cold_total_ms": round(cold_ms, 1),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=lambda value: [int(p) for p in value.split(",")], default=[1, 10, 100])
+    parser.add_argument("--table-every", type=int, default=10, help="Put a ruled table on every Nth page; 0 for none")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    report = {
+        "pdf_library": pdf_extraction.PDF_LIBRARY,
+        "pdfplumber": pdf_extraction.pdfplumber is not None,
+        "table_every": args.table_every,
+        "results": run(args.pages, args.table_every, args.repeats),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"library: {report['pdf_library']}, pdfplumber: {report['pdfplumber']}, table every {args.table_every} pages")
+    print(f"{'pages':>6}{'cold ms/pg':>12}{'warm ms/pg':>12}{'all-plumber ms/pg':>19}{'cold total ms':>15}")
+    for row in report["results"]:
+        print(f"{row['pages']:>6}{row['cold_ms_per_page']:>12}{row['warm_ms_per_page']:>12}"
+              f"{row['all_pages_to_pdfplumber_ms_per_page']:>19}{row['cold_total_ms']:>15}")
+
+
+if __name__ == "__main__":
+    main()
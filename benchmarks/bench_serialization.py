@@ -0,0 +1,172 @@
+"""Benchmark response serialization cost per endpoint, before and after the orjson fast path.
+
+"Before" reproduces the previous path for each endpoint: models built by hand
+(or from ORM objects), re-validated against response_model by FastAPI and
+encoded by JSONResponse. "After" is the current path: rows validated and encoded
+once through a prebuilt TypeAdapter, or response_model serialization encoded by
+ORJSONResponse.
+
+Usage:
+    python -m benchmarks.bench_serialization [--projects 200] [--tasks 120] [--iterations 200] [--json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.schemas import ProjectResponse, ProjectSummaryListAdapter, ProjectSummaryResponse
+
+SUMMARY_LIST_FIELD = create_model_field(name="Response_my_projects", type_=List[ProjectSummaryResponse])
+PROJECT_FIELD = create_model_field(name="Response_project", type_=ProjectResponse)
+DICT_FIELD = create_model_field(name="Response_dict", type_=dict)
+
+LOOP = asyncio.new_event_loop()
+
+
+def summary_rows(count: int) -> list:
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": index,
+            "project_name": f"Project {index}",
+            "project_summary": "A web portal for monitoring delivery vehicles in real time. " * 3,
+            "complexity_level": "High",
+            "total_duration_weeks": "12 weeks",
+            "created_at": created_at,
+        }
+        for index in range(count)
+    ]
+
+
+def project_row(tasks: int) -> dict:
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return {
+        "id": 1,
+        "project_name": "Fleet Telemetry Portal",
+        "project_summary": "A web portal for monitoring delivery vehicles in real time.",
+        "scope_and_deliverables": "Event ingestion pipeline, operator dashboard, alerting and admin console. " * 5,
+        "developer_tasks": [f"Task {n}: Implement feature {n} with tests and documentation - 8 hours" for n in range(1, tasks + 1)],
+        "technology_stack": ["Apache Kafka", "React", "FastAPI", "PostgreSQL", "Docker"],
+        "complexity_level": "High",
+        "base_hours_required": "320 hours",
+        "total_hours_estimated": "480 hours",
+        "total_duration_weeks": "12 weeks",
+        "total_duration_days": "60 working days",
+        "development_phase": "8 weeks",
+        "testing_phase": "3 weeks",
+        "deployment_phase": "5 days",
+        "buffer_included": "Yes",
+        "created_at": created_at,
+        "document": {"id": 1, "filename": "spec.pdf", "file_type": "pdf", "file_size": 524288, "created_at": created_at},
+    }
+
+
+def daily_log_payload(tasks: int) -> dict:
+    return {
+        "success": True,
+        "log": {
+            "date": date(2025, 1, 6),
+            "planned_hours": 8,
+            "tasks": [{"task": f"Carry-over task {n}: finish implementation", "estimated_hours": 1.5, "task_done": n % 3 == 0} for n in range(tasks)],
+        },
+    }
+
+
+def serialize(field, content):
+    return LOOP.run_until_complete(serialize_response(field=field, response_content=content, is_coroutine=True))
+
+
+def my_projects_before(rows):
+    # Rows came back as ORM objects and were copied into models one by one
+    projects = [SimpleNamespace(**row) for row in rows]
+    summaries = [
+        ProjectSummaryResponse(
+            id=project.id,
+            project_name=project.project_name,
+            project_summary=project.project_summary,
+            complexity_level=project.complexity_level,
+            total_duration_weeks=project.total_duration_weeks,
+            created_at=project.created_at
+        )
+        for project in projects
+    ]
+    return JSONResponse(serialize(SUMMARY_LIST_FIELD, summaries)).body
+
+
+def my_projects_after(rows):
+    return ProjectSummaryListAdapter.dump_json(ProjectSummaryListAdapter.validate_python(rows))
+
+
+def project_before(row):
+    project = SimpleNamespace(**{**row, "document": SimpleNamespace(**row["document"])})
+    return JSONResponse(serialize(PROJECT_FIELD, ProjectResponse.model_validate(project))).body
+
+
+def project_after(row):
+    return ORJSONResponse(serialize(PROJECT_FIELD, row)).body
+
+
+def daily_log_before(payload):
+    return JSONResponse(serialize(DICT_FIELD, payload)).body
+
+
+def daily_log_after(payload):
+    return ORJSONResponse(serialize(DICT_FIELD, payload)).body
+
+
+def measure(fn, payload, iterations: int) -> float:
+    fn(payload)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(payload)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=120)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    cases = [
+        ("GET /projects/my-projects", my_projects_before, my_projects_after, summary_rows(args.projects)),
+        ("GET /projects/project/{id}", project_before, project_after, project_row(args.tasks)),
+        ("GET /projects/daily-log", daily_log_before, daily_log_after, daily_log_payload(args.tasks)),
+    ]
+
+    results = []
+    for name, before, after, payload in cases:
+        before_us = measure(before, payload, args.iterations)
+        after_us = measure(after, payload, args.iterations)
+        results.append({
+            "endpoint": name,
+            "bytes": len(after(payload)),
+            "before_us": round(before_us, 1),
+            "after_us": round(after_us, 1),
+            "speedup": round(before_us / after_us, 2),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'endpoint':<30}{'bytes':>9}{'before us':>12}{'after us':>11}{'speedup':>9}")
+    for row in results:
+        print(f"{row['endpoint']:<30}{row['bytes']:>9}{row['before_us']:>12}{row['after_us']:>11}{row['speedup']:>8}x")
+
+
+if __name__ == "__main__":
+    main()
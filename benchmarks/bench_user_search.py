@@ -0,0 +1,50 @@
+"""Latency of top-k search over one user's in-memory chunk index.
+
+Usage:
+    python -m benchmarks.bench_user_search [--chunks 100000] [--dim 384] [--queries 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.service.vector_index import UserVectorIndex  # noqa: E402
+from benchmarks.run_benchmarks import percentile  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--chunks-per-document", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=25)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((args.chunks, args.dim), dtype=np.float32)
+    index = UserVectorIndex()
+
+    started = time.perf_counter()
+    index.add(np.arange(args.chunks), np.arange(args.chunks) // args.chunks_per_document, embeddings)
+    index.consolidate()
+    print(f"indexed {len(index)} chunks in {(time.perf_counter() - started) * 1000:.1f} ms "
+          f"({index.matrix.nbytes / 1024 / 1024:.1f} MiB)")
+
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, args.top_k)
+        timings.append(time.perf_counter() - started)
+    print(f"search top_{args.top_k}: " + " ".join(
+        f"p{p}={percentile(timings, p) * 1000:.2f} ms" for p in (50, 95, 99)
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Check LLM provider routing against local mock servers.
+
+Starts mock chat completion servers that are fast, slow, failing or rejecting,
+routes requests through LLMRouter and checks fallback, circuit breaking,
+latency-aware ordering and hedging. Exits non-zero when a check fails.
+
+Usage:
+    python -m benchmarks.check_llm_routing [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.service.llm_router import CircuitBreaker, LLMRouter, Provider, ProviderError  # noqa: E402
+from benchmarks.mock_mistral import mock_url, start_mock_server  # noqa: E402
+
+REQUEST = {
+    "messages": [
+        {"role": "system", "content": "You are a Task Planning Assistant."},
+        {"role": "user", "content": "DAILY TASK REQUEST for Day 1\nTARGET DATE: 2025-01-06"}
+    ],
+    "temperature": 0.3,
+    "max_tokens": 200,
+    "response_format": {"type": "json_object"}
+}
+
+
+def provider(name: str, server, timeout: float = 5.0) -> Provider:
+    return Provider(name=name, url=mock_url(server), model=f"{name}-model", timeout=timeout)
+
+
+def timed(router: LLMRouter, endpoint: str = "analysis"):
+    start = time.perf_counter()
+    result = router.complete(REQUEST, endpoint)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def check_fallback(servers) -> dict:
+    router = LLMRouter([provider("failing", servers["failing"]), provider("fast", servers["fast"])], hedged_endpoints=())
+    try:
+        result, latency_ms = timed(router)
+        return {"passed": result.provider == "fast", "provider": result.provider, "latency_ms": round(latency_ms, 1)}
+    finally:
+        router.close()
+
+
+def check_circuit_breaker(servers) -> dict:
+    failing = provider("failing", servers["failing"])
+    failing.breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=60)
+    router = LLMRouter([failing, provider("fast", servers["fast"])], hedged_endpoints=())
+    before = servers["failing"].config.calls
+    try:
+        for _ in range(10):
+            timed(router)
+        sent = servers["failing"].config.calls - before
+        return {"passed": sent == 3 and failing.breaker.state == "open", "failing_requests": sent, "circuit": failing.breaker.state}
+    finally:
+        router.close()
+
+
+def check_latency_ordering(servers) -> dict:
+    router = LLMRouter([provider("slow", servers["slow"]), provider("fast", servers["fast"])], hedged_endpoints=())
+    try:
+        # Untried providers go first, so both get a latency sample before ordering settles
+        timed(router)
+        timed(router)
+        providers = [timed(router)[0].provider for _ in range(5)]
+        return {"passed": set(providers) == {"fast"}, "providers": providers, "state": router.state()}
+    finally:
+        router.close()
+
+
+def check_hedging(servers) -> dict:
+    slow, fast = provider("slow", servers["slow"]), provider("fast", servers["fast"])
+    # Pretend the slow provider has been the fastest so it is tried first
+    slow.latency_ms, fast.latency_ms = 10.0, 50.0
+    router = LLMRouter([slow, fast], hedged_endpoints={"daily_tasks"}, hedge_delay_ms=200)
+    try:
+        result, latency_ms = timed(router, "daily_tasks")
+        slow_latency_ms = servers["slow"].config.latency_ms
+        return {
+            "passed": result.provider == "fast" and latency_ms < slow_latency_ms,
+            "provider": result.provider,
+            "latency_ms": round(latency_ms, 1),
+            "slow_provider_latency_ms": slow_latency_ms
+        }
+    finally:
+        router.close()
+
+
+def check_non_retryable(servers) -> dict:
+    router = LLMRouter([provider("rejecting", servers["rejecting"]), provider("fast", servers["fast"])], hedged_endpoints=())
+    before = servers["fast"].config.calls
+    try:
+        timed(router)
+        return {"passed": False, "error": "request succeeded"}
+    except ProviderError as e:
+        # A 400 means the request itself is wrong; another provider would reject it too
+        return {"passed": e.status == "http_400" and servers["fast"].config.calls == before, "status": e.status}
+    finally:
+        router.close()
+
+
+CHECKS = {
+    "fallback": check_fallback,
+    "circuit_breaker": check_circuit_breaker,
+    "latency_ordering": check_latency_ordering,
+    "hedging": check_hedging,
+    "non_retryable": check_non_retryable,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    servers = {
+        "fast": start_mock_server(latency_ms=20),
+        "slow": start_mock_server(latency_ms=1500),
+        "failing": start_mock_server(error_rate=1.0, error_status=503),
+        "rejecting": start_mock_server(error_rate=1.0, error_status=400),
+    }
+    results = {name: check(servers) for name, check in CHECKS.items()}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            details = ", ".join(f"{key}={value}" for key, value in result.items() if key not in ("passed", "state"))
+            print(f"{'PASS' if result['passed'] else 'FAIL'}  {name:<18} {details}")
+
+    for server in servers.values():
+        server.shutdown()
+    sys.exit(0 if all(result["passed"] for result in results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
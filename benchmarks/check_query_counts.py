@@ -0,0 +1,125 @@
+"""Check the number of database queries each read endpoint executes.
+
+Seeds a throwaway SQLite database, calls the read endpoints through the app and
+reads the statement count from the Server-Timing header the telemetry
+middleware adds. Exits non-zero when an endpoint exceeds its budget, so query
+count regressions (N+1 loads, lazy relationships) fail CI.
+
+Usage:
+    python -m benchmarks.check_query_counts [--projects 20] [--json]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATABASE_DIR = tempfile.mkdtemp(prefix="query-counts-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DATABASE_DIR, 'queries.db')}"
+os.environ["DB_ECHO"] = "false"
+os.environ["RESPONSE_CACHE_TTL_SECONDS"] = "0"
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import DailyLog, Document, Project, User
+
+QUERY_COUNT_PATTERN = re.compile(r"queries=(\d+)")
+
+# Maximum statements per request, including the user lookup in get_current_user. A full
+# response is the ETag version query plus one data query; a 304 skips the data query.
+QUERY_BUDGETS = {
+    "GET /projects/my-projects": 3,
+    "GET /projects/project/{project_id}": 3,
+    "GET /projects/daily-log": 3,
+    "GET /projects/my-projects (304)": 2,
+    "GET /projects/project/{project_id} (304)": 2,
+    "GET /projects/daily-log (304)": 2,
+}
+
+
+def seed(user_id: int, projects: int) -> int:
+    with SessionLocal() as db:
+        first_project_id = None
+        for index in range(projects):
+            document = Document(filename=f"spec-{index}.pdf", file_type="pdf", file_size=1024, user_id=user_id)
+            document.content = "Project specification. " * 2000
+            db.add(document)
+            db.flush()
+            project = Project(
+                project_name=f"Project {index}",
+                project_summary="Summary",
+                scope_and_deliverables="Scope",
+                developer_tasks=[f"Task {n}: Build feature {n} - 8 hours" for n in range(1, 30)],
+                technology_stack=["FastAPI", "PostgreSQL"],
+                complexity_level="Medium",
+                user_id=user_id,
+                document_id=document.id
+            )
+            db.add(project)
+            db.flush()
+            first_project_id = first_project_id or project.id
+            db.add(DailyLog(
+                project_id=project.id,
+                user_id=user_id,
+                day_number=1,
+                target_date=date.today(),
+                planned_hours=8,
+                tasks=[{"task": "Build feature 1", "estimated_hours": 8, "task_done": False}]
+            ))
+        db.commit()
+    return first_project_id
+
+
+def query_count(response, expected_status: int = 200) -> int:
+    match = QUERY_COUNT_PATTERN.search(response.headers.get("Server-Timing", ""))
+    if response.status_code != expected_status or not match:
+        raise RuntimeError(f"{response.request.url} returned {response.status_code}")
+    return int(match.group(1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        client.post("/auth/signup", json={"username": "queries", "email": "queries@example.com", "password": "password"})
+        token = client.post("/auth/login", json={"username": "queries", "password": "password"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        with SessionLocal() as db:
+            user_id = db.query(User.id).filter(User.username == "queries").scalar()
+        project_id = seed(user_id, args.projects)
+
+        requests = {
+            "GET /projects/my-projects": ("/projects/my-projects", None),
+            "GET /projects/project/{project_id}": (f"/projects/project/{project_id}", None),
+            "GET /projects/daily-log": ("/projects/daily-log", {"project_id": project_id, "day_number": 1}),
+        }
+        counts = {}
+        for route, (path, params) in requests.items():
+            response = client.get(path, params=params, headers=headers)
+            counts[route] = query_count(response)
+            revalidated = client.get(path, params=params, headers={**headers, "If-None-Match": response.headers["ETag"]})
+            counts[f"{route} (304)"] = query_count(revalidated, expected_status=304)
+
+    failures = {route: count for route, count in counts.items() if count > QUERY_BUDGETS[route]}
+    if args.json:
+        print(json.dumps({"counts": counts, "budgets": QUERY_BUDGETS, "failures": failures}, indent=2))
+    else:
+        for route, count in counts.items():
+            flag = "FAIL" if route in failures else "ok"
+            print(f"{flag:<5}{route:<40}{count:>3} queries (budget {QUERY_BUDGETS[route]})")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Mock Mistral chat completions server for offline benchmarks.
+
+Serves POST /v1/chat/completions with canned JSON responses chosen from the
+system prompt (project analysis, daily tasks or technology recommendations),
+with configurable latency, jitter and error rate. Each server has its own settings,
+so several can stand in for different providers in one process.
+
+Usage:
+    python -m benchmarks.mock_mistral --port 8090 --latency-ms 300 --jitter-ms 100
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DAY_PATTERN = re.compile(r"Day (\d+)")
+DATE_PATTERN = re.compile(r"TARGET DATE: (\S+)")
+
+ANALYSIS_RESPONSE = {
+    "project_name": "Fleet Telemetry Portal",
+    "project_summary": "A web portal for monitoring delivery vehicles in real time. It ingests GPS events and exposes dashboards and alerts.",
+    "scope_and_deliverables": "Event ingestion pipeline, operator dashboard, alerting rules engine, admin console and REST API.",
+    "time_estimation": {
+        "base_hours_required": "320 hours (before buffer)",
+        "total_hours_estimated": "480 hours (including 1.5x buffer)",
+        "total_duration_weeks": "12 weeks (based on 8h/day, 5d/wk)",
+        "total_duration_days": "60 working days",
+        "development_phase": "8 weeks",
+        "testing_phase": "3 weeks",
+        "deployment_phase": "5 days",
+        "buffer_included": "Yes - 1.5x multiplier applied"
+    },
+    "developer_tasks": [
+        "Task 1: Set up repository, CI pipeline and environments - 16 hours",
+        "Task 2: Implement Kafka ingestion for GPS events - 60 hours",
+        "Task 3: Design database schema and migrations - 24 hours",
+        "Task 4: Build REST API for vehicles and trips - 80 hours",
+        "Task 5: Build React dashboard with live map - 120 hours",
+        "Task 6: Implement alert rules engine - 60 hours",
+        "Task 7: Admin console and role-based access control - 50 hours",
+        "Task 8: End-to-end testing and load testing - 50 hours",
+        "Task 9: Deployment, monitoring and handover - 20 hours"
+    ],
+    "technology_stack": ["Apache Kafka", "React", "FastAPI", "PostgreSQL", "Docker"],
+    "complexity_level": "High"
+}
+
+TECH_RESPONSE = {"recommended_technologies": ["Redis", "Grafana", "Terraform"]}
+
+
+class MockConfig:
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0, error_status: int = 429):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.calls = 0
+        self.lock = threading.Lock()
+
+
+def _daily_tasks_response(prompt: str) -> dict:
+    day = DAY_PATTERN.search(prompt)
+    date = DATE_PATTERN.search(prompt)
+    day_number = int(day.group(1)) if day else 1
+    return {
+        "day": f"Day {day_number}",
+        "date": date.group(1) if date else "",
+        "planned_hours": 8,
+        "tasks": [
+            {"task": f"Day {day_number}: implement planned feature work", "estimated_hours": 5},
+            {"task": f"Day {day_number}: write tests and review", "estimated_hours": 2},
+            {"task": f"Day {day_number}: update documentation", "estimated_hours": 1}
+        ]
+    }
+
+
+def canned_response(messages: list) -> dict:
+    system_prompt = messages[0]["content"] if messages else ""
+    user_prompt = messages[-1]["content"] if messages else ""
+    if "Task Planning" in system_prompt:
+        return _daily_tasks_response(user_prompt)
+    if "Technology Stack" in system_prompt:
+        return TECH_RESPONSE
+    return ANALYSIS_RESPONSE
+
+
+class MockMistralHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Hedged requests cancel the slower attempt by closing its connection
+            self.close_connection = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        config = self.server.config
+        with config.lock:
+            config.calls += 1
+            call_number = config.calls
+
+        delay = config.latency_ms + random.uniform(0, config.jitter_ms)
+        time.sleep(delay / 1000)
+
+        if config.error_rate and random.random() < config.error_rate:
+            self._send(config.error_status, {"message": f"Mock error {config.error_status}"})
+            return
+
+        messages = request.get("messages", [])
+        content = json.dumps(canned_response(messages))
+        prompt_chars = sum(len(message.get("content", "")) for message in messages)
+        self._send(200, {
+            "id": f"mock-{call_number}",
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (prompt_chars + len(content)) // 4
+            }
+        })
+
+
+def start_mock_server(
+    port: int = 0,
+    latency_ms: float = 0,
+    jitter_ms: float = 0,
+    error_rate: float = 0,
+    error_status: int = 429
+) -> ThreadingHTTPServer:
+    """Start the mock server on a background thread; port 0 picks a free port"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockMistralHandler)
+    server.config = MockConfig(latency_ms, jitter_ms, error_rate, error_status)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def mock_url(server: ThreadingHTTPServer) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--error-status", type=int, default=429)
+    args = parser.parse_args()
+
+    server = start_mock_server(args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.error_status)
+    print(f"Mock Mistral listening on {mock_url(server)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
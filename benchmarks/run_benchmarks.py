@@ -0,0 +1,395 @@
+"""Reproducible end-to-end benchmark suite for the FastAPI service.
+
+Starts the app with uvicorn against SQLite (or a local Postgres via
+--database-url) and the mock Mistral server, drives realistic scenarios over
+HTTP and reports throughput, p50/p95/p99 latency and peak server RSS. Results
+are written as JSON so runs can be compared over time.
+
+Scenarios:
+    auth      signup + login storm
+    upload    PDF upload and analysis, 1 to 500 pages
+    tech      technology stack extraction with recommendations
+    daily     30 consecutive days of daily task generation, from the day plan and LLM-refined
+    checkoff  task check-offs for the generated days
+
+Usage:
+    python -m benchmarks.run_benchmarks --scenarios auth,upload,tech,daily,checkoff \\
+        --latency-ms 300 --concurrency 8 --output benchmarks/results
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.mock_mistral import mock_url, start_mock_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALL_SCENARIOS = ["auth", "upload", "tech", "daily", "checkoff"]
+
+PAGE_TEXT = (
+    "Section {page}. The platform ingests vehicle telemetry through Apache Kafka and stores trips in "
+    "PostgreSQL. Operators use a React dashboard with live maps, while the REST API is built with FastAPI "
+    "and deployed with Docker on AWS. Requirements for section {page} cover alerting, reporting, access "
+    "control and audit logging for fleet managers and drivers.\n"
+)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(name: str, latencies: List[float], errors: int, elapsed: float, **extra) -> dict:
+    total = len(latencies) + errors
+    return {
+        "scenario": name,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2) if latencies else 0.0,
+        },
+        **extra
+    }
+
+
+def make_pdf(pages: int) -> bytes:
+    import fitz
+    document = fitz.open()
+    for page_number in range(1, pages + 1):
+        page = document.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), PAGE_TEXT.format(page=page_number) * 6, fontsize=9)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def process_tree_rss_kb(pid: int) -> int:
+    """Resident memory of a process and its direct children, from /proc (Linux only)"""
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+
+    total = 0
+    for process_id in pids:
+        try:
+            with open(f"/proc/{process_id}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        except OSError:
+            continue
+    return total
+
+
+class AppServer:
+    """Run the app under uvicorn (or a custom command) and sample its peak RSS"""
+
+    def __init__(self, port: int, env: Dict[str, str], workers: int = 1, command: Optional[List[str]] = None):
+        self.port = port
+        self.env = env
+        self.command = command or [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning"
+        ]
+        self.peak_rss_kb = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._stop = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self._process = subprocess.Popen(self.command, cwd=ROOT, env={**os.environ, **self.env})
+        deadline = time.monotonic() + 120
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError("App server exited during startup")
+            try:
+                if httpx.get(f"{self.base_url}/docs", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                time.sleep(0.25)
+        else:
+            raise RuntimeError("App server did not start within 120s")
+
+        threading.Thread(target=self._sample_rss, daemon=True).start()
+        return self
+
+    def _sample_rss(self):
+        while not self._stop.wait(0.1):
+            self.peak_rss_kb = max(self.peak_rss_kb, process_tree_rss_kb(self._process.pid))
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+
+
+class Bench:
+    def __init__(self, base_url: str, concurrency: int):
+        self.client = httpx.Client(base_url=base_url, timeout=600, limits=httpx.Limits(max_connections=concurrency * 2))
+        self.concurrency = concurrency
+        self.headers: Dict[str, str] = {}
+        self.project_ids: List[int] = []
+
+    def run(self, name: str, requests: List[Callable[[], httpx.Response]], concurrency: Optional[int] = None, **extra) -> dict:
+        latencies: List[float] = []
+        errors = 0
+        lock = threading.Lock()
+
+        def execute(request):
+            nonlocal errors
+            start = time.perf_counter()
+            try:
+                response = request()
+                ok = response.status_code < 400 and response.json().get("success", True) is not False
+            except (httpx.HTTPError, ValueError, AttributeError):
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency or self.concurrency) as pool:
+            list(pool.map(execute, requests))
+        return summarize(name, latencies, errors, time.perf_counter() - start, **extra)
+
+    def login(self, username: str) -> Dict[str, str]:
+        self.client.post("/auth/signup", json={"username": username, "email": f"{username}@example.com", "password": "bench-password"})
+        token = self.client.post("/auth/login", json={"username": username, "password": "bench-password"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+
+    def upload(self, pdf: bytes, pages: int) -> httpx.Response:
+        response = self.client.post(
+            "/projects/upload-docs",
+            files={"file": (f"spec-{pages}p.pdf", pdf, "application/pdf")},
+            data={"daily_hours": "8", "working_days_per_week": "5"},
+            headers=self.headers
+        )
+        project_id = response.json().get("project_id")
+        if project_id:
+            self.project_ids.append(project_id)
+        return response
+
+
+def scenario_auth(bench: Bench, args) -> List[dict]:
+    run_id = uuid.uuid4().hex[:8]
+    usernames = [f"storm-{run_id}-{i}" for i in range(args.users)]
+    signups = bench.run("auth_signup", [
+        lambda name=name: bench.client.post("/auth/signup", json={"username": name, "email": f"{name}@example.com", "password": "bench-password"})
+        for name in usernames
+    ])
+    logins = bench.run("auth_login", [
+        lambda name=name: bench.client.post("/auth/login", json={"username": name, "password": "bench-password"})
+        for name in usernames
+    ])
+    return [signups, logins]
+
+
+def scenario_upload(bench: Bench, args) -> List[dict]:
+    results = []
+    for pages in args.pages:
+        pdf = make_pdf(pages)
+        results.append(bench.run(
+            f"upload_pdf_{pages}p",
+            [lambda: bench.upload(pdf, pages) for _ in range(args.uploads_per_size)],
+            concurrency=min(bench.concurrency, args.uploads_per_size),
+            pages=pages,
+            pdf_bytes=len(pdf)
+        ))
+    return results
+
+
+def scenario_tech(bench: Bench, args) -> List[dict]:
+    pdf = make_pdf(10)
+    return [bench.run("extract_tech_stack", [
+        lambda: bench.client.post(
+            "/projects/extract-tech-stack",
+            files={"file": ("spec.pdf", pdf, "application/pdf")},
+            data={"include_recommendations": "true"},
+            headers=bench.headers
+        )
+        for _ in range(args.tech_requests)
+    ])]
+
+
+def _ensure_project(bench: Bench) -> int:
+    if not bench.project_ids:
+        bench.upload(make_pdf(5), 5)
+    return bench.project_ids[0]
+
+
+def scenario_daily(bench: Bench, args) -> List[dict]:
+    project_id = _ensure_project(bench)
+    # Days depend on the previous day's carry-over, so they run in order; days come from
+    # the stored day plan unless refined by the LLM, and dates from the project calendar
+    return [
+        bench.run(name, [
+            lambda day=day, refine=refine: bench.client.post(
+                "/projects/generate-daily-tasks",
+                data={
+                    "project_id": project_id,
+                    "day_number": day,
+                    "refine": str(refine).lower()
+                },
+                headers=bench.headers
+            )
+            for day in range(1, args.days + 1)
+        ], concurrency=1, days=args.days)
+        for name, refine in (("daily_tasks", False), ("daily_tasks_refined", True))
+    ]
+
+
+def scenario_checkoff(bench: Bench, args) -> List[dict]:
+    project_id = _ensure_project(bench)
+
+    def check_off(day: int) -> httpx.Response:
+        log = bench.client.get("/projects/daily-log", params={"project_id": project_id, "day_number": day}, headers=bench.headers).json()
+        tasks = log.get("log", {}).get("tasks", [])
+        return bench.client.post(
+            "/projects/projects/log-daily-tasks",
+            json={"project_id": project_id, "day_number": day, "completed_tasks": tasks[: max(1, len(tasks) // 2)]},
+            headers=bench.headers
+        )
+
+    return [bench.run("task_checkoffs", [lambda day=day: check_off(day) for day in range(1, args.days + 1)])]
+
+
+SCENARIOS = {
+    "auth": scenario_auth,
+    "upload": scenario_upload,
+    "tech": scenario_tech,
+    "daily": scenario_daily,
+    "checkoff": scenario_checkoff,
+}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def benchmark_env(args, llm_url: str) -> Dict[str, str]:
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='planpilot-bench-'), 'bench.db')}"
+    return {
+        "DATABASE_URL": database_url,
+        "DB_ECHO": "false",
+        "MISTRAL_API_URL": llm_url,
+        "MISTRAL_API_KEY": "mock",
+        "LLM_USER_REQUESTS_PER_MINUTE": "0",
+        "LLM_GLOBAL_REQUESTS_PER_MINUTE": "0",
+        "LLM_USER_TOKENS_PER_DAY": "0",
+        "LLM_GLOBAL_TOKENS_PER_DAY": "0",
+        # Benchmarks measure the app itself; load shedding would only cap the numbers
+        "ADMISSION_CONTROL": "false",
+    }
+
+
+def run_suite(args) -> dict:
+    mock = start_mock_server(0, args.latency_ms, args.jitter_ms)
+    env = benchmark_env(args, mock_url(mock))
+    results = []
+
+    with AppServer(args.port, env, workers=args.workers) as server:
+        bench = Bench(server.base_url, args.concurrency)
+        bench.headers = bench.login(f"bench-{uuid.uuid4().hex[:8]}")
+        for name in args.scenarios:
+            print(f"running {name}...", file=sys.stderr)
+            results.extend(SCENARIOS[name](bench, args))
+        peak_rss_kb = server.peak_rss_kb
+
+    mock.shutdown()
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "database": "postgres" if (args.database_url or "").startswith("postgres") else "sqlite",
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "mock_latency_ms": args.latency_ms,
+            "mock_jitter_ms": args.jitter_ms,
+        },
+        "peak_rss_mb": round(peak_rss_kb / 1024, 1),
+        "results": results,
+    }
+
+
+def print_table(report: dict):
+    print(f"{'scenario':<24}{'reqs':>6}{'err':>5}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for result in report["results"]:
+        latency = result["latency_ms"]
+        print(f"{result['scenario']:<24}{result['requests']:>6}{result['errors']:>5}{result['throughput_rps']:>9}"
+              f"{latency['p50']:>10}{latency['p95']:>10}{latency['p99']:>10}")
+    print(f"peak server RSS: {report['peak_rss_mb']} MB")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=ALL_SCENARIOS)
+    parser.add_argument("--database-url", default=None, help="Defaults to a fresh SQLite file")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--pages", type=lambda value: [int(p) for p in value.split(",")], default=[1, 10, 100, 500])
+    parser.add_argument("--uploads-per-size", type=int, default=3)
+    parser.add_argument("--tech-requests", type=int, default=10)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "results"))
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_suite(args)
+    print_table(report)
+
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['git_revision']}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
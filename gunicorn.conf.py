@@ -0,0 +1,49 @@
+"""Production run mode: gunicorn managing uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Workers share nothing in memory. SHARED_CACHE_STORE=postgres and ADMISSION_STORE=postgres (set
+in the Docker image) make caches, invalidations and rate limits apply across workers (and hosts).
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+# Embedding and PDF extraction are CPU bound, so one worker per core; each loads its own model
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app (FastAPI, SQLAlchemy, torch, sentence-transformers) once in the master;
+# workers fork from it, start faster and share those pages until they write to them
+preload_app = os.getenv("PRELOAD_APP", "true").lower() == "true"
+
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+# A stopping worker finishes its requests, LLM calls included, for this long before it is killed
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "90"))
+keepalive = int(os.getenv("KEEPALIVE_SECONDS", "5"))
+# Recycle workers now and then so slow leaks cannot accumulate; 0 disables
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    """Create tables once in the master, so workers starting together do not race to create them"""
+    from app.database import create_tables
+    from app.shared_cache import SHARED_CACHE_STORE
+    if server.cfg.workers > 1 and SHARED_CACHE_STORE != "postgres":
+        print(f"⚠️ {server.cfg.workers} workers with SHARED_CACHE_STORE={SHARED_CACHE_STORE}: "
+              "each worker keeps its own caches and search indexes, which go stale after changes made by the others")
+    try:
+        create_tables()
+    except Exception as e:
+        # Workers retry at their own startup
+        print(f"❌ Error creating database tables: {e}")
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master; each worker opens its own"""
+    from app.database import engine
+    engine.dispose(close=False)